@@ -0,0 +1,62 @@
+from typing import Optional
+
+import pandas as pd
+import streamlit as st
+
+import cache
+import db
+import tracing
+from db import ActivityEntry
+
+# --- 활동 기록 표 ---
+# 포인트 기록 화면(pages/3_포인트_로그_보기.py, kids_app.py)이 쓰는 DataFrame 을 만듭니다.
+# 기록을 새로 불러왔을 때만 한 번 변환해서 캐시에 함께 두고, 다시 그릴 때는 만들어 둔 표를 그대로 씁니다.
+# 날짜는 한국 시간의 datetime 열로 바꿔 두므로 표에서 날짜로 정렬해도 연도가 바뀌는 곳에서 순서가 틀리지 않고,
+# 보기 좋은 형식은 st.dataframe 의 column_config 가 화면에서만 적용합니다.
+
+LOCAL_TIMEZONE = 'Asia/Seoul'
+DATE_FORMAT = 'YYYY년 MM월 DD일 HH:mm'
+KIND_LABELS = {'mission': '포인트 변경', 'redemption': '보상 사용'}
+
+# 표에 보여줄 열 (이름 열은 가족 전체 기록에서만 씁니다)
+COLUMN_CONFIG = {
+    'occurred_at': st.column_config.DatetimeColumn("날짜", format=DATE_FORMAT),
+    'full_name': "이름",
+    'kind_label': "종류",
+    'content': "내용",
+}
+
+
+def to_frame(entries: list[ActivityEntry]) -> pd.DataFrame:
+    frame = pd.DataFrame.from_records(entries, columns=list(entries[0]) if entries else list(ActivityEntry.__annotations__))
+    frame['occurred_at'] = pd.to_datetime(frame['occurred_at'], utc=True, format='ISO8601').dt.tz_convert(LOCAL_TIMEZONE)
+
+    is_mission = frame['kind'].eq('mission')
+    reward_name = frame['reward_name'].fillna('알 수 없는 보상').astype('string')
+    points_spent = frame['points_spent'].astype('Int64').astype('string')
+    frame['content'] = frame['notes'].astype('string').where(is_mission, "'" + reward_name + "' 구매 (-" + points_spent + " BP)")
+    frame['kind_label'] = frame['kind'].map(KIND_LABELS).astype('category')
+    if 'full_name' in frame:
+        frame['full_name'] = frame['full_name'].fillna('알 수 없음')
+    return frame
+
+
+# db.list_activity_pages 와 같지만 DataFrame 을 돌려줍니다. 반환값: (표, 다음 페이지가 더 있는지)
+# 키가 ('activity', user_id, ...) 로 시작하므로 db.invalidate_user_logs() 가 목록과 함께 지웁니다.
+def load_frame(user_id: Optional[str] = None, pages: int = 1, page_size: int = db.ACTIVITY_PAGE_SIZE,
+               columns: str = '*') -> tuple[pd.DataFrame, bool]:
+    key = ('activity', user_id, 'frame', pages, page_size, columns)
+    hit, value = cache.store.get(key)
+    tracing.record_cache('activity_frame', hit=hit)
+    if hit:
+        return value
+    since = cache.store.stamp()
+    entries, has_more = db.list_activity_pages(user_id, pages=pages, page_size=page_size, columns=columns)
+    value = (to_frame(entries), has_more)
+    cache.store.set(key, value, db.LOG_TTL, since=since)
+    return value
+
+
+def show(frame: pd.DataFrame, with_name: bool = True) -> None:
+    order = ['occurred_at', 'full_name', 'content', 'kind_label'] if with_name else ['occurred_at', 'kind_label', 'content']
+    st.dataframe(frame, column_order=order, column_config=COLUMN_CONFIG, use_container_width=True, hide_index=True)
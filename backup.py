@@ -0,0 +1,234 @@
+import argparse
+import csv
+import importlib.util
+import io
+import itertools
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import BinaryIO, Iterator
+
+import db
+import tenancy
+
+# --- 기록 내보내기 / 가져오기 ---
+# mission_log, redemption_log, daily_checks 를 CSV 나 Parquet 파일로 내보내고 다시 가져옵니다.
+# 내보낼 때는 db.EXPORT_PAGE_SIZE 행씩 읽어서 바로 파일에 쓰고,
+# 가져올 때는 IMPORT_CHUNK_SIZE 행씩 읽어서 한 번의 요청으로 넣으므로 기록이 아무리 많아도 메모리 사용량이 일정합니다.
+# Parquet 는 pyarrow 가 설치되어 있을 때만 쓸 수 있습니다.
+#
+# 명령줄에서도 쓸 수 있습니다.
+#   python backup.py export mission_log mission_log.csv
+#   python backup.py import mission_log mission_log.csv
+
+IMPORT_CHUNK_SIZE = 500
+FORMATS = ('csv', 'parquet')
+
+
+@dataclass(frozen=True)
+class ImportResult:
+    read: int      # 파일에서 읽은 행 수
+    inserted: int  # 새로 넣은 행 수
+
+    # 같은 id(또는 같은 사용자와 날짜)의 행이 이미 있어서 넣지 않은 행 수
+    # 이 가구에서 예전에 가져온 기록일 수도 있지만, 다른 가구의 기록과 id 가 겹친 것일 수도 있습니다.
+    @property
+    def skipped(self) -> int:
+        return self.read - self.inserted
+
+
+@dataclass(frozen=True)
+class TableSpec:
+    keys: tuple[str, ...]          # 내보낼 때 정렬하고 이어 읽는 기준 열
+    on_conflict: str               # 가져올 때 이미 있는 행을 알아보는 기준 열
+    int_columns: tuple[str, ...] = ()   # Parquet 에서 정수(int64)로 저장하는 열
+    json_columns: tuple[str, ...] = ()  # CSV 에서는 JSON 문자열로 저장하는 배열 열 (Parquet 에서는 문자열 목록)
+
+
+TABLES = {
+    'mission_log': TableSpec(keys=('id',), on_conflict='id', int_columns=('id', 'mission_id')),
+    'redemption_log': TableSpec(keys=('id',), on_conflict='id', int_columns=('id', 'reward_id', 'points_spent')),
+    'daily_checks': TableSpec(keys=('check_date', 'user_id'), on_conflict='user_id, check_date',
+                              int_columns=('id', 'daily_score'), json_columns=('violated_items',)),
+}
+
+
+# 설치 여부만 확인합니다. pyarrow 는 가져오는 데 오래 걸리므로 실제로 내보내거나 가져올 때 import 합니다.
+def parquet_available() -> bool:
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def _spec(table: str) -> TableSpec:
+    if table not in TABLES:
+        raise ValueError(f"내보내거나 가져올 수 없는 테이블입니다: {table}")
+    return TABLES[table]
+
+
+# --- 내보내기 ---
+
+# table 의 모든 행을 out(바이너리 파일)에 씁니다. 반환값: 쓴 행 수
+def export_table(table: str, out: BinaryIO, fmt: str = 'csv') -> int:
+    pages = db.iter_table_pages(table, _spec(table).keys)
+    if fmt == 'csv':
+        return _write_csv(table, pages, out)
+    if fmt == 'parquet':
+        return _write_parquet(table, pages, out)
+    raise ValueError(f"지원하지 않는 형식입니다: {fmt}")
+
+
+def _write_csv(table: str, pages: Iterator[list[dict]], out: BinaryIO) -> int:
+    json_columns = _spec(table).json_columns
+    # utf-8-sig: 엑셀에서 열어도 한글이 깨지지 않도록 BOM 을 붙입니다.
+    text = io.TextIOWrapper(out, encoding='utf-8-sig', newline='', write_through=True)
+    writer = None
+    count = 0
+    try:
+        for page in pages:
+            if writer is None:
+                writer = csv.DictWriter(text, fieldnames=list(page[0]))
+                writer.writeheader()
+            for row in page:
+                for column in json_columns:
+                    if row.get(column) is not None:
+                        row[column] = json.dumps(row[column], ensure_ascii=False)
+            writer.writerows(page)
+            count += len(page)
+    finally:
+        # 호출한 쪽의 파일을 닫지 않도록 감싼 것만 떼어냅니다.
+        text.detach()
+    return count
+
+
+# 열 형식은 값이 아니라 테이블 정의(TableSpec)로 정합니다. 첫 페이지에서 값이 모두 비어 있던 열도 형식이 같습니다.
+# 나머지 열(uuid, 날짜, 시각, 문자열)은 API 가 돌려준 그대로 문자열로 저장합니다.
+def _parquet_schema(table: str, columns: list[str]):
+    import pyarrow as pa
+
+    spec = _spec(table)
+
+    def column_type(column: str):
+        if column in spec.int_columns:
+            return pa.int64()
+        if column in spec.json_columns:
+            return pa.list_(pa.string())
+        return pa.string()
+
+    return pa.schema([(column, column_type(column)) for column in columns])
+
+
+def _write_parquet(table: str, pages: Iterator[list[dict]], out: BinaryIO) -> int:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    count = 0
+    try:
+        for page in pages:
+            if writer is None:
+                writer = pq.ParquetWriter(out, _parquet_schema(table, list(page[0])))
+            writer.write_table(pa.Table.from_pylist(page, schema=writer.schema))
+            count += len(page)
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
+
+
+# --- 가져오기 ---
+
+# source(바이너리 파일)의 행들을 IMPORT_CHUNK_SIZE 개씩 묶어 table 에 넣습니다.
+# 이미 있는 행(같은 id, 같은 사용자와 날짜)은 건너뛰고 그 수를 돌려줍니다. 다른 가구에서 내보낸 파일이면 ValueError 를 올립니다.
+def import_table(table: str, source: BinaryIO, fmt: str = 'csv', chunk_size: int = IMPORT_CHUNK_SIZE) -> ImportResult:
+    spec = _spec(table)
+    if fmt == 'csv':
+        chunks = _read_csv(source, spec, chunk_size)
+    elif fmt == 'parquet':
+        chunks = _read_parquet(source, chunk_size)
+    else:
+        raise ValueError(f"지원하지 않는 형식입니다: {fmt}")
+
+    household_id = tenancy.require()
+    members = {profile['id'] for profile in db.list_profiles()}
+    read = inserted = 0
+    for chunk in chunks:
+        _check_household(chunk, household_id, members)
+        inserted += db.insert_rows(table, [_to_json_row(row) for row in chunk], spec.on_conflict)
+        read += len(chunk)
+    db.sync_log_id_sequences()
+    db.invalidate_logs()
+    return ImportResult(read, inserted)
+
+
+# 다른 가구에서 내보낸 파일은 받지 않습니다. id 와 user_id 가 그 가구의 것이라 지금 가구에 넣으면
+# 다른 가구의 사람을 가리키거나 그 가구의 기록과 id 가 겹칩니다.
+# 가구가 적혀 있지 않은 행도 user_id 가 지금 가구의 구성원이어야 합니다.
+def _check_household(rows: list[dict], household_id: str, members: set[str]) -> None:
+    for row in rows:
+        if row.get('household_id') not in (None, household_id):
+            raise ValueError("다른 가구에서 내보낸 파일은 가져올 수 없습니다.")
+        if row.get('user_id') not in members:
+            raise ValueError(f"이 가구의 구성원이 아닌 사용자의 기록이 있습니다: {row.get('user_id')}")
+
+
+def _read_csv(source: BinaryIO, spec: TableSpec, chunk_size: int) -> Iterator[list[dict]]:
+    text = io.TextIOWrapper(source, encoding='utf-8-sig', newline='')
+    try:
+        rows = csv.DictReader(text)
+        while chunk := list(itertools.islice(rows, chunk_size)):
+            for row in chunk:
+                for column, value in row.items():
+                    # CSV 에서는 NULL 과 빈 문자열을 구분할 수 없으므로 빈 값은 NULL 로 넣습니다.
+                    if value == '':
+                        row[column] = None
+                    elif column in spec.json_columns:
+                        row[column] = json.loads(value)
+            yield chunk
+    finally:
+        text.detach()
+
+
+def _read_parquet(source: BinaryIO, chunk_size: int) -> Iterator[list[dict]]:
+    import pyarrow.parquet as pq
+
+    for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_size):
+        yield batch.to_pylist()
+
+
+# Parquet 에서 읽은 날짜/시각 값을 요청에 담을 수 있는 문자열로 바꿉니다.
+def _to_json_row(row: dict) -> dict:
+    return {
+        column: value.isoformat() if isinstance(value, (date, datetime)) else value
+        for column, value in row.items()
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="포인트 기록 내보내기 / 가져오기")
+    parser.add_argument('action', choices=('export', 'import'))
+    parser.add_argument('table', choices=list(TABLES))
+    parser.add_argument('path')
+    parser.add_argument('--format', choices=FORMATS,
+                        help="파일 형식 (생략하면 파일 확장자로 정합니다)")
+    parser.add_argument('--household', help="가구 id (생략하면 HOUSEHOLD_ID 설정, 가구가 하나뿐이면 그 가구)")
+    args = parser.parse_args()
+
+    household_id = args.household or tenancy.default()
+    if household_id is None:
+        parser.error("가구가 여러 개입니다. --household 로 가구 id 를 지정해주세요.")
+
+    fmt = args.format or ('parquet' if args.path.endswith('.parquet') else 'csv')
+    with tenancy.use(household_id):
+        if args.action == 'export':
+            with open(args.path, 'wb') as out:
+                count = export_table(args.table, out, fmt)
+            print(f"{args.table}: {count}행을 {args.path} 에 저장했습니다.")
+        else:
+            with open(args.path, 'rb') as source:
+                result = import_table(args.table, source, fmt)
+            print(f"{args.table}: {args.path} 에서 {result.read}행을 읽어 {result.inserted}행을 넣었습니다.")
+            if result.skipped:
+                print(f"  같은 id 의 기록이 이미 있어 {result.skipped}행은 건너뛰었습니다.")
+
+
+if __name__ == '__main__':
+    main()
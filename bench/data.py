@@ -0,0 +1,115 @@
+import random
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+# --- 합성 데이터 ---
+# 실제 테이블과 같은 열을 가진 가짜 데이터를 만듭니다. seed 가 같으면 항상 같은 데이터가 나옵니다.
+# logs 는 mission_log 와 redemption_log 를 합한 행 수이고, 그중 REDEMPTION_RATIO 만큼이 보상 사용입니다.
+# 모든 행은 가구 하나(households 의 첫 행)에 속합니다.
+
+REDEMPTION_RATIO = 0.2
+MISSIONS = 30
+REWARDS = 20
+CHECKLIST_ITEMS = 15
+
+
+def generate(profiles: int = 10, logs: int = 100_000, days: int = 365, seed: int = 0) -> dict[str, list[dict]]:
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    today = date.today()
+    household_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    people = [
+        {
+            'id': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            'full_name': f'아이{i + 1:02d}',
+            'current_points': rng.randint(0, 500),
+            'is_child': True,
+            'email': f'child{i + 1}@example.com',
+        }
+        for i in range(profiles)
+    ]
+    missions = [
+        {'id': i + 1, 'title': f'미션 {i + 1}', 'description': f'미션 {i + 1} 설명',
+         'points_reward': rng.choice([5, 10, 20, 30]), 'is_active': rng.random() < 0.8,
+         'updated_at': now.isoformat()}
+        for i in range(MISSIONS)
+    ]
+    rewards = [
+        {'id': i + 1, 'name': f'보상 {i + 1}', 'description': f'보상 {i + 1} 설명',
+         'point_cost': rng.choice([10, 30, 50, 100, 200]), 'category': rng.choice(['간식', '장난감', '활동']), 'is_active': rng.random() < 0.8,
+         'updated_at': now.isoformat()}
+        for i in range(REWARDS)
+    ]
+    checklist_items = [
+        {'id': i + 1, 'content': f'체크 항목 {i + 1}',
+         'target_user': '공통' if i < CHECKLIST_ITEMS // 2 else rng.choice(people)['full_name'],
+         'deduction_points': rng.choice([5, 10]), 'is_active': True}
+        for i in range(CHECKLIST_ITEMS)
+    ]
+
+    # 모든 아이에게 매일, 한 아이에게 주말마다 주는 정기 지급
+    active_missions = [mission for mission in missions if mission['is_active']]
+    recurring_missions = [
+        {'id': 1, 'mission_id': active_missions[0]['id'], 'user_id': None, 'weekdays': [1, 2, 3, 4, 5, 6, 7],
+         'starts_on': str(today - timedelta(days=days)), 'is_active': True},
+        {'id': 2, 'mission_id': active_missions[1]['id'], 'user_id': people[0]['id'], 'weekdays': [6, 7],
+         'starts_on': str(today - timedelta(days=days)), 'is_active': True},
+    ]
+
+    # 오래된 기록부터 id 가 커지도록 시간순으로 만듭니다.
+    span = days * 24 * 3600
+    offsets = sorted((rng.randrange(span) for _ in range(logs)), reverse=True)
+    mission_log, redemption_log = [], []
+    for offset in offsets:
+        person = rng.choice(people)
+        at = (now - timedelta(seconds=offset)).isoformat()
+        if rng.random() < REDEMPTION_RATIO:
+            reward = rng.choice(rewards)
+            redemption_log.append({
+                'id': len(redemption_log) + 1, 'user_id': person['id'], 'reward_id': reward['id'],
+                'points_spent': reward['point_cost'], 'redeemed_at': at, 'idempotency_key': None,
+            })
+        else:
+            mission = rng.choice(missions)
+            mission_log.append({
+                'id': len(mission_log) + 1, 'user_id': person['id'], 'mission_id': mission['id'],
+                'notes': f"[지급] {mission['title']} (+{mission['points_reward']} BP)", 'created_at': at,
+                'idempotency_key': None,
+            })
+
+    daily_checks, daily_stats = [], []
+    for person in people:
+        for day in range(days):
+            check_date = str(today - timedelta(days=day))
+            violated = rng.sample(checklist_items, rng.randint(0, 3))
+            score = 110 - sum(item['deduction_points'] for item in violated)
+            violated_items = [item['content'] for item in violated]
+            daily_checks.append({
+                'id': len(daily_checks) + 1, 'user_id': person['id'], 'check_date': check_date,
+                'daily_score': score, 'violated_items': violated_items,
+            })
+            daily_stats.append({
+                'user_id': person['id'], 'day': check_date, 'earned': rng.randint(0, 60),
+                'spent': rng.choice([0, 0, 0, 30, 50]), 'deducted': 110 - score,
+                'checklist_score': score, 'violated_items': violated_items,
+            })
+
+    for rows in (people, missions, rewards, checklist_items, recurring_missions, mission_log, redemption_log, daily_checks,
+                 daily_stats):
+        for row in rows:
+            row['household_id'] = household_id
+
+    return {
+        'households': [{'id': household_id, 'name': '우리 가족', 'created_at': now.isoformat()}],
+        'profiles': people,
+        'missions': missions,
+        'rewards': rewards,
+        'checklist_items': checklist_items,
+        'recurring_missions': recurring_missions,
+        'scheduler_runs': [],
+        'mission_log': mission_log,
+        'redemption_log': redemption_log,
+        'daily_checks': daily_checks,
+        'daily_stats': daily_stats,
+    }
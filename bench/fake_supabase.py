@@ -0,0 +1,396 @@
+import bisect
+import re
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+from typing import Any, Callable, Optional
+
+from postgrest.exceptions import APIError
+
+# --- 프로세스 안에서 도는 가짜 Supabase ---
+# db.py 가 쓰는 만큼의 PostgREST 쿼리 빌더(table/select/eq/in_/or_/order/range/upsert ...)와
+# RPC(sql/*.sql 의 함수들)를 메모리 위의 리스트로 흉내 냅니다.
+# execute() 한 번이 서버 왕복 한 번이므로, 그때마다 latency 초만큼 기다리고 호출 수와 돌려준 행 수를 셉니다.
+# 여러 스레드(db.fetch_parallel, outbox 의 Flusher)에서 동시에 불려도 되도록 잠금을 겁니다.
+
+# 테이블별 자동 증가 id 를 쓰는 테이블
+ID_TABLES = ('missions', 'rewards', 'checklist_items', 'mission_log', 'redemption_log', 'daily_checks', 'recurring_missions')
+# household_id 가 없으면 프로필에서 채우는 테이블 (sql/010_households.sql 의 트리거)
+HOUSEHOLD_FROM_PROFILE = ('mission_log', 'redemption_log', 'daily_checks', 'daily_stats')
+
+
+class FakeSupabase:
+    def __init__(self, tables: dict[str, list[dict]], latency: float = 0.0):
+        self.tables = {name: list(rows) for name, rows in tables.items()}
+        self.latency = latency
+        self.calls: Counter = Counter()
+        self.rows_returned = 0
+        self.lock = threading.RLock()
+        self.auth = _FakeAuth(self)
+        self._next_id = {
+            name: max((row.get('id', 0) for row in self.tables.get(name, []) if isinstance(row.get('id'), int)), default=0) + 1
+            for name in ID_TABLES
+        }
+        self._activity_version = 0
+        self._activity_index: tuple[int, dict] = (-1, {})
+        self.rpcs: dict[str, Callable[[dict], Any]] = {
+            'apply_point_deltas': self._apply_point_deltas,
+            'activity_feed_page': self._activity_feed_page,
+            'point_balance_as_of': self._point_balance_as_of,
+            'point_ledger_drift': self._point_ledger_drift,
+            'sync_log_id_sequences': lambda params: None,
+            'catalog_versions': self._catalog_versions,
+        }
+
+    # --- 호출 통계 ---
+    def reset_counts(self) -> None:
+        with self.lock:
+            self.calls.clear()
+            self.rows_returned = 0
+
+    def query_count(self) -> int:
+        return sum(self.calls.values())
+
+    def _round_trip(self, name: str, data: Any) -> SimpleNamespace:
+        if self.latency:
+            time.sleep(self.latency)
+        with self.lock:
+            self.calls[name] += 1
+            self.rows_returned += len(data) if isinstance(data, list) else int(data is not None)
+        return SimpleNamespace(data=data, count=None)
+
+    # --- 클라이언트 API ---
+    def table(self, name: str) -> '_Query':
+        return _Query(self, name)
+
+    def rpc(self, name: str, params: dict) -> '_Rpc':
+        return _Rpc(self, name, params)
+
+    def rows(self, table: str) -> list[dict]:
+        return self.tables.setdefault(table, [])
+
+    def insert_row(self, table: str, row: dict) -> dict:
+        with self.lock:
+            row = dict(row)
+            if table in ID_TABLES and row.get('id') is None:
+                row['id'] = self._next_id[table]
+                self._next_id[table] += 1
+            elif table in ID_TABLES and isinstance(row['id'], int):
+                self._next_id[table] = max(self._next_id[table], row['id'] + 1)
+            if table in HOUSEHOLD_FROM_PROFILE and row.get('household_id') is None:
+                row['household_id'] = self._profile(row['user_id'])['household_id']
+            self.rows(table).append(row)
+            if table in ('mission_log', 'redemption_log'):
+                self._activity_version += 1
+            return row
+
+    # --- RPC (sql/*.sql 와 같은 결과 모양) ---
+    # household_id 를 주면 그 가구의 프로필만 찾습니다. (sql/012_household_checks.sql)
+    def _profile(self, user_id: str, household_id: Optional[str] = None) -> dict:
+        for profile in self.rows('profiles'):
+            if profile['id'] == user_id and household_id in (None, profile['household_id']):
+                return profile
+        raise APIError({'code': 'P0001', 'message': 'profile_not_found', 'details': user_id})
+
+    def _apply_point_deltas(self, params: dict) -> list[dict]:
+        with self.lock:
+            seen = {row.get('idempotency_key') for table in ('mission_log', 'redemption_log') for row in self.rows(table)}
+            # 하나라도 실패하면 전체를 되돌리도록 먼저 검사하고 나서 반영합니다.
+            balances = {profile['id']: profile['current_points'] for profile in self.rows('profiles')}
+            plan = []
+            for entry in params['p_entries']:
+                user_id = entry['user_id']
+                self._profile(user_id, params['p_household_id'])
+                if entry['idempotency_key'] in seen:
+                    plan.append((entry, False, 0))
+                    continue
+                delta = entry['delta']
+                if balances[user_id] + delta < 0:
+                    if not entry.get('floor_at_zero'):
+                        raise APIError({'message': 'insufficient_points', 'details': str(balances[user_id])})
+                    delta = -balances[user_id]
+                balances[user_id] += delta
+                seen.add(entry['idempotency_key'])
+                plan.append((entry, True, delta))
+
+            results = []
+            for entry, applied, delta in plan:
+                profile = self._profile(entry['user_id'], params['p_household_id'])
+                if applied:
+                    profile['current_points'] += delta
+                    now = _now()
+                    if entry.get('reward_id') is not None:
+                        self.insert_row('redemption_log', {
+                            'user_id': entry['user_id'], 'reward_id': entry['reward_id'], 'points_spent': -delta,
+                            'redeemed_at': now, 'idempotency_key': entry['idempotency_key'],
+                        })
+                    else:
+                        self.insert_row('mission_log', {
+                            'user_id': entry['user_id'], 'mission_id': entry.get('mission_id'), 'notes': entry.get('notes'),
+                            'created_at': now, 'idempotency_key': entry['idempotency_key'],
+                        })
+                results.append({
+                    'applied': applied, 'current_points': profile['current_points'],
+                    'user_id': entry['user_id'], 'idempotency_key': entry['idempotency_key'],
+                })
+            return results
+
+    # 사용자별, 가구별 활동 기록을 (occurred_at, entry_id) 오름차순으로 정렬해 둔 색인
+    def _activity(self, key: Optional[str]) -> tuple[list[tuple], list[dict]]:
+        with self.lock:
+            version, index = self._activity_index
+            if version != self._activity_version:
+                names = {profile['id']: profile['full_name'] for profile in self.rows('profiles')}
+                rewards = {reward['id']: reward['name'] for reward in self.rows('rewards')}
+                entries = [
+                    {'entry_id': f"mission:{row['id']}", 'kind': 'mission', 'user_id': row['user_id'],
+                     'occurred_at': row['created_at'], 'notes': row.get('notes'), 'points_spent': None, 'reward_id': None,
+                     'full_name': names.get(row['user_id']), 'reward_name': None, 'household_id': row['household_id']}
+                    for row in self.rows('mission_log')
+                ] + [
+                    {'entry_id': f"redemption:{row['id']}", 'kind': 'redemption', 'user_id': row['user_id'],
+                     'occurred_at': row['redeemed_at'], 'notes': None, 'points_spent': row['points_spent'],
+                     'reward_id': row['reward_id'], 'full_name': names.get(row['user_id']),
+                     'reward_name': rewards.get(row['reward_id']), 'household_id': row['household_id']}
+                    for row in self.rows('redemption_log')
+                ]
+                entries.sort(key=lambda entry: (entry['occurred_at'], entry['entry_id']))
+                index = {}
+                for entry in entries:
+                    index.setdefault(entry.pop('household_id'), []).append(entry)
+                    index.setdefault(entry['user_id'], []).append(entry)
+                index = {key: ([(e['occurred_at'], e['entry_id']) for e in value], value) for key, value in index.items()}
+                self._activity_index = (self._activity_version, index)
+            return index.get(key, ([], []))
+
+    def _activity_feed_page(self, params: dict) -> list[dict]:
+        keys, entries = self._activity(params.get('p_user_id') or params['p_household_id'])
+        end = len(entries)
+        if params.get('p_before_at') is not None:
+            end = bisect.bisect_left(keys, (params['p_before_at'], params['p_before_id']))
+        start = max(0, end - params.get('p_limit', 50))
+        return entries[start:end][::-1]
+
+    def _catalog_versions(self, params: dict) -> list[dict]:
+        return [
+            {'table_name': table,
+             'version': f"{max((row.get('updated_at', '') for row in rows), default='')}/{len(rows)}"}
+            for table in ('missions', 'rewards')
+            for rows in [[row for row in self.rows(table) if row['household_id'] == params['p_household_id']]]
+        ]
+
+    def _point_balance_as_of(self, params: dict) -> int:
+        return self._profile(params['p_user_id'], params['p_household_id'])['current_points']
+
+    def _point_ledger_drift(self, params: dict) -> list[dict]:
+        return [
+            {'user_id': p['id'], 'full_name': p['full_name'], 'current_points': p['current_points'],
+             'ledger_balance': p['current_points'], 'drift': 0}
+            for p in sorted(self.rows('profiles'), key=lambda p: p['full_name'])
+            if p['household_id'] == params['p_household_id']
+        ]
+
+
+def _now() -> str:
+    return time.strftime('%Y-%m-%dT%H:%M:%S+00:00', time.gmtime())
+
+
+class _Rpc:
+    def __init__(self, client: FakeSupabase, name: str, params: dict):
+        self.client = client
+        self.name = name
+        self.params = params
+        self.columns: Optional[list[str]] = None
+
+    def select(self, columns: str = '*', **_) -> '_Rpc':
+        self.columns = None if columns.strip() == '*' else [c.strip() for c in columns.split(',')]
+        return self
+
+    def execute(self) -> SimpleNamespace:
+        if self.name not in self.client.rpcs:
+            raise APIError({'message': f'function {self.name} does not exist'})
+        data = self.client.rpcs[self.name](self.params)
+        if self.columns is not None and isinstance(data, list):
+            data = [{column: row.get(column) for column in self.columns} for row in data]
+        return self.client._round_trip(f'rpc:{self.name}', data)
+
+
+# --- 쿼리 빌더 ---
+
+_OPERATORS: dict[str, Callable[[Any, Any], bool]] = {
+    'eq': lambda a, b: a == b,
+    'neq': lambda a, b: a != b,
+    'gt': lambda a, b: a is not None and a > b,
+    'gte': lambda a, b: a is not None and a >= b,
+    'lt': lambda a, b: a is not None and a < b,
+    'lte': lambda a, b: a is not None and a <= b,
+}
+
+
+# 필터 문자열 값을 행의 값과 비교할 수 있는 형태로 바꿉니다.
+def _coerce(value: Any, like: Any) -> Any:
+    if isinstance(value, str) and isinstance(like, bool):
+        return value == 'true'
+    if isinstance(value, str) and isinstance(like, int):
+        return int(value)
+    return value
+
+
+def _split_top_level(text: str) -> list[str]:
+    parts, depth, current = [], 0, ''
+    for char in text:
+        if char == ',' and depth == 0:
+            parts.append(current)
+            current = ''
+            continue
+        depth += {'(': 1, ')': -1}.get(char, 0)
+        current += char
+    return parts + [current] if current else parts
+
+
+# "a.gt.1,and(a.eq.1,b.gt.2)" 형태의 or 필터를 행 조건 함수로 바꿉니다.
+def _parse_logic(text: str, combine: Callable = any) -> Callable[[dict], bool]:
+    conditions = []
+    for term in _split_top_level(text):
+        match = re.fullmatch(r'(and|or)\((.*)\)', term)
+        if match:
+            conditions.append(_parse_logic(match.group(2), all if match.group(1) == 'and' else any))
+        else:
+            column, op, value = term.split('.', 2)
+            conditions.append(lambda row, c=column, o=op, v=value: _OPERATORS[o](row.get(c), _coerce(v, row.get(c))))
+    return lambda row: combine(condition(row) for condition in conditions)
+
+
+class _Query:
+    def __init__(self, client: FakeSupabase, table: str):
+        self.client = client
+        self.table = table
+        self.columns: Optional[list[str]] = None
+        self.filters: list[Callable[[dict], bool]] = []
+        self.orders: list[tuple[str, bool]] = []
+        self.offset = 0
+        self.max_rows: Optional[int] = None
+        self.one = False
+        self.write: Optional[tuple[str, Any, dict]] = None
+
+    def select(self, columns: str = '*', **_) -> '_Query':
+        self.columns = None if columns.strip() == '*' else [c.strip() for c in columns.split(',')]
+        return self
+
+    def _filter(self, column: str, op: str, value: Any) -> '_Query':
+        self.filters.append(lambda row: _OPERATORS[op](row.get(column), _coerce(value, row.get(column))))
+        return self
+
+    def eq(self, column: str, value: Any) -> '_Query':
+        return self._filter(column, 'eq', value)
+
+    def neq(self, column: str, value: Any) -> '_Query':
+        return self._filter(column, 'neq', value)
+
+    def gt(self, column: str, value: Any) -> '_Query':
+        return self._filter(column, 'gt', value)
+
+    def gte(self, column: str, value: Any) -> '_Query':
+        return self._filter(column, 'gte', value)
+
+    def lt(self, column: str, value: Any) -> '_Query':
+        return self._filter(column, 'lt', value)
+
+    def lte(self, column: str, value: Any) -> '_Query':
+        return self._filter(column, 'lte', value)
+
+    def in_(self, column: str, values: list) -> '_Query':
+        allowed = set(values)
+        self.filters.append(lambda row: row.get(column) in allowed)
+        return self
+
+    def or_(self, filters: str) -> '_Query':
+        self.filters.append(_parse_logic(filters))
+        return self
+
+    def order(self, column: str, desc: bool = False, **_) -> '_Query':
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, size: int) -> '_Query':
+        self.max_rows = size
+        return self
+
+    def range(self, start: int, end: int) -> '_Query':
+        self.offset, self.max_rows = start, end - start + 1
+        return self
+
+    def single(self) -> '_Query':
+        self.one = True
+        return self
+
+    def upsert(self, rows, on_conflict: str = '', ignore_duplicates: bool = False, **_) -> '_Query':
+        self.write = ('upsert', rows if isinstance(rows, list) else [rows],
+                      {'on_conflict': [c.strip() for c in on_conflict.split(',') if c.strip()] or ['id'],
+                       'ignore_duplicates': ignore_duplicates})
+        return self
+
+    def insert(self, rows, **_) -> '_Query':
+        self.write = ('insert', rows if isinstance(rows, list) else [rows], {})
+        return self
+
+    # 뒤에 붙는 eq/in_ 등의 조건에 맞는 행을 values 로 바꿉니다.
+    def update(self, values: dict, **_) -> '_Query':
+        self.write = ('update', [values], {})
+        return self
+
+    def execute(self) -> SimpleNamespace:
+        if self.write is not None:
+            return self.client._round_trip(f'{self.write[0]}:{self.table}', self._execute_write())
+        with self.client.lock:
+            rows = [row for row in self.client.rows(self.table) if all(f(row) for f in self.filters)]
+        for column, desc in reversed(self.orders):
+            rows.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+        end = None if self.max_rows is None else self.offset + self.max_rows
+        rows = [self._project(row) for row in rows[self.offset:end]]
+        if self.one:
+            if len(rows) != 1:
+                raise APIError({'message': 'JSON object requested, multiple (or no) rows returned', 'code': 'PGRST116'})
+            return self.client._round_trip(f'select:{self.table}', rows[0])
+        return self.client._round_trip(f'select:{self.table}', rows)
+
+    def _project(self, row: dict) -> dict:
+        if self.columns is None:
+            return dict(row)
+        return {column: row.get(column) for column in self.columns}
+
+    def _execute_write(self) -> list[dict]:
+        kind, rows, options = self.write
+        written = []
+        with self.client.lock:
+            if kind == 'insert':
+                return [self.client.insert_row(self.table, row) for row in rows]
+            if kind == 'update':
+                for row in self.client.rows(self.table):
+                    if all(f(row) for f in self.filters):
+                        row.update(rows[0])
+                        written.append(row)
+                return written
+            keys = options['on_conflict']
+            existing = {tuple(str(row.get(k)) for k in keys): row for row in self.client.rows(self.table)}
+            for row in rows:
+                match = existing.get(tuple(str(row.get(k)) for k in keys))
+                if match is None:
+                    written.append(self.client.insert_row(self.table, row))
+                elif not options['ignore_duplicates']:
+                    match.update(row)
+                    written.append(match)
+        return written
+
+
+class _FakeAuth:
+    def __init__(self, client: FakeSupabase):
+        self.client = client
+
+    # 합성 데이터의 프로필마다 email 이 있고, 비밀번호는 확인하지 않습니다.
+    def sign_in_with_password(self, credentials: dict) -> SimpleNamespace:
+        for profile in self.client.rows('profiles'):
+            if profile.get('email') == credentials['email']:
+                return SimpleNamespace(user=SimpleNamespace(id=profile['id'], email=profile['email']))
+        raise APIError({'message': 'Invalid login credentials'})
@@ -0,0 +1,206 @@
+import argparse
+import json
+import logging
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import unicodedata
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import cache  # noqa: E402
+import change_feed  # noqa: E402
+import db  # noqa: E402
+import outbox  # noqa: E402
+import snapshot  # noqa: E402
+import warmup  # noqa: E402
+from bench import data  # noqa: E402
+from bench.fake_supabase import FakeSupabase  # noqa: E402
+
+# --- 페이지 벤치마크 ---
+# 모든 화면 스크립트를 Streamlit AppTest 로 실행하면서, 실제 Supabase 대신 bench/fake_supabase.py 를 씁니다.
+# 화면마다 캐시가 빈 상태의 첫 실행(cold)과 이어지는 다시 실행(warm)의 시간, DB 왕복 횟수, 돌려받은 행 수,
+# 최대 메모리 사용량을 재서 표로 보여줍니다. 조회 횟수나 pandas 작업이 늘어나면 숫자로 드러납니다.
+#
+#   python -m bench.run                                   # 프로필 10명, 기록 10만 건, 왕복 20ms
+#   python -m bench.run --logs 1000000 --latency-ms 50
+#   python -m bench.run --only kids --json result.json
+
+APP_TIMEOUT = 120
+
+
+@dataclass
+class Scenario:
+    name: str
+    script: str
+    # 재기 전에 화면을 원하는 상태로 만드는 함수 (로그인, 메뉴 선택 등). 이 실행들은 재지 않습니다.
+    prepare: Optional[Callable[[AppTest], None]] = None
+    login: bool = False
+
+
+@dataclass
+class Result:
+    name: str
+    cold_ms: float
+    cold_queries: int
+    warm_ms: float
+    warm_max_ms: float
+    warm_queries: float
+    rows: int
+    peak_mb: float
+    errors: list[str] = field(default_factory=list)
+    cold_calls: dict = field(default_factory=dict)
+
+
+def _select_radio(label: str, value: str, sidebar: bool = False) -> Callable[[AppTest], None]:
+    def prepare(at: AppTest) -> None:
+        at.run()
+        radios = at.sidebar.radio if sidebar else at.radio
+        next(radio for radio in radios if radio.label == label).set_value(value).run()
+    return prepare
+
+
+SCENARIOS = [
+    Scenario('app', 'app.py'),
+    Scenario('checklist (하루씩)', 'checklist_app.py'),
+    Scenario('checklist (기간 일괄)', 'checklist_app.py', _select_radio("입력 방식", '기간 일괄 입력')),
+    Scenario('page 1 포인트 지급', 'pages/1_포인트_지급_및_차감.py'),
+    Scenario('page 2 보상 사용', 'pages/2_보상_사용하기.py'),
+    Scenario('page 3 포인트 로그', 'pages/3_포인트_로그_보기.py'),
+    Scenario('page 4 통계 (주간)', 'pages/4_통계_보기.py'),
+    Scenario('page 4 통계 (월간)', 'pages/4_통계_보기.py', _select_radio("보기 단위", "월간")),
+    Scenario('page 5 기록 백업', 'pages/5_기록_백업.py'),
+    Scenario('page 6 정기 지급', 'pages/6_정기_지급.py'),
+    Scenario('kids 대시보드', 'kids_app.py', login=True),
+    Scenario('kids 포인트 기록', 'kids_app.py', _select_radio("메뉴를 선택하세요", '나의 포인트 기록', sidebar=True), login=True),
+    Scenario('kids 미션', 'kids_app.py', _select_radio("메뉴를 선택하세요", '포인트 적립 미션', sidebar=True), login=True),
+    Scenario('kids 포인트 샵', 'kids_app.py', _select_radio("메뉴를 선택하세요", '포인트 샵', sidebar=True), login=True),
+]
+
+
+def _errors(at: AppTest) -> list[str]:
+    return [exception.value for exception in at.exception] + [error.value for error in at.error]
+
+
+def _timed_run(at: AppTest, fake: FakeSupabase) -> tuple[float, int]:
+    fake.reset_counts()
+    started = time.perf_counter()
+    at.run()
+    return (time.perf_counter() - started) * 1000, fake.query_count()
+
+
+def run_scenario(scenario: Scenario, fake: FakeSupabase, reruns: int) -> Result:
+    at = AppTest.from_file(str(ROOT / scenario.script), default_timeout=APP_TIMEOUT)
+    if scenario.login:
+        profile = fake.rows('profiles')[0]
+        at.session_state['user'] = SimpleNamespace(id=profile['id'], email=profile['email'])
+        at.session_state['household_id'] = profile['household_id']
+    if scenario.prepare is not None:
+        scenario.prepare(at)
+
+    # cold: 캐시와 공유 스냅샷을 비운 상태의 첫 실행
+    cache.store.clear()
+    snapshot.clear()
+    cold_ms, cold_queries = _timed_run(at, fake)
+    cold_calls = dict(fake.calls)
+    rows = fake.rows_returned
+
+    warm = [_timed_run(at, fake) for _ in range(reruns)]
+
+    # 메모리 추적은 실행을 느리게 하므로 시간을 잴 때와 따로 한 번 더 실행합니다. (cold 기준)
+    cache.store.clear()
+    snapshot.clear()
+    tracemalloc.start()
+    try:
+        at.run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return Result(
+        name=scenario.name,
+        cold_ms=round(cold_ms, 1),
+        cold_queries=cold_queries,
+        warm_ms=round(statistics.median(ms for ms, _ in warm), 1) if warm else 0.0,
+        warm_max_ms=round(max(ms for ms, _ in warm), 1) if warm else 0.0,
+        warm_queries=round(statistics.mean(q for _, q in warm), 1) if warm else 0.0,
+        rows=rows,
+        peak_mb=round(peak / 1024 / 1024, 1),
+        errors=_errors(at),
+        cold_calls=cold_calls,
+    )
+
+
+# 한글은 터미널에서 두 칸을 차지하므로 표의 열이 맞도록 폭을 계산해서 채웁니다.
+def _pad(text: str, width: int) -> str:
+    used = sum(2 if unicodedata.east_asian_width(char) in 'WF' else 1 for char in text)
+    return text + ' ' * max(0, width - used)
+
+
+def print_table(results: list[Result], verbose: bool = False) -> None:
+    header = f"{'scenario':<24}{'cold ms':>10}{'cold q':>8}{'warm ms':>10}{'warm max':>10}{'warm q':>8}{'rows':>9}{'peak MB':>9}"
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        print(f"{_pad(r.name, 24)}{r.cold_ms:>10}{r.cold_queries:>8}{r.warm_ms:>10}{r.warm_max_ms:>10}"
+              f"{r.warm_queries:>8}{r.rows:>9}{r.peak_mb:>9}")
+        if verbose:
+            for call, count in sorted(r.cold_calls.items()):
+                print(f"    {call:<40}{count:>6}")
+        for error in r.errors:
+            print(f"    ! {error}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="화면별 실행 시간, DB 왕복 횟수, 메모리 벤치마크")
+    parser.add_argument('--profiles', type=int, default=10)
+    parser.add_argument('--logs', type=int, default=100_000, help="mission_log + redemption_log 행 수")
+    parser.add_argument('--days', type=int, default=365, help="체크리스트/통계 기록 일수")
+    parser.add_argument('--latency-ms', type=float, default=20, help="DB 왕복 한 번에 걸리는 시간")
+    parser.add_argument('--reruns', type=int, default=5, help="warm 실행 횟수")
+    parser.add_argument('--no-realtime', action='store_true', help="실시간 구독이 끊긴 상태(짧은 TTL)로 실행")
+    parser.add_argument('--only', help="이름에 이 문자열이 들어간 시나리오만 실행")
+    parser.add_argument('--json', help="결과를 JSON 으로 저장할 경로")
+    parser.add_argument('--verbose', action='store_true', help="cold 실행의 테이블/RPC 별 호출 수 출력")
+    args = parser.parse_args()
+    # 화면 스크립트를 실행할 때마다 나오는 경고가 표를 가리지 않도록 합니다.
+    # (AppTest 가 실행할 때마다 Streamlit 로그 수준을 되돌리므로 logging 전체에서 끕니다.)
+    logging.disable(logging.WARNING)
+
+    started = time.perf_counter()
+    fake = FakeSupabase(data.generate(args.profiles, args.logs, args.days), latency=args.latency_ms / 1000)
+    fake.rpcs['activity_feed_page']({'p_household_id': fake.rows('households')[0]['id'], 'p_limit': 1})  # 가짜 서버의 색인은 미리 만들어 둡니다.
+    print(f"합성 데이터: 프로필 {args.profiles}명, 기록 {args.logs}건, {args.days}일 "
+          f"({time.perf_counter() - started:.1f}초), 왕복 {args.latency_ms}ms\n")
+
+    db.use_client(fake)
+    # 서버 시작 준비는 재기 전에 끝내 둡니다. (화면마다 cold 실행 전에 캐시를 비우므로 import 만 남습니다)
+    warmup.start(background=False)
+    change_feed.start(change_feed.FakeChangeFeed())
+    if args.no_realtime:
+        db.set_realtime_live(False)
+    with tempfile.TemporaryDirectory() as tmp:
+        outbox.start(path=str(Path(tmp) / 'outbox.sqlite3'))
+        try:
+            scenarios = [s for s in SCENARIOS if not args.only or args.only in s.name]
+            results = [run_scenario(scenario, fake, args.reruns) for scenario in scenarios]
+        finally:
+            outbox.stop()
+            change_feed.stop()
+
+    print_table(results, args.verbose)
+    if args.json:
+        Path(args.json).write_text(json.dumps([asdict(r) for r in results], ensure_ascii=False, indent=2), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+import argparse
+import ast
+import importlib
+import json
+import logging
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# --- 시작 시간 벤치마크 ---
+# 서버를 새로 띄운 직후처럼, 화면 스크립트마다 새 파이썬 프로세스에서
+#   import ms : 스크립트 맨 위의 import 에 걸린 시간 (streamlit 자체는 서버가 먼저 가져오므로 빼고 잽니다)
+#   render ms : 그다음 첫 실행(첫 화면)에 걸린 시간 (메뉴 안에서 가져오는 모듈 포함)
+# 과 각 단계에서 새로 올라온 무거운 모듈(pandas, supabase 등)을 기록합니다.
+# 서버 시작 준비(warmup.py)는 실제 서버처럼 첫 화면과 함께 백그라운드에서 돌고,
+# --warmup 을 주면 첫 화면 전에 끝난 상태(서버가 뜨고 잠시 뒤 첫 접속)로 잽니다.
+# DB 는 bench/fake_supabase.py 를 쓰므로 render ms 에는 supabase 클라이언트를 만드는 시간이 들어가지 않습니다.
+#
+#   python -m bench.startup
+#   python -m bench.startup --repeat 5 --warmup --json startup.json
+
+HEAVY_MODULES = ('pandas', 'numpy', 'pyarrow', 'supabase', 'postgrest', 'httpx')
+
+
+@dataclass
+class Entry:
+    name: str
+    script: str
+    login: bool = False
+
+
+ENTRIES = [
+    Entry('app', 'app.py'),
+    Entry('checklist', 'checklist_app.py'),
+    Entry('page 1 포인트 지급', 'pages/1_포인트_지급_및_차감.py'),
+    Entry('page 2 보상 사용', 'pages/2_보상_사용하기.py'),
+    Entry('page 3 포인트 로그', 'pages/3_포인트_로그_보기.py'),
+    Entry('page 4 통계', 'pages/4_통계_보기.py'),
+    Entry('page 5 기록 백업', 'pages/5_기록_백업.py'),
+    Entry('page 6 정기 지급', 'pages/6_정기_지급.py'),
+    Entry('kids 로그인', 'kids_app.py'),
+    Entry('kids 대시보드', 'kids_app.py', login=True),
+]
+
+
+@dataclass
+class Result:
+    name: str
+    import_ms: float
+    render_ms: float
+    import_modules: list[str]
+    render_modules: list[str]
+    warmup: dict = field(default_factory=dict)
+    errors: list[str] = field(default_factory=list)
+
+
+def _heavy_loaded() -> list[str]:
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+
+# 스크립트 맨 위(들여쓰기 없는 곳)의 import 문이 가져오는 모듈 이름들
+def _top_level_imports(script: Path) -> list[str]:
+    names = []
+    for node in ast.parse(script.read_text(encoding='utf-8')).body:
+        if isinstance(node, ast.Import):
+            names += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.append(node.module)
+    return names
+
+
+# --- 자식 프로세스: 화면 하나를 재고 결과를 JSON 한 줄로 출력합니다 ---
+def measure(entry: Entry, logs: int, latency_ms: float, warm: bool) -> Result:
+    from streamlit.testing.v1 import AppTest
+
+    logging.disable(logging.WARNING)
+    script = ROOT / entry.script
+
+    started = time.perf_counter()
+    for name in _top_level_imports(script):
+        importlib.import_module(name)
+    import_ms = (time.perf_counter() - started) * 1000
+    import_modules = _heavy_loaded()
+
+    # 여기부터는 재지 않는 준비 단계입니다. (가짜 DB 와 합성 데이터)
+    import change_feed
+    import db
+    import outbox
+    import warmup
+    from bench import data
+    from bench.fake_supabase import FakeSupabase
+
+    fake = FakeSupabase(data.generate(logs=logs), latency=latency_ms / 1000)
+    db.use_client(fake)
+    change_feed.start(change_feed.FakeChangeFeed())
+    if warm:
+        warmup.start(background=False)
+
+    at = AppTest.from_file(str(script), default_timeout=120)
+    if entry.login:
+        profile = fake.rows('profiles')[0]
+        at.session_state['user'] = SimpleNamespace(id=profile['id'], email=profile['email'])
+        at.session_state['household_id'] = profile['household_id']
+
+    with tempfile.TemporaryDirectory() as tmp:
+        outbox.start(path=str(Path(tmp) / 'outbox.sqlite3'))
+        try:
+            before_render = _heavy_loaded()
+            started = time.perf_counter()
+            at.run()
+            render_ms = (time.perf_counter() - started) * 1000
+        finally:
+            outbox.stop()
+            change_feed.stop()
+
+    return Result(
+        name=entry.name,
+        import_ms=round(import_ms, 1),
+        render_ms=round(render_ms, 1),
+        import_modules=import_modules,
+        render_modules=[name for name in _heavy_loaded() if name not in before_render],
+        warmup=dict(warmup.timings) if warm else {},
+        errors=[exception.value for exception in at.exception] + [error.value for error in at.error],
+    )
+
+
+# --- 부모 프로세스: 화면마다 새 프로세스를 띄워 repeat 번 재고 중앙값을 보여줍니다 ---
+def run_entry(entry: Entry, args: argparse.Namespace) -> Result:
+    command = [sys.executable, '-m', 'bench.startup', '--child', entry.name,
+               '--logs', str(args.logs), '--latency-ms', str(args.latency_ms)]
+    if args.warmup:
+        command.append('--warmup')
+    runs = []
+    for _ in range(args.repeat):
+        output = subprocess.run(command, cwd=ROOT, capture_output=True, text=True, check=True).stdout
+        runs.append(Result(**json.loads(output.strip().splitlines()[-1])))
+    last = runs[-1]
+    last.import_ms = round(statistics.median(r.import_ms for r in runs), 1)
+    last.render_ms = round(statistics.median(r.render_ms for r in runs), 1)
+    return last
+
+
+def print_table(results: list[Result]) -> None:
+    from bench.run import _pad
+
+    header = f"{'entry':<20}{'import ms':>11}{'render ms':>11}{'total ms':>10}  loaded (import / render)"
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        print(f"{_pad(r.name, 20)}{r.import_ms:>11}{r.render_ms:>11}{round(r.import_ms + r.render_ms, 1):>10}  "
+              f"{', '.join(r.import_modules) or '-'} / {', '.join(r.render_modules) or '-'}")
+        for error in r.errors:
+            print(f"    ! {error}")
+    warmed = next((r.warmup for r in results if r.warmup), None)
+    if warmed:
+        print("\nwarm-up: " + ', '.join(f"{step} {ms}ms" for step, ms in warmed.items()))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="화면별 import 시간과 첫 화면 시간 벤치마크 (화면마다 새 프로세스)")
+    parser.add_argument('--logs', type=int, default=2000, help="합성 데이터의 mission_log + redemption_log 행 수")
+    parser.add_argument('--latency-ms', type=float, default=20, help="DB 왕복 한 번에 걸리는 시간")
+    parser.add_argument('--repeat', type=int, default=3, help="화면마다 잴 횟수 (중앙값)")
+    parser.add_argument('--warmup', action='store_true', help="서버 시작 준비가 끝난 뒤의 첫 화면을 잽니다")
+    parser.add_argument('--only', help="이름에 이 문자열이 들어간 화면만 실행")
+    parser.add_argument('--json', help="결과를 JSON 으로 저장할 경로")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        entry = next(e for e in ENTRIES if e.name == args.child)
+        print(json.dumps(asdict(measure(entry, args.logs, args.latency_ms, args.warmup)), ensure_ascii=False))
+        return
+
+    results = [run_entry(entry, args) for entry in ENTRIES if not args.only or args.only in entry.name]
+    print_table(results)
+    if args.json:
+        Path(args.json).write_text(json.dumps([asdict(r) for r in results], ensure_ascii=False, indent=2), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Hashable, Optional, Union
+
+import tenancy
+import tracing
+
+# --- 키 단위 캐시 ---
+# st.cache_data.clear() 는 모든 사용자의 모든 캐시를 한꺼번에 지워버리기 때문에,
+# 쓰기가 일어나면 영향을 받는 항목만 골라서 지울 수 있도록 키 단위로 관리하는 캐시를 둡니다.
+# 키는 (namespace, 인자1, 인자2, ...) 형태의 튜플이고, 앞부분이 같은 키들을 한 번에 무효화할 수 있습니다.
+# 항목마다 TTL 을 따로 가지며, 최대 개수를 넘으면 가장 오래 사용하지 않은 항목부터 지웁니다. (LRU)
+
+MAX_ENTRIES = 1024
+
+
+class KeyedCache:
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, tuple[float, int, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 쓰기/무효화마다 1씩 증가하는 번호. 조회 도중에 더 새로운 값이 들어왔는지 판단할 때 씁니다.
+        self._stamp = 0
+        self._invalidated_at = 0
+
+    def stamp(self) -> int:
+        with self._lock:
+            return self._stamp
+
+    # (적중 여부, 값) 을 돌려줍니다. 값 자체가 None 일 수도 있으므로 적중 여부를 따로 둡니다.
+    def get(self, key: tuple) -> tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            expires_at, _, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    # since 를 주면, 그 시점 이후에 같은 키가 새로 쓰였거나 무효화가 있었을 때는 저장하지 않습니다.
+    # DB 조회가 진행되는 동안 실시간 변경이 먼저 반영된 경우 오래된 조회 결과로 덮어쓰지 않기 위함입니다.
+    def set(self, key: tuple, value: Any, ttl: float, since: Optional[int] = None) -> bool:
+        with self._lock:
+            if since is not None:
+                entry = self._entries.get(key)
+                if self._invalidated_at > since or (entry is not None and entry[1] > since):
+                    return False
+            self._stamp += 1
+            self._entries[key] = (time.monotonic() + ttl, self._stamp, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return True
+
+    # 키의 앞부분이 prefix 와 같은 항목들을 모두 지웁니다.
+    # 예) invalidate(('profile', user_id)) -> 해당 사용자의 프로필 항목만 삭제
+    def invalidate(self, prefix: tuple) -> int:
+        n = len(prefix)
+        with self._lock:
+            stale = [key for key in self._entries if key[:n] == prefix]
+            for key in stale:
+                del self._entries[key]
+            self._stamp += 1
+            self._invalidated_at = self._stamp
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# --- 가구별 캐시 ---
+# 가구(tenancy.py)마다 KeyedCache 를 하나씩 따로 둡니다. 한 가구에서 항목이 많이 바뀌어도
+# 다른 가구의 항목이 LRU 로 밀려나지 않고, 무효화도 그 가구 안에서만 일어납니다.
+# 메서드는 KeyedCache 와 같고, 지금 가구(tenancy.current())의 칸에 대해 동작합니다.
+MAX_HOUSEHOLDS = 256
+
+
+class PartitionedCache:
+    def __init__(self, max_entries: int = MAX_ENTRIES, max_partitions: int = MAX_HOUSEHOLDS):
+        self.max_entries = max_entries
+        self.max_partitions = max_partitions
+        self._partitions: "OrderedDict[Optional[str], KeyedCache]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def partition(self, household_id: Optional[str] = None) -> KeyedCache:
+        if household_id is None:
+            household_id = tenancy.current()
+        with self._lock:
+            partition = self._partitions.get(household_id)
+            if partition is None:
+                partition = self._partitions[household_id] = KeyedCache(self.max_entries)
+            self._partitions.move_to_end(household_id)
+            while len(self._partitions) > self.max_partitions:
+                self._partitions.popitem(last=False)
+            return partition
+
+    def stamp(self) -> int:
+        return self.partition().stamp()
+
+    def get(self, key: tuple) -> tuple[bool, Any]:
+        return self.partition().get(key)
+
+    def set(self, key: tuple, value: Any, ttl: float, since: Optional[int] = None) -> bool:
+        return self.partition().set(key, value, ttl, since=since)
+
+    def invalidate(self, prefix: tuple) -> int:
+        return self.partition().invalidate(prefix)
+
+    # 어느 가구의 항목인지 알 수 없는 변경(예: 실시간 연결이 끊긴 동안)에 씁니다.
+    def invalidate_all(self, prefix: tuple) -> int:
+        with self._lock:
+            partitions = list(self._partitions.values())
+        return sum(partition.invalidate(prefix) for partition in partitions)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._partitions.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(partition) for partition in self._partitions.values())
+
+
+# 서버 프로세스 전체가 공유하는 캐시
+store = PartitionedCache()
+
+
+def invalidate(namespace: str, *key: Hashable) -> int:
+    return store.invalidate((namespace, *key))
+
+
+# 함수 결과를 (namespace, 인자들...) 키로 캐시하는 데코레이터
+# 키워드로 넘긴 인자와 기본값도 선언 순서대로 키에 들어가므로, 첫 번째 인자로 무효화할 수 있습니다.
+# ttl 에 함수를 넘기면 저장할 때마다 호출해서 유지 시간을 정합니다.
+def cached(namespace: str, ttl: Union[float, Callable[[], float]]) -> Callable:
+    def decorator(fn: Callable) -> Callable:
+        signature = inspect.signature(fn)
+
+        @wraps(fn)
+        def wrapper(*args: Hashable, **kwargs: Hashable) -> Any:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = (namespace, *bound.arguments.values())
+            hit, value = store.get(key)
+            if hit:
+                tracing.record_cache(namespace, hit=True)
+                return value
+            started = time.perf_counter()
+            since = store.stamp()
+            value = fn(*bound.args, **bound.kwargs)
+            store.set(key, value, ttl() if callable(ttl) else ttl, since=since)
+            tracing.record_cache(namespace, hit=False, ms=(time.perf_counter() - started) * 1000)
+            return value
+        wrapper.namespace = namespace
+        return wrapper
+    return decorator
@@ -0,0 +1,180 @@
+import asyncio
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import cache
+import db
+import snapshot
+import tenancy
+
+# --- 실시간 변경 구독 ---
+# profiles, mission_log, redemption_log 의 변경 사항을 Supabase Realtime 으로 받아
+# 서버 메모리의 캐시(cache.py)와 공유 스냅샷(snapshot.py)에 바로 반영합니다.
+# 대시보드는 일정 주기로 DB를 다시 조회하는 대신 이 캐시를 읽기만 하면 됩니다.
+# DB 쪽 설정은 sql/002_realtime_publication.sql 을 참고하세요.
+
+TABLES = ('profiles', 'mission_log', 'redemption_log')
+
+# 구독 확인을 기다리는 최대 시간(초)과, 구독이 끝났음을 뜻하는 상태 (realtime.RealtimeSubscribeStates)
+SUBSCRIBE_TIMEOUT = 30
+FAILED_STATUSES = ('CLOSED', 'CHANNEL_ERROR', 'TIMED_OUT')
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    table: str
+    type: str  # 'INSERT' / 'UPDATE' / 'DELETE'
+    record: dict = field(default_factory=dict)
+    old_record: dict = field(default_factory=dict)
+
+
+_lock = threading.Lock()
+_feed = None
+
+
+# 변경 이벤트 하나를 그 행의 가구 캐시에 반영합니다.
+def apply_change(event: ChangeEvent) -> None:
+    with tenancy.use((event.record or event.old_record).get('household_id')):
+        _apply_change(event)
+
+
+def _apply_change(event: ChangeEvent) -> None:
+    if event.table == 'profiles':
+        if event.type == 'DELETE':
+            # 삭제 이벤트에는 기본 키만 오는 경우가 있어 어느 가구인지 모를 수 있습니다.
+            db.invalidate_profiles(all_households=tenancy.current() is None)
+        else:
+            row = {column: event.record[column] for column in db.PROFILE_COLUMNS.split(', ') if column in event.record}
+            cache.store.set(('profile', row['id']), row, db.profile_ttl())
+            snapshot.update_profiles([row])
+            # 새 프로필이거나 이름이 바뀌면 목록 순서가 달라질 수 있습니다.
+            if event.type == 'INSERT' or event.old_record.get('full_name', row.get('full_name')) != row.get('full_name'):
+                cache.invalidate('profile_ids')
+                # 활동 기록에도 이름이 들어 있으므로 함께 지웁니다.
+                db.invalidate_logs()
+    elif event.table in ('mission_log', 'redemption_log'):
+        db.invalidate_user_logs((event.record or event.old_record).get('user_id'))
+
+
+# Realtime 메시지를 ChangeEvent 로 바꿉니다.
+def parse_payload(payload: dict) -> ChangeEvent:
+    data = payload.get('data', payload)
+    return ChangeEvent(
+        table=data.get('table', ''),
+        type=data.get('type') or data.get('eventType', ''),
+        record=data.get('record') or data.get('new') or {},
+        old_record=data.get('old_record') or data.get('old') or {},
+    )
+
+
+# --- 변경 피드 ---
+# 피드는 start(handler) 로 시작하고, 받은 ChangeEvent 마다 handler 를 호출합니다.
+
+class SupabaseChangeFeed:
+    def __init__(self, url: str, key: str, tables: tuple = TABLES):
+        self.url = url
+        self.key = key
+        self.tables = tables
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, handler: Callable[[ChangeEvent], None]) -> None:
+        self._thread = threading.Thread(target=self._run_forever, args=(handler,), name='realtime-feed', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    # 연결이 끊어지면 점점 간격을 늘려가며 다시 연결합니다.
+    def _run_forever(self, handler: Callable[[ChangeEvent], None]) -> None:
+        backoff = 1
+        while not self._stopped.is_set():
+            started = time.monotonic()
+            try:
+                asyncio.run(self._listen(handler))
+            except Exception:
+                pass
+            db.set_realtime_live(False)
+            # 연결이 끊긴 동안의 변경은 받지 못했으므로 캐시를 TTL 방식으로 되돌립니다.
+            db.invalidate_profiles(all_households=True)
+            if time.monotonic() - started > 60:
+                backoff = 1
+            self._stopped.wait(backoff)
+            backoff = min(backoff * 2, 60)
+
+    async def _listen(self, handler: Callable[[ChangeEvent], None]) -> None:
+        from supabase import acreate_client
+
+        client = await acreate_client(self.url, self.key)
+        channel = client.channel('family-app-changes')
+        for table in self.tables:
+            channel.on_postgres_changes('*', schema='public', table=table, callback=lambda payload: handler(parse_payload(payload)))
+        # 구독 결과는 서버가 응답할 때 콜백으로 옵니다. 구독이 확인된 뒤에만 실시간 반영 중으로 표시합니다.
+        statuses: asyncio.Queue = asyncio.Queue()
+        await channel.subscribe(lambda status, error: statuses.put_nowait(status))
+        started = time.monotonic()
+        try:
+            while not self._stopped.is_set():
+                try:
+                    status = await asyncio.wait_for(statuses.get(), timeout=1)
+                except asyncio.TimeoutError:
+                    status = None
+                if status == 'SUBSCRIBED':
+                    db.set_realtime_live(True)
+                elif status in FAILED_STATUSES:
+                    raise ConnectionError(f"구독 실패: {status}")
+                if not db.is_realtime_live():
+                    if time.monotonic() - started > SUBSCRIBE_TIMEOUT:
+                        raise ConnectionError("구독 확인을 받지 못했습니다.")
+                # 연결이 한 번이라도 끊기면 (라이브러리가 다시 붙더라도) 그사이의 변경을 놓쳤으므로
+                # 빠져나가서 캐시를 TTL 방식으로 되돌리고 처음부터 다시 연결합니다.
+                elif not (client.realtime.is_connected and channel.is_joined):
+                    raise ConnectionError("연결이 끊어졌습니다.")
+        finally:
+            db.set_realtime_live(False)
+            await client.remove_all_channels()
+
+
+# 테스트용 피드: publish() 로 넣은 이벤트를 바로 handler 에 전달합니다.
+class FakeChangeFeed:
+    def __init__(self):
+        self._handler: Optional[Callable[[ChangeEvent], None]] = None
+
+    def start(self, handler: Callable[[ChangeEvent], None]) -> None:
+        self._handler = handler
+        db.set_realtime_live(True)
+
+    def stop(self) -> None:
+        self._handler = None
+        db.set_realtime_live(False)
+
+    def publish(self, table: str, type: str, record: Optional[dict] = None, old_record: Optional[dict] = None) -> None:
+        if self._handler is not None:
+            self._handler(ChangeEvent(table, type, record or {}, old_record or {}))
+
+
+# 접속 정보가 없으면 구독하지 않습니다. (db.connection_settings)
+def enabled() -> bool:
+    if db.connection_settings() is None:
+        return False
+    return str(db.get_setting("REALTIME_ENABLED", "true")).lower() in ('1', 'true', 'yes')
+
+
+# 프로세스마다 한 번만 구독을 시작합니다. feed 를 넘기면 그 피드를 사용합니다. (테스트용)
+def start(feed=None):
+    global _feed
+    with _lock:
+        if _feed is None:
+            _feed = feed or SupabaseChangeFeed(*db.connection_settings())
+            _feed.start(apply_change)
+        return _feed
+
+
+def stop() -> None:
+    global _feed
+    with _lock:
+        if _feed is not None:
+            _feed.stop()
+            _feed = None
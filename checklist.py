@@ -0,0 +1,139 @@
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Optional
+
+import outbox
+import tenancy
+from db import ChecklistItem, DailyCheck, Profile
+
+# --- 체크리스트 점수 계산 ---
+# checklist_app.py 의 하루 단위 저장과 기간 일괄 저장이 같은 계산을 사용합니다.
+
+MAX_SCORE = 110
+
+# 세션마다 기억하는 (사람, 날짜) 체크 상태의 최대 개수. 넘으면 가장 오래 안 본 것부터 지웁니다.
+MAX_DAY_STATES = 64
+
+
+# 해당 사용자에게 적용되는 항목 ('공통' + 본인 이름)
+def items_for(items: list[ChecklistItem], full_name: str) -> list[ChecklistItem]:
+    return [item for item in items if item['target_user'] in ['공통', full_name]]
+
+
+# --- 사용자별 항목 색인 ---
+# 항목 목록을 다시 불러왔거나 가족 구성이 바뀌었을 때만 새로 만들고,
+# 같은 데이터로 화면을 다시 그릴 때는 만들어 둔 것을 씁니다.
+# 가구마다 따로 두므로 여러 가구의 세션이 번갈아 그려도 서로의 색인을 버리지 않습니다. (최대 MAX_INDEXED_HOUSEHOLDS 가구)
+# (공유 스냅샷(snapshot.py)은 항목 목록이 바뀌기 전까지 같은 리스트 객체를 들고 있으므로 객체 자체로 비교합니다.)
+MAX_INDEXED_HOUSEHOLDS = 64
+
+_index_lock = threading.Lock()
+_indexes: "OrderedDict[Optional[str], tuple]" = OrderedDict()
+
+
+def user_item_index(profiles: list[Profile], items: list[ChecklistItem]) -> dict[str, list[ChecklistItem]]:
+    household_id = tenancy.current()
+    members = tuple((profile['id'], profile['full_name']) for profile in profiles)
+    with _index_lock:
+        cached_members, cached_items, index = _indexes.get(household_id, (None, None, {}))
+        if cached_members != members or cached_items is not items:
+            index = {user_id: items_for(items, full_name) for user_id, full_name in members}
+            _indexes[household_id] = (members, items, index)
+        _indexes.move_to_end(household_id)
+        while len(_indexes) > MAX_INDEXED_HOUSEHOLDS:
+            _indexes.popitem(last=False)
+        return index
+
+
+# --- 하루치 체크 상태 ---
+# 어긴 항목과 차감 합계를 들고 있다가, 체크박스가 바뀔 때마다 그 항목만큼만 더하거나 뺍니다.
+class DayChecks:
+    def __init__(self):
+        self.violated: set = set()
+        self.deduction = 0
+
+    def set(self, item: ChecklistItem, kept: bool) -> None:
+        if kept and item['id'] in self.violated:
+            self.violated.remove(item['id'])
+            self.deduction -= item['deduction_points']
+        elif not kept and item['id'] not in self.violated:
+            self.violated.add(item['id'])
+            self.deduction += item['deduction_points']
+
+    def is_kept(self, item_id) -> bool:
+        return item_id not in self.violated
+
+    @property
+    def score(self) -> int:
+        return MAX_SCORE - self.deduction
+
+    # score(), daily_check_row() 에 넘길 수 있는 {항목 id: 지켰는지 여부}
+    def checks(self) -> dict:
+        return {item_id: False for item_id in self.violated}
+
+
+# (사람, 날짜) 별 DayChecks 를 담아두는 크기 제한 저장소
+class CheckStateStore:
+    def __init__(self, max_entries: int = MAX_DAY_STATES):
+        self.max_entries = max_entries
+        self._states: "OrderedDict[tuple, DayChecks]" = OrderedDict()
+
+    def get(self, user_id: str, check_date: date) -> DayChecks:
+        key = (user_id, str(check_date))
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = DayChecks()
+        self._states.move_to_end(key)
+        while len(self._states) > self.max_entries:
+            self._states.popitem(last=False)
+        return state
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+
+# checks: {항목 id: 지켰는지 여부}. 값이 없는 항목은 지킨 것으로 봅니다.
+# 반환값: (점수, 어긴 항목 목록)
+def score(user_items: list[ChecklistItem], checks: dict) -> tuple[int, list[ChecklistItem]]:
+    violated_items = [item for item in user_items if not checks.get(item['id'], True)]
+    total_deduction = sum(item['deduction_points'] for item in violated_items)
+    return MAX_SCORE - total_deduction, violated_items
+
+
+def daily_check_row(user_id: str, check_date: date, user_items: list[ChecklistItem], checks: dict) -> DailyCheck:
+    final_score, violated_items = score(user_items, checks)
+    return {
+        'user_id': user_id,
+        'check_date': str(check_date),
+        'daily_score': final_score,
+        'violated_items': [item['content'] for item in violated_items],
+    }
+
+
+# 하루치 점수를 포인트 차감 항목으로 바꿉니다. 어긴 항목이 없으면 None.
+# 같은 사용자, 같은 날짜는 한 번만 차감되도록 중복 방지 키를 (사용자, 날짜) 로 정합니다.
+def deduction_entry(row: DailyCheck) -> Optional[dict]:
+    deduction = MAX_SCORE - row['daily_score']
+    if deduction <= 0:
+        return None
+    return {
+        'user_id': row['user_id'],
+        'delta': -deduction,
+        'kind': 'checklist',
+        'idempotency_key': f"checklist:{row['user_id']}:{row['check_date']}",
+        'notes': f"[차감] {row['check_date']} 체크리스트 ({len(row['violated_items'])}개 항목 위반) (-{deduction} BP)",
+        'floor_at_zero': True,
+    }
+
+
+# 여러 날짜, 여러 사람의 점수와 (apply_deductions 가 참이면) 포인트 차감을 쓰기 대기열(outbox.py)에 넣습니다.
+# 대기열이 같은 종류끼리 묶어서 한 번의 upsert, 한 번의 apply_point_deltas 요청으로 서버에 반영합니다.
+# 반환값: 새로 대기열에 들어간 포인트 차감 수 (이미 대기 중인 (사용자, 날짜) 는 빠집니다)
+# 차감은 (사용자, 날짜)마다 따로 반영되므로, 하나가 거절되어도 나머지는 반영됩니다.
+def save(rows: list[DailyCheck], apply_deductions: bool = False) -> int:
+    outbox.submit_daily_checks(rows)
+    if not apply_deductions:
+        return 0
+    entries = [entry for entry in map(deduction_entry, rows) if entry is not None]
+    return outbox.submit_points(entries, atomic=False)
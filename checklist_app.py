@@ -1,42 +1,44 @@
 import streamlit as st
-from supabase import create_client, Client
-from datetime import datetime
-import pandas as pd
+from datetime import datetime, timedelta
+
+import checklist
+import db
+import snapshot
+import tenancy
+import tracing
+import warmup
+
+# 기간 일괄 입력에서 한 번에 입력할 수 있는 최대 일수
+MAX_BULK_DAYS = 31
 
 # --- 페이지 기본 설정 ---
 st.set_page_config(layout="wide", page_title="우리 가족 체크리스트", page_icon="✅")
 
-# --- Supabase 클라이언트 초기화 ---
-@st.cache_resource
-def init_supabase_client():
-    try:
-        SUPABASE_URL = st.secrets["SUPABASE_URL"]
-        SUPABASE_KEY = st.secrets["SUPABASE_KEY"]
-        return create_client(SUPABASE_URL, SUPABASE_KEY)
-    except Exception as e:
-        st.error(f"DB 연결 실패: {e}")
-        return None
-
-supabase = init_supabase_client()
+# 성능 보기 (사이드바)
+tracing.start_rerun("checklist_app.py")
 
 st.title("✅ 우리 가족 일일 체크리스트")
 st.write("---")
 
-if not supabase:
-    st.error("데이터베이스에 연결할 수 없습니다.")
+# 서버 시작 준비 (프로세스당 한 번)
+warmup.start()
+
+if db.get_client() is None:
+    st.error("데이터베이스에 연결할 수 없습니다. secrets.toml 의 SUPABASE_URL 과 SUPABASE_KEY 를 확인해주세요.")
 else:
+    # 가구 확인
+    tenancy.start_rerun()
+
     # --- 데이터 로딩 함수 (수정됨) ---
-    @st.cache_data(ttl=60)
     def get_checklist_data():
+        # 프로필과 체크리스트 항목은 모든 화면이 함께 쓰는 스냅샷에서 읽습니다.
         try:
-            profiles = supabase.table('profiles').select('id, full_name').order('full_name').execute().data
-            # [수정] eq 필터에 사용된 'is_active' 컬럼을 select 목록에 추가했습니다.
-            items = supabase.table('checklist_items').select('id, content, target_user, deduction_points, is_active').eq('is_active', True).execute().data
-            return profiles, items
+            snap = snapshot.current()
         except Exception as e:
             st.error("체크리스트 데이터를 불러오는 데 실패했습니다.")
             st.exception(e)
             return [], []
+        return snap.profiles, snap.checklist_items
 
     profiles, items = get_checklist_data()
 
@@ -48,50 +50,117 @@ else:
         st.warning("체크리스트 항목이 없습니다. 관리자에게 문의하세요.")
         st.stop()
     
-    # --- 날짜 선택 ---
-    check_date = st.date_input("날짜 선택", value=datetime.today())
-
-    # --- 아이들별 탭 생성 ---
     profile_map = {p['id']: p['full_name'] for p in profiles}
-    tabs = st.tabs(list(profile_map.values()))
-
-    for i, profile_id in enumerate(profile_map.keys()):
-        with tabs[i]:
-            full_name = profile_map[profile_id]
-            st.header(f"📝 {full_name}의 체크리스트")
-
-            user_items = [item for item in items if item['target_user'] in ['공통', full_name]]
-            
-            session_key = f"checks_{profile_id}_{check_date}"
-            if session_key not in st.session_state:
-                st.session_state[session_key] = {item['id']: True for item in user_items}
-
-            for item in user_items:
-                # 날짜가 바뀔 때 체크박스 값을 초기화하기 위한 로직
-                current_value = st.session_state[session_key].get(item['id'], True)
-                st.session_state[session_key][item['id']] = st.checkbox(
-                    f"{item['content']} (-{item['deduction_points']}점)", 
-                    value=current_value,
-                    key=f"check_{profile_id}_{item['id']}_{check_date}"
+    # 사용자별 항목 목록 (데이터를 새로 불러왔을 때만 다시 만듭니다)
+    item_index = checklist.user_item_index(profiles, items)
+
+    mode = st.radio("입력 방식", ('하루씩 입력', '기간 일괄 입력'), horizontal=True)
+
+    if mode == '하루씩 입력':
+        # --- 날짜 선택 ---
+        check_date = st.date_input("날짜 선택", value=datetime.today())
+
+        # (사람, 날짜) 별 체크 상태. 최근 것만 기억하고 오래된 날짜는 지웁니다.
+        if 'check_states' not in st.session_state:
+            st.session_state.check_states = checklist.CheckStateStore()
+        check_states = st.session_state.check_states
+
+        # 체크박스가 바뀌면 그 항목의 점수만 반영합니다.
+        def on_check_change(state, item, widget_key):
+            state.set(item, st.session_state[widget_key])
+
+        # --- 아이들별 탭 생성 ---
+        tabs = st.tabs(list(profile_map.values()))
+
+        for i, profile_id in enumerate(profile_map.keys()):
+            with tabs[i]:
+                full_name = profile_map[profile_id]
+                st.header(f"📝 {full_name}의 체크리스트")
+
+                user_items = item_index.get(profile_id, [])
+                state = check_states.get(profile_id, check_date)
+
+                for item in user_items:
+                    widget_key = f"check_{profile_id}_{item['id']}_{check_date}"
+                    st.checkbox(
+                        f"{item['content']} (-{item['deduction_points']}점)", 
+                        value=state.is_kept(item['id']),
+                        key=widget_key,
+                        on_change=on_check_change,
+                        args=(state, item, widget_key)
+                    )
+
+                st.write("---")
+                st.subheader(f"🔻 오늘의 점수: {state.score} / {checklist.MAX_SCORE}")
+
+                if st.button("오늘의 점수 저장하기", key=f"save_{profile_id}_{check_date}"):
+                    with st.spinner("저장 중..."):
+                        try:
+                            row = checklist.daily_check_row(profile_id, check_date, user_items, state.checks())
+                            checklist.save([row])
+                            st.success(f"{full_name}의 {check_date} 기록이 성공적으로 저장되었습니다!")
+                        except Exception as e:
+                            st.error(f"저장 중 오류 발생: {e}")
+
+    else:
+        # --- 기간 일괄 입력 ---
+        # 밀린 날짜들을 한 화면에서 체크하고, 모든 아이의 점수를 한 번에 저장합니다.
+        # 표 편집에만 pandas 가 필요하므로 이 입력 방식을 고를 때 가져옵니다.
+        import pandas as pd
+
+        st.caption(f"표의 각 칸은 해당 날짜에 항목을 지켰는지를 뜻합니다. 최대 {MAX_BULK_DAYS}일까지 한 번에 입력할 수 있습니다.")
+        today = datetime.today().date()
+        date_range = st.date_input("기간 선택", value=(today - timedelta(days=6), today), max_value=today)
+        if len(date_range) != 2:
+            st.info("시작 날짜와 끝 날짜를 모두 선택해주세요.")
+            st.stop()
+        start_date, end_date = date_range
+        if (end_date - start_date).days + 1 > MAX_BULK_DAYS:
+            st.error(f"한 번에 최대 {MAX_BULK_DAYS}일까지만 입력할 수 있습니다.")
+            st.stop()
+        dates = [start_date + timedelta(days=n) for n in range((end_date - start_date).days + 1)]
+
+        # 이미 저장된 날짜는 저장된 내용으로 채웁니다. 저장할 때는 바꾼 날짜와 아직 기록이 없는 날짜만 저장합니다.
+        try:
+            saved = {(row['user_id'], row['check_date']): set(row['violated_items'] or []) for row in db.list_daily_checks(str(start_date), str(end_date))}
+        except Exception as e:
+            st.error(f"저장된 기록을 불러오는 중 오류 발생: {e}")
+            st.stop()
+
+        edited = {}
+        tabs = st.tabs(list(profile_map.values()))
+        for i, profile_id in enumerate(profile_map.keys()):
+            with tabs[i]:
+                full_name = profile_map[profile_id]
+                user_items = item_index.get(profile_id, [])
+                grid = pd.DataFrame(
+                    [[item['content'] not in saved.get((profile_id, str(d)), ()) for item in user_items] for d in dates],
+                    index=pd.Index([str(d) for d in dates], name="날짜"), columns=[str(item['id']) for item in user_items], dtype=bool,
                 )
-            
-            violated_items = [item for item in user_items if not st.session_state[session_key].get(item['id'], True)]
-            total_deduction = sum(item['deduction_points'] for item in violated_items)
-            final_score = 110 - total_deduction
-
-            st.write("---")
-            st.subheader(f"🔻 오늘의 점수: {final_score} / 110")
-
-            if st.button("오늘의 점수 저장하기", key=f"save_{profile_id}_{check_date}"):
-                with st.spinner("저장 중..."):
-                    try:
-                        violated_contents = [item['content'] for item in violated_items]
-                        supabase.table('daily_checks').upsert({
-                            'user_id': profile_id,
-                            'check_date': str(check_date),
-                            'daily_score': final_score,
-                            'violated_items': violated_contents
-                        }, on_conflict='user_id, check_date').execute()
-                        st.success(f"{full_name}의 {check_date} 기록이 성공적으로 저장되었습니다!")
-                    except Exception as e:
-                        st.error(f"저장 중 오류 발생: {e}")
\ No newline at end of file
+                edited[profile_id] = (user_items, grid, st.data_editor(
+                    grid,
+                    column_config={str(item['id']): st.column_config.CheckboxColumn(f"{item['content']} (-{item['deduction_points']}점)") for item in user_items},
+                    use_container_width=True,
+                    key=f"bulk_{profile_id}_{start_date}_{end_date}"
+                ))
+
+        apply_deductions = st.checkbox("어긴 항목만큼 포인트도 함께 차감하기 (이미 차감된 날짜는 다시 차감하지 않습니다)")
+
+        if st.button("전체 저장하기", type="primary"):
+            rows = []
+            for profile_id, (user_items, before, grid) in edited.items():
+                for check_date, old, day in zip(dates, before.to_dict('records'), grid.to_dict('records')):
+                    if (profile_id, str(check_date)) in saved and old == day:
+                        continue
+                    checks = {item['id']: bool(day[str(item['id'])]) for item in user_items}
+                    rows.append(checklist.daily_check_row(profile_id, check_date, user_items, checks))
+            with st.spinner("저장 중..."):
+                try:
+                    queued = checklist.save(rows, apply_deductions=apply_deductions)
+                    st.success(f"바뀌었거나 새로 입력한 기록 {len(rows)}건을 저장했습니다!")
+                    if apply_deductions:
+                        st.info(f"포인트 차감 {queued}건을 반영합니다. (이미 차감된 날짜는 서버에서 다시 차감하지 않습니다)")
+                except Exception as e:
+                    st.error(f"저장 중 오류 발생: {e}")
+
+tracing.show_panel()
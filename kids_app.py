@@ -1,21 +1,26 @@
 import streamlit as st
-from supabase import create_client, Client
-import pandas as pd
+
+import db
+import change_feed
+import snapshot
+import tenancy
+import warmup
+
+# 나의 포인트 기록 화면에서 받는 열
+MY_LOG_COLUMNS = 'entry_id, kind, occurred_at, notes, points_spent, reward_name'
+
+# 화면에서 쓰는 무거운 모듈(pandas, supabase)은 필요한 메뉴에서만 가져옵니다.
+# 로그인 화면은 이 모듈들 없이 바로 그려집니다.
 
 # --- 페이지 기본 설정 ---
 st.set_page_config(layout="wide", page_title="나의 성장 앨범", page_icon="🌟")
 
-# --- Supabase 클라이언트 초기화 ---
-@st.cache_resource
-def init_supabase_client():
-    try:
-        SUPABASE_URL = st.secrets["SUPABASE_URL"]
-        SUPABASE_KEY = st.secrets["SUPABASE_KEY"]
-        return create_client(SUPABASE_URL, SUPABASE_KEY)
-    except Exception as e:
-        return None
+# 실시간 변경 구독 시작 (프로세스당 한 번)
+if change_feed.enabled():
+    change_feed.start()
 
-supabase = init_supabase_client()
+# 서버 시작 준비 (프로세스당 한 번). 로그인하는 동안 클라이언트와 카탈로그를 준비해 둡니다.
+warmup.start()
 
 # --- 로그인 상태 확인 및 처리 ---
 if 'user' not in st.session_state:
@@ -32,12 +37,14 @@ if st.session_state['user'] is None:
         submitted = st.form_submit_button("로그인")
 
         if submitted:
-            if not supabase:
+            if db.get_client() is None:
                 st.error("시스템에 문제가 발생했습니다. 관리자에게 문의하세요.")
             else:
                 try:
-                    user_session = supabase.auth.sign_in_with_password({"email": email, "password": password})
-                    st.session_state['user'] = user_session.user
+                    user = db.sign_in(email, password)
+                    # 아이의 프로필이 속한 가구로 이번 세션의 가구를 정합니다.
+                    tenancy.set_session(db.household_of(user.id))
+                    st.session_state['user'] = user
                     st.rerun()
                 except Exception as e:
                     st.error("아이디 또는 비밀번호가 일치하지 않습니다.")
@@ -47,9 +54,9 @@ else:
     user = st.session_state['user']
 
     # --- 데이터 로딩 함수 ---
-    @st.cache_data(ttl=30)
     def get_my_profile(user_id):
-        return supabase.table('profiles').select('*').eq('id', user_id).single().execute().data
+        # 부모 화면과 같은 스냅샷에서 읽으므로 어느 화면에서 보든 같은 잔액이 보입니다.
+        return snapshot.current().profile(user_id) or {}
 
     # 내 프로필 정보 가져오기
     my_profile = get_my_profile(user.id)
@@ -62,7 +69,8 @@ else:
     
     if st.sidebar.button("로그아웃"):
         st.session_state['user'] = None
-        st.cache_data.clear()
+        db.invalidate_user(user.id)
+        tenancy.set_session(None)
         st.rerun()
 
     # --- 페이지별 내용 표시 ---
@@ -70,34 +78,38 @@ else:
         st.title(f"📊 {my_profile.get('full_name', '')}님의 대시보드")
         st.write("---")
         st.header("현재 보유 포인트")
-        st.metric(label="🌟 나의 포인트", value=f"{my_profile.get('current_points', 0)} BP")
+
+        # 실시간 구독이 연결되어 있으면 1초마다 포인트만 다시 그립니다. (메모리 캐시만 읽음)
+        @st.fragment(run_every=1 if db.is_realtime_live() else None)
+        def show_my_points():
+            profile = get_my_profile(user.id)
+            st.metric(label="🌟 나의 포인트", value=f"{profile.get('current_points', 0)} BP")
+
+        show_my_points()
         st.info("왼쪽 메뉴에서 다른 기능들을 확인해보세요!")
 
     elif page == '나의 포인트 기록':
+        import activity
+
         st.title("🧾 나의 포인트 기록")
         st.write("내가 언제 포인트를 얻고 사용했는지 모든 기록을 볼 수 있어요.")
         
-        @st.cache_data(ttl=30)
-        def get_my_logs(user_id):
-            mission_logs_data = supabase.table('mission_log').select('created_at, notes').eq('user_id', user_id).order('created_at', desc=True).execute().data
-            redemption_logs_data = supabase.table('redemption_log').select('redeemed_at, points_spent, reward_id(name)').eq('user_id', user_id).order('redeemed_at', desc=True).execute().data
-            return mission_logs_data, redemption_logs_data
-
-        mission_logs, redemption_logs = get_my_logs(user.id)
-        
-        all_logs = []
-        for log in mission_logs:
-            if log.get('notes'):
-                all_logs.append({"날짜": log['created_at'], "내용": log['notes'], "종류": "포인트 변경"})
-        for log in redemption_logs:
-            reward_name = log.get('reward_id', {}).get('name', '알 수 없는 보상')
-            all_logs.append({"날짜": log['redeemed_at'], "내용": f"'{reward_name}' 구매 (-{log['points_spent']} BP)", "종류": "보상 사용"})
-
-        if all_logs:
-            df = pd.DataFrame(all_logs)
-            df['날짜'] = pd.to_datetime(df['날짜']).dt.strftime('%Y년 %m월 %d일 %H:%M')
-            df = df.sort_values(by="날짜", ascending=False)
-            st.dataframe(df[['날짜', '종류', '내용']], use_container_width=True, hide_index=True)
+        if st.session_state.get('my_log_pages_user') != user.id:
+            st.session_state.my_log_pages_user = user.id
+            st.session_state.my_log_pages = 1
+
+        def get_my_logs(user_id, pages):
+            # 미션 로그와 보상 사용 로그를 서버에서 합쳐 최신순으로 페이지 단위로 가져옵니다.
+            # 화면에 보여줄 열과 다음 페이지를 찾는 데 필요한 열만 받고, 표로 바꾼 결과도 함께 캐시됩니다.
+            return activity.load_frame(user_id, pages=pages, columns=MY_LOG_COLUMNS)
+
+        logs, has_more = get_my_logs(user.id, st.session_state.my_log_pages)
+
+        if not logs.empty:
+            activity.show(logs, with_name=False)
+            if has_more and st.button("더 보기"):
+                st.session_state.my_log_pages += 1
+                st.rerun()
         else:
             st.info("아직 포인트 기록이 없습니다.")
 
@@ -105,15 +117,16 @@ else:
         st.title("🎯 포인트 적립 미션 목록")
         st.write("아래의 미션들을 완수하고 포인트를 획득해보세요!")
 
-        @st.cache_data(ttl=3600) # 미션 목록은 자주 바뀌지 않으니 1시간 캐시
         def get_all_missions():
-            return supabase.table('missions').select('title, description, points_reward').eq('is_active', True).order('points_reward').execute().data
+            return sorted(snapshot.current().active_missions(), key=lambda m: m['points_reward'])
         
         missions = get_all_missions()
         if missions:
-            df = pd.DataFrame(missions)
-            df.rename(columns={'title': '미션 이름', 'description': '설명', 'points_reward': '획득 포인트'}, inplace=True)
-            st.dataframe(df, use_container_width=True, hide_index=True)
+            st.dataframe(
+                missions, use_container_width=True, hide_index=True,
+                column_order=('title', 'description', 'points_reward'),
+                column_config={'title': "미션 이름", 'description': "설명", 'points_reward': "획득 포인트"},
+            )
         else:
             st.info("현재 등록된 미션이 없습니다.")
 
@@ -121,14 +134,15 @@ else:
         st.title("🛍️ 우리 집 포인트 샵")
         st.write("포인트를 모아 아래의 멋진 보상들을 획득해보세요!")
 
-        @st.cache_data(ttl=3600) # 보상 목록도 1시간 캐시
         def get_all_rewards():
-            return supabase.table('rewards').select('name, point_cost, description', 'category').eq('is_active', True).order('point_cost').execute().data
+            return snapshot.current().active_rewards()
         
         rewards = get_all_rewards()
         if rewards:
-            df = pd.DataFrame(rewards)
-            df.rename(columns={'name': '보상 이름', 'point_cost': '필요 포인트', 'description': '설명', 'category': '카테고리'}, inplace=True)
-            st.dataframe(df, use_container_width=True, hide_index=True)
+            st.dataframe(
+                rewards, use_container_width=True, hide_index=True,
+                column_order=('name', 'point_cost', 'description', 'category'),
+                column_config={'name': "보상 이름", 'point_cost': "필요 포인트", 'description': "설명", 'category': "카테고리"},
+            )
         else:
             st.info("현재 구매 가능한 보상이 없습니다.")
\ No newline at end of file
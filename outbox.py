@@ -0,0 +1,320 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Optional
+
+import db
+import tenancy
+
+# --- 오프라인 쓰기 대기열 (write-ahead log) ---
+# 포인트 변경과 체크리스트 저장은 먼저 이 서버의 SQLite 파일에 기록한 뒤 바로 화면에 완료를 알리고,
+# 백그라운드 스레드(Flusher)가 들어온 순서대로 묶어서 Supabase 에 반영합니다.
+# DB 연결이 잠시 끊겨도 입력이 사라지지 않고, 연결이 돌아오면 자동으로 다시 보냅니다.
+#
+# 작업 종류
+#   'points'       : apply_point_deltas 의 항목 하나 ({'user_id', 'delta', 'idempotency_key', ...})
+#   'daily_check'  : daily_checks 한 행 ({'user_id', 'check_date', 'daily_score', 'violated_items'})
+# 두 작업 모두 넣을 때의 가구(household_id)를 함께 기록해서, 보낼 때 그 가구의 캐시를 지웁니다.
+#
+# 포인트 변경은 idempotency_key 로 중복이 걸러지므로 같은 작업을 여러 번 보내도 한 번만 반영됩니다.
+# 한 번에 제출한 포인트 변경(여러 아이에게 지급, 보상 여러 개 구매)은 같은 묶음 키(batch)를 가지며,
+# 항상 같은 요청으로 보내고 거절되면 함께 실패로 표시합니다. (일부만 반영되지 않도록)
+
+DEFAULT_PATH = 'outbox.sqlite3'
+BATCH_SIZE = 50
+MAX_BACKOFF = 60
+
+_SCHEMA = '''
+create table if not exists outbox (
+    seq integer primary key autoincrement,
+    kind text not null,
+    payload text not null,
+    idempotency_key text unique,
+    status text not null default 'pending',
+    attempts integer not null default 0,
+    last_error text,
+    created_at real not null
+)
+'''
+
+
+class Outbox:
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('pragma journal_mode=wal')
+        self._conn.execute('pragma synchronous=full')
+        self._conn.execute(_SCHEMA)
+        # 새 작업이 들어오면 Flusher 를 깨웁니다.
+        self.changed = threading.Event()
+
+    # 여러 작업을 한 번의 로컬 트랜잭션으로 기록합니다. 이미 대기 중인 idempotency_key 는 건너뜁니다.
+    # 반환값: 새로 기록된 작업 수
+    def enqueue(self, ops: list[tuple[str, dict]]) -> int:
+        now = time.time()
+        added = 0
+        with self._lock:
+            self._conn.execute('begin immediate')
+            try:
+                for kind, payload in ops:
+                    cursor = self._conn.execute(
+                        'insert or ignore into outbox (kind, payload, idempotency_key, created_at) values (?, ?, ?, ?)',
+                        (kind, json.dumps(payload, ensure_ascii=False), payload.get('idempotency_key') if kind == 'points' else None, now),
+                    )
+                    added += cursor.rowcount
+                self._conn.execute('commit')
+            except BaseException:
+                self._conn.execute('rollback')
+                raise
+        self.changed.set()
+        return added
+
+    # 보낼 차례인 작업들 (seq 순서) -> [(seq, kind, payload), ...]
+    def pending(self, limit: Optional[int] = None) -> list[tuple[int, str, dict]]:
+        query = "select seq, kind, payload from outbox where status = 'pending' order by seq"
+        if limit is not None:
+            query += f' limit {int(limit)}'
+        with self._lock:
+            rows = self._conn.execute(query).fetchall()
+        return [(seq, kind, json.loads(payload)) for seq, kind, payload in rows]
+
+    # 서버에서 거절되어 더 이상 자동으로 보내지 않는 작업들
+    def failed(self) -> list[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "select seq, kind, payload, last_error, created_at from outbox where status = 'failed' order by seq"
+            ).fetchall()
+        return [
+            {'seq': seq, 'kind': kind, 'payload': json.loads(payload), 'error': error, 'created_at': created_at}
+            for seq, kind, payload, error, created_at in rows
+        ]
+
+    def remove(self, seqs: list[int]) -> None:
+        if not seqs:
+            return
+        with self._lock:
+            self._conn.execute(f"delete from outbox where seq in ({','.join('?' * len(seqs))})", seqs)
+
+    def mark_attempt(self, seqs: list[int], error: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                f"update outbox set attempts = attempts + 1, last_error = ? where seq in ({','.join('?' * len(seqs))})",
+                [error, *seqs],
+            )
+
+    def mark_failed(self, seqs: list[int], error: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                f"update outbox set status = 'failed', last_error = ? where seq in ({','.join('?' * len(seqs))})",
+                [error, *seqs],
+            )
+
+    # seq 와 같은 묶음에 든 작업들의 seq (묶음 키가 없으면 seq 하나)
+    def batch_seqs(self, seq: int) -> list[int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "select seq from outbox where seq = ? or json_extract(payload, '$.batch') = "
+                "(select json_extract(payload, '$.batch') from outbox where seq = ?) order by seq",
+                (seq, seq),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    # 실패한 작업을 묶음째 다시 보낼 차례로 돌립니다.
+    def retry(self, seq: int) -> None:
+        seqs = self.batch_seqs(seq)
+        with self._lock:
+            self._conn.execute(f"update outbox set status = 'pending' where seq in ({','.join('?' * len(seqs))})", seqs)
+        self.changed.set()
+
+    # 아직 서버에 반영되지 않은 사용자별 포인트 변화량 (낙관적 잔액 계산용)
+    def pending_deltas(self) -> dict[str, int]:
+        deltas: dict[str, int] = {}
+        for _, kind, payload in self.pending():
+            if kind == 'points':
+                deltas[payload['user_id']] = deltas.get(payload['user_id'], 0) + payload['delta']
+        return deltas
+
+    def counts(self) -> dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute('select status, count(*) from outbox group by status').fetchall()
+        return {'pending': 0, 'failed': 0, **dict(rows)}
+
+
+# --- 서버로 보내기 ---
+# sink(kind, payloads) 는 같은 종류의 작업 묶음을 한 번에 서버에 반영합니다.
+def supabase_sink(kind: str, payloads: list[dict]) -> None:
+    if kind not in ('points', 'daily_check'):
+        raise ValueError(f"알 수 없는 작업 종류: {kind}")
+    # 가구마다 한 번씩 보냅니다. (가구끼리는 순서가 상관없습니다)
+    by_household: dict[Optional[str], list[dict]] = {}
+    for payload in payloads:
+        by_household.setdefault(payload.get('household_id'), []).append(payload)
+    for household_id, group in by_household.items():
+        with tenancy.use(household_id):
+            if kind == 'points':
+                db.apply_point_deltas(group)
+            else:
+                # 한 번의 upsert 에 같은 (사용자, 날짜)가 두 번 들어가면 서버가 통째로 거절(21000)하므로 마지막 저장만 보냅니다.
+                db.upsert_daily_checks(list({(row['user_id'], row['check_date']): row for row in group}.values()))
+
+
+# 서버가 요청 내용 자체를 거절한 경우(잔액 부족, 잘못된 값, 제약 조건 위반)는 다시 보내도 소용이 없습니다.
+# postgrest 는 응답이 2xx 가 아니면 모두 APIError 로 올리므로 code 로 구분합니다.
+#   - DB 오류 응답이면 code 는 SQLSTATE: P0001(raise exception), 21xxx(한 요청에 같은 행이 두 번), 22xxx(잘못된 값),
+#     23xxx(제약 조건) 만 영구 실패
+#   - 본문이 JSON 이 아닌 응답(게이트웨이 502/503/504 등)이면 code 는 HTTP 상태: 5xx, 408, 429 를 뺀 4xx 만 영구 실패
+# 그 밖의 오류(연결 끊김, 시간 초과 등)는 일시적인 것으로 보고 다시 보냅니다.
+PERMANENT_SQLSTATE_PREFIXES = ('P0001', '21', '22', '23')
+RETRYABLE_STATUSES = (408, 429)
+
+
+def is_permanent(error: Exception) -> bool:
+    from postgrest.exceptions import APIError
+
+    if isinstance(error, (db.InsufficientPointsError, ValueError)):
+        return True
+    if not isinstance(error, APIError):
+        return False
+    if error.message == 'insufficient_points':
+        return True
+    code = str(error.code or '')
+    if code.isdigit() and len(code) == 3:
+        return 400 <= int(code) < 500 and int(code) not in RETRYABLE_STATUSES
+    return code.startswith(PERMANENT_SQLSTATE_PREFIXES)
+
+
+class Flusher:
+    def __init__(self, outbox: Outbox, sink: Callable[[str, list[dict]], None] = supabase_sink,
+                 batch_size: int = BATCH_SIZE):
+        self.outbox = outbox
+        self.sink = sink
+        self.batch_size = batch_size
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run_forever, name='outbox-flusher', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.outbox.changed.set()
+
+    # 대기 중인 작업을 순서대로 한 번에 보냅니다.
+    # 반환값: 보낼 작업이 더 남았는지. 일시적인 오류(연결 끊김 등)는 그대로 예외로 올립니다.
+    def flush_once(self) -> bool:
+        pending = self.outbox.pending(limit=self.batch_size)
+        if not pending:
+            return False
+        # 순서를 지키기 위해 맨 앞에서부터 같은 종류가 이어지는 만큼만 보내고, 제출 묶음(batch)끼리 나눕니다.
+        kind = pending[0][1]
+        batches: dict = {}
+        for seq, op_kind, payload in pending:
+            if op_kind != kind:
+                break
+            batches.setdefault(payload.get('batch') or seq, []).append((seq, payload))
+        else:
+            if len(pending) == self.batch_size:
+                # 마지막 묶음이 다음 페이지로 이어질 수 있습니다. 그 묶음은 다음 차례에 통째로 보내고,
+                # 묶음 하나가 페이지보다 크면 그 묶음을 모두 읽어서 보냅니다.
+                last = next(reversed(batches))
+                if len(batches) > 1:
+                    del batches[last]
+                else:
+                    batches[last] = [(seq, payload) for seq, _, payload in self.outbox.pending()
+                                     if (payload.get('batch') or seq) == last]
+        groups = list(batches.values())
+
+        try:
+            self.sink(kind, [payload for group in groups for _, payload in group])
+        except Exception as e:
+            seqs = [seq for group in groups for seq, _ in group]
+            if not is_permanent(e):
+                self.outbox.mark_attempt(seqs, str(e))
+                raise
+            if len(groups) == 1:
+                self.outbox.mark_failed(seqs, str(e))
+                return True
+            # 어느 묶음이 거절되었는지 묶음마다 따로 보내서 찾아내고, 그 묶음만 통째로 실패로 표시합니다.
+            for group in groups:
+                seqs = [seq for seq, _ in group]
+                try:
+                    self.sink(kind, [payload for _, payload in group])
+                except Exception as group_error:
+                    if not is_permanent(group_error):
+                        raise
+                    self.outbox.mark_failed(seqs, str(group_error))
+                else:
+                    self.outbox.remove(seqs)
+            return True
+
+        self.outbox.remove([seq for group in groups for seq, _ in group])
+        return True
+
+    def _run_forever(self) -> None:
+        backoff = 1
+        while not self._stopped.is_set():
+            self.outbox.changed.clear()
+            try:
+                while self.flush_once():
+                    pass
+                backoff = 1
+                # 새 작업이 들어오거나, 실패 후 다시 시도할 때까지 기다립니다.
+                self.outbox.changed.wait(MAX_BACKOFF)
+            except Exception:
+                self._stopped.wait(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF)
+
+
+_lock = threading.Lock()
+_outbox: Optional[Outbox] = None
+_flusher: Optional[Flusher] = None
+
+
+# 프로세스마다 하나의 대기열과 Flusher 를 만듭니다. sink 를 넘기면 그쪽으로 보냅니다. (테스트용)
+def start(path: Optional[str] = None, sink: Optional[Callable[[str, list[dict]], None]] = None) -> Outbox:
+    global _outbox, _flusher
+    with _lock:
+        if _outbox is None:
+            _outbox = Outbox(path or db.get_setting('OUTBOX_PATH', DEFAULT_PATH))
+            _flusher = Flusher(_outbox, sink or supabase_sink)
+            _flusher.start()
+        return _outbox
+
+
+def stop() -> None:
+    global _outbox, _flusher
+    with _lock:
+        if _flusher is not None:
+            _flusher.stop()
+        _outbox = _flusher = None
+
+
+# --- 페이지에서 쓰는 함수 ---
+
+# 포인트 변경 항목들을 대기열에 넣습니다. 반환값: 새로 들어간 항목 수 (0 이면 이미 대기 중인 요청)
+# atomic 이면 항목들을 한 묶음으로 보내고, 하나라도 거절되면 모두 반영하지 않습니다.
+# 서로 상관없는 항목들(여러 날짜의 체크리스트 차감 등)은 atomic=False 로 넣으면 거절된 항목만 실패로 남습니다.
+def submit_points(entries: list[dict], atomic: bool = True) -> int:
+    household_id = tenancy.require()
+    batch = {'batch': str(uuid.uuid4())} if atomic and len(entries) > 1 else {}
+    return start().enqueue([('points', {**entry, **batch, 'household_id': household_id}) for entry in entries])
+
+
+def submit_daily_checks(rows: list[dict]) -> int:
+    household_id = tenancy.require()
+    return start().enqueue([('daily_check', {**row, 'household_id': household_id}) for row in rows])
+
+
+# 서버 잔액에 아직 반영되지 않은 변경을 더한 프로필 목록 (원본은 바꾸지 않습니다)
+def optimistic_profiles(profiles: list[dict]) -> list[dict]:
+    deltas = start().pending_deltas()
+    if not deltas:
+        return profiles
+    return [
+        {**profile, 'current_points': profile['current_points'] + deltas[profile['id']]} if profile['id'] in deltas else profile
+        for profile in profiles
+    ]
@@ -1,27 +1,42 @@
 import streamlit as st
-from supabase import Client
-import time
+import uuid
+
+import db
+import tenancy
+import outbox
+import points
+import snapshot
+import tracing
+import warmup
 
 st.set_page_config(layout="wide", page_title="포인트 관리", page_icon="💸")
 
+# 성능 보기 (사이드바)
+tracing.start_rerun("pages/1_포인트_지급_및_차감.py")
+
+# 서버 시작 준비 (프로세스당 한 번)
+warmup.start()
+
 # --- 데이터베이스 연결 및 데이터 로딩 ---
-if 'supabase_client' not in st.session_state:
-    st.warning("데이터베이스 연결을 위해 홈 화면을 먼저 방문해주세요.", icon="🏠")
+if db.get_client() is None:
+    st.error("데이터베이스에 연결할 수 없습니다.")
     st.stop()
 
-supabase: Client = st.session_state['supabase_client']
+# 가구 확인
+tenancy.start_rerun()
 
-@st.cache_data(ttl=60)
 def get_form_data():
+    # 프로필과 임무 목록은 모든 화면이 함께 쓰는 스냅샷에서 읽습니다.
     try:
-        profiles = supabase.table('profiles').select('id, full_name, current_points').order('full_name').execute().data
-        missions = supabase.table('missions').select('id, title, points_reward').order('title').execute().data
-        return profiles, missions
+        snap = snapshot.current()
     except Exception as e:
         st.error(f"데이터 로딩 오류: {e}")
         return [], []
+    return snap.profiles, snap.missions
 
 profiles, missions = get_form_data()
+# 아직 서버에 반영되지 않은 변경까지 더한 잔액으로 보여줍니다.
+profiles = outbox.optimistic_profiles(profiles)
 if not profiles:
     st.error("프로필 정보를 불러올 수 없습니다.")
     st.stop()
@@ -29,29 +44,29 @@ if not profiles:
 st.title("💸 포인트 지급 및 차감")
 st.write("---")
 
+# 변경이 끝나고 다시 그릴 때 보여줄 메시지
+if flash := st.session_state.pop('grant_flash', None):
+    st.success(flash)
+    st.balloons()
+
 # --- 마지막 선택 기억 로직 ---
 profile_options = {p['id']: f"{p['full_name']} (현재: {p['current_points']} BP)" for p in profiles}
 profile_ids = list(profile_options.keys())
 
-if 'last_selected_profile_id' not in st.session_state:
-    st.session_state.last_selected_profile_id = profile_ids[0] if profile_ids else None
-
-try:
-    default_index = profile_ids.index(st.session_state.last_selected_profile_id)
-except (ValueError, IndexError):
-    default_index = 0
+# 지난번에 고른 구성원들 (그사이 없어진 구성원은 뺍니다)
+last_selected = [i for i in st.session_state.get('last_selected_profile_ids', []) if i in profile_options]
 
 # --- 입력 폼 생성 ---
 with st.form("point_transaction_form"):
     
     col1, col2 = st.columns(2)
     with col1:
-        st.subheader("1. 누구의 포인트를 변경할까요?")
-        selected_profile_id = st.selectbox(
-            "가족 구성원 선택:", 
-            options=profile_ids, 
+        st.subheader("1. 누구의 포인트를 변경할까요? (여러 명 선택 가능)")
+        selected_profile_ids = st.multiselect(
+            "가족 구성원 선택:",
+            options=profile_ids,
+            default=last_selected or profile_ids[:1],
             format_func=lambda x: profile_options.get(x, "알 수 없는 사용자"),
-            index=default_index,
             label_visibility="collapsed"
         )
     
@@ -86,49 +101,59 @@ with st.form("point_transaction_form"):
 
     submitted = st.form_submit_button("포인트 변경 실행")
 
+# 폼을 새로 보여줄 때마다 중복 방지 키를 새로 만듭니다.
+# 제출 버튼을 연달아 눌러 제출이 이어서 실행되면 같은 키가 유지되어 한 번만 반영됩니다.
+if not submitted or 'grant_idempotency_key' not in st.session_state:
+    st.session_state.grant_idempotency_key = str(uuid.uuid4())
 
 if submitted:
-    st.session_state.last_selected_profile_id = selected_profile_id
+    st.session_state.last_selected_profile_ids = selected_profile_ids
 
-    if input_method == '직접 사유 입력하기' and not reason:
+    if not selected_profile_ids:
+        st.error("가족 구성원을 한 명 이상 선택해주세요.")
+    elif input_method == '직접 사유 입력하기' and not reason:
         st.error("사유를 반드시 입력해주세요.")
     elif input_method == '정해진 임무 목록에서 선택' and not selected_mission_id:
         st.error("선택할 임무가 없습니다. '직접 사유 입력하기'로 변경 후 다시 시도해주세요.")
     else:
-        with st.spinner("포인트 정보를 업데이트하고 있습니다..."):
-            try:
-                if selected_mission_id:
-                    selected_mission = next((m for m in missions if m['id'] == selected_mission_id), None)
-                    points_value = selected_mission['points_reward']
-                    log_reason = selected_mission['title']
-                else:
-                    points_value = points_to_change
-                    log_reason = reason
+        if selected_mission_id:
+            selected_mission = next((m for m in missions if m['id'] == selected_mission_id), None)
+            points_value = selected_mission['points_reward']
+            log_reason = selected_mission['title']
+        else:
+            points_value = points_to_change
+            log_reason = reason
 
-                profile_data = supabase.table('profiles').select('current_points').eq('id', selected_profile_id).single().execute().data
-                current_points = profile_data['current_points']
+        if transaction_type == '지급':
+            delta = points_value
+            log_message = f"+{points_value} BP"
+        else:
+            delta = -points_value
+            log_message = f"-{points_value} BP"
 
-                if transaction_type == '지급':
-                    new_points = current_points + points_value
-                    log_message = f"+{points_value} BP"
+        # 선택한 모든 구성원에게 같은 변경을 한 묶음으로 반영합니다.
+        entries = points.grant_entries(
+            selected_profile_ids, delta, f"[{transaction_type}] {log_reason} ({log_message})",
+            st.session_state.grant_idempotency_key, mission_id=selected_mission_id,
+        )
+        names = {p['id']: p['full_name'] for p in profiles}
+        # 차감은 묶음 전체를 화면의 잔액으로 한 번에 확인하고, 모자라는 사람을 모두 알려줍니다.
+        if shortage := points.shortfalls(profiles, entries):
+            balances = {p['id']: p['current_points'] for p in profiles}
+            st.error("포인트가 부족하여 차감할 수 없습니다: " + ", ".join(
+                f"{names[user_id]} (현재 {balances[user_id]} BP)" for user_id in shortage
+            ))
+        else:
+            try:
+                # 먼저 이 서버의 대기열에 기록하고, 서버 반영은 백그라운드에서 진행됩니다.
+                if not outbox.submit_points(entries):
+                    st.session_state.grant_idempotency_key = str(uuid.uuid4())
+                    st.info("이미 처리된 요청입니다.")
                 else:
-                    new_points = current_points - points_value
-                    if new_points < 0:
-                        st.error(f"포인트가 부족({current_points} BP)하여 차감할 수 없습니다.")
-                        st.stop()
-                    log_message = f"-{points_value} BP"
-                
-                supabase.table('profiles').update({'current_points': new_points}).eq('id', selected_profile_id).execute()
-                
-                supabase.table('mission_log').insert({
-                    "user_id": selected_profile_id, "mission_id": selected_mission_id, "notes": f"[{transaction_type}] {log_reason} ({log_message})"
-                }).execute()
-
-                st.success(f"✅ 포인트 변경이 성공적으로 완료되었습니다!")
-                st.balloons()
-                st.cache_data.clear()
-                time.sleep(1)
-                st.rerun()
-
+                    who = ", ".join(names[user_id] for user_id in selected_profile_ids)
+                    st.session_state.grant_flash = f"✅ {who}의 포인트 변경이 성공적으로 완료되었습니다! ({log_message})"
+                    st.rerun()
             except Exception as e:
-                st.error(f"오류가 발생했습니다: {e}")
\ No newline at end of file
+                st.error(f"오류가 발생했습니다: {e}")
+
+tracing.show_panel()
@@ -1,22 +1,44 @@
 import streamlit as st
-from supabase import Client
-import time
+import uuid
+
+import db
+import tenancy
+import outbox
+import points
+import snapshot
+import tracing
+import warmup
+
+# 한 번에 구매할 수 있는 같은 보상의 최대 개수
+MAX_QUANTITY = 10
 
 st.set_page_config(layout="wide", page_title="포인트 샵", page_icon="🛍️")
 
-if 'supabase_client' not in st.session_state:
-    st.warning("데이터베이스 연결을 위해 홈 화면을 먼저 방문해주세요.")
+# 성능 보기 (사이드바)
+tracing.start_rerun("pages/2_보상_사용하기.py")
+
+# 서버 시작 준비 (프로세스당 한 번)
+warmup.start()
+
+if db.get_client() is None:
+    st.error("데이터베이스에 연결할 수 없습니다.")
     st.stop()
 
-supabase: Client = st.session_state['supabase_client']
+# 가구 확인
+tenancy.start_rerun()
 
-@st.cache_data(ttl=60)
 def get_data_for_shop():
-    profiles = supabase.table('profiles').select('id, full_name, current_points').order('full_name').execute().data
-    rewards = supabase.table('rewards').select('id, name, point_cost').eq('is_active', True).order('point_cost').execute().data
-    return profiles, rewards
+    # 프로필과 보상 목록은 모든 화면이 함께 쓰는 스냅샷에서 읽습니다.
+    try:
+        snap = snapshot.current()
+    except Exception as e:
+        st.error(f"데이터 로딩 오류: {e}")
+        return [], []
+    return snap.profiles, snap.active_rewards()
 
 profiles, rewards = get_data_for_shop()
+# 아직 서버에 반영되지 않은 변경까지 더한 잔액으로 보여주고 확인합니다.
+profiles = outbox.optimistic_profiles(profiles)
 
 if not profiles or not rewards:
     st.error("프로필 또는 보상 정보를 불러올 수 없습니다.")
@@ -25,41 +47,61 @@ if not profiles or not rewards:
 st.title("🛍️ 우리 집 포인트 샵")
 st.write("---")
 
+# 구매가 끝나고 다시 그릴 때 보여줄 메시지
+if flash := st.session_state.pop('redeem_flash', None):
+    st.success(flash)
+    st.balloons()
+
+# 한 아이가 보상 여러 개(같은 보상 여러 개 포함)를 한 번에 구매합니다.
 with st.form("redeem_reward_form"):
     st.subheader("어떤 아이가 어떤 보상을 사용하나요?")
 
     profile_options = {p['id']: f"{p['full_name']} (보유: {p['current_points']} BP)" for p in profiles}
     selected_profile_id = st.selectbox("가족 구성원 선택:", options=list(profile_options.keys()), format_func=lambda x: profile_options[x])
 
-    reward_options = {r['id']: f"{r['name']} ({r['point_cost']} BP 필요)" for r in rewards}
-    selected_reward_id = st.selectbox("구매할 보상 아이템 선택:", options=list(reward_options.keys()), format_func=lambda x: reward_options[x])
-    
+    st.write("구매할 보상과 개수를 입력하세요:")
+    basket_rows = st.data_editor(
+        [{'id': r['id'], 'name': r['name'], 'point_cost': r['point_cost'], 'quantity': 0} for r in rewards],
+        column_order=['name', 'point_cost', 'quantity'],
+        column_config={
+            'name': "보상",
+            'point_cost': st.column_config.NumberColumn("필요 포인트", format="%d BP"),
+            'quantity': st.column_config.NumberColumn("개수", min_value=0, max_value=MAX_QUANTITY, step=1),
+        },
+        disabled=['name', 'point_cost'],
+        use_container_width=True, hide_index=True,
+        key='redeem_basket',
+    )
+
     submitted = st.form_submit_button("포인트로 구매하기")
 
+# 폼을 새로 보여줄 때마다 중복 방지 키를 새로 만듭니다. (연속 클릭 시 한 번만 반영)
+if not submitted or 'redeem_idempotency_key' not in st.session_state:
+    st.session_state.redeem_idempotency_key = str(uuid.uuid4())
+
 if submitted:
-    with st.spinner("포인트를 사용하고 있어요..."):
+    basket = {row['id']: int(row['quantity']) for row in basket_rows if row['quantity']}
+    entries = points.basket_entries(selected_profile_id, basket, rewards, st.session_state.redeem_idempotency_key)
+    total = -sum(entry['delta'] for entry in entries)
+
+    # 대기열에 넣기 전에 화면의 잔액으로 묶음 전체를 한 번에 확인하고, 서버에서 반영할 때 최신 잔액으로 한 번 더 확인합니다.
+    if not entries:
+        st.error("구매할 보상의 개수를 입력해주세요.")
+    elif shortage := points.shortfalls(profiles, entries):
+        st.error(f"포인트가 부족합니다! 합계 {total} BP 중 {shortage[selected_profile_id]} BP가 모자랍니다.")
+    else:
         try:
-            selected_profile = next((p for p in profiles if p['id'] == selected_profile_id), None)
-            selected_reward = next((r for r in rewards if r['id'] == selected_reward_id), None)
-            
-            points_to_spend = selected_reward['point_cost']
-            current_points = selected_profile['current_points']
-
-            if current_points < points_to_spend:
-                st.error(f"포인트가 부족합니다! 현재 {current_points} BP 보유 중입니다.")
+            if not outbox.submit_points(entries):
+                st.session_state.redeem_idempotency_key = str(uuid.uuid4())
+                st.info("이미 처리된 요청입니다.")
             else:
-                new_points = current_points - points_to_spend
-                supabase.table('profiles').update({'current_points': new_points}).eq('id', selected_profile_id).execute()
-
-                supabase.table('redemption_log').insert({
-                    "user_id": selected_profile_id, "reward_id": selected_reward_id, "points_spent": points_to_spend
-                }).execute()
-
-                st.success(f"🎉 '{selected_reward['name']}' 아이템 구매 완료!")
-                st.balloons()
-                st.cache_data.clear()
-                time.sleep(1)
+                names = {r['id']: r['name'] for r in rewards}
+                bought = ', '.join(f"'{names[reward_id]}' {quantity}개" for reward_id, quantity in basket.items())
+                st.session_state.redeem_flash = f"🎉 {bought} 구매 완료! (-{total} BP)"
+                # 다음 구매를 위해 개수를 비웁니다.
+                del st.session_state['redeem_basket']
                 st.rerun()
-
         except Exception as e:
             st.error(f"오류가 발생했습니다: {e}")
+
+tracing.show_panel()
@@ -1,90 +1,108 @@
 import streamlit as st
-from supabase import Client
 import pandas as pd
+from datetime import datetime, time
+from zoneinfo import ZoneInfo
+
+import activity
+import db
+import snapshot
+import tenancy
+import tracing
+import warmup
 
 # 페이지 기본 설정
 st.set_page_config(layout="wide", page_title="포인트 기록", page_icon="🧾")
 
-# Supabase 클라이언트 연결 가져오기
-if 'supabase_client' in st.session_state:
-    supabase: Client = st.session_state['supabase_client']
-else:
-    st.warning("데이터베이스 연결을 위해 홈 화면을 먼저 방문해주세요.")
+# 성능 보기 (사이드바)
+tracing.start_rerun("pages/3_포인트_로그_보기.py")
+
+# 서버 시작 준비 (프로세스당 한 번)
+warmup.start()
+
+# 데이터베이스 연결 확인
+if db.get_client() is None:
+    st.error("데이터베이스에 연결할 수 없습니다.")
     st.stop()
 
+# 가구 확인
+tenancy.start_rerun()
+
 st.title("🧾 포인트 적립/사용 기록 보기")
 st.write("---")
 
+# 한 번에 불러오는 기록 수 ("더 보기" 를 누를 때마다 이만큼 더 불러옵니다)
+if 'log_pages' not in st.session_state:
+    st.session_state.log_pages = 1
+
 # 데이터 로딩 함수
-@st.cache_data(ttl=30)
-def get_logs():
+def get_logs(pages):
     try:
-        profiles_data = supabase.table('profiles').select('id, full_name').execute().data
-        
-        # mission_log에서는 created_at 컬럼을 사용
-        mission_logs_data = supabase.table('mission_log').select('user_id, created_at, notes').order('created_at', desc=True).limit(100).execute().data
-        
-        # --- [중요!] 여기서 에러가 발생한 부분을 수정했습니다. 'created_at' -> 'redeemed_at' ---
-        redemption_logs_data = supabase.table('redemption_log').select('user_id, redeemed_at, points_spent, reward_id').order('redeemed_at', desc=True).limit(100).execute().data
-        
-        rewards_data = supabase.table('rewards').select('id, name').execute().data
-        
-        return profiles_data, mission_logs_data, redemption_logs_data, rewards_data
+        # 미션 로그와 보상 사용 로그를 서버에서 합쳐 최신순으로 페이지 단위로 가져옵니다.
+        # 사용자 이름과 보상 이름도 함께 들어 있어 한 번의 요청으로 끝나고,
+        # 표로 바꾼 결과도 함께 캐시되어 다시 그릴 때는 변환하지 않습니다.
+        return activity.load_frame(pages=pages)
     except Exception as e:
         st.error(f"로그 데이터를 불러오는 중 오류가 발생했습니다. 잠시 후 다시 시도해주세요.")
         st.exception(e) # 개발자를 위한 자세한 에러 정보 표시
-        return [], [], [], []
+        return activity.to_frame([]), False
 
 # 데이터 불러오기
-profiles, mission_logs, redemption_logs, rewards = get_logs()
+logs, has_more = get_logs(st.session_state.log_pages)
 
 # 새로고침 버튼
 if st.button("기록 새로고침"):
-    st.cache_data.clear()
+    db.invalidate_logs()
+    st.session_state.log_pages = 1
     st.rerun()
 
-# 데이터를 사용하기 쉽게 가공 (매핑)
-profile_map = {p['id']: p['full_name'] for p in profiles} if profiles else {}
-reward_map = {r['id']: r['name'] for r in rewards} if rewards else {}
-
-# 모든 로그를 하나의 리스트로 합치기
-all_logs = []
-
-# 미션 로그 처리
-if mission_logs:
-    for log in mission_logs:
-        if log.get('notes'): # notes가 있는 로그만 (수동 지급/차감)
-            all_logs.append({
-                "날짜": log['created_at'],
-                "이름": profile_map.get(log['user_id'], '알 수 없음'),
-                "내용": log['notes'],
-                "종류": "포인트 변경"
-            })
-
-# 보상 사용 로그 처리
-if redemption_logs:
-    for log in redemption_logs:
-        # --- [중요!] 여기서도 에러가 발생한 부분을 함께 수정했습니다. 'created_at' -> 'redeemed_at' ---
-        all_logs.append({
-            "날짜": log['redeemed_at'],
-            "이름": profile_map.get(log['user_id'], '알 수 없음'),
-            "내용": f"'{reward_map.get(log['reward_id'], '알 수 없는 보상')}' 구매 (-{log['points_spent']} BP)",
-            "종류": "보상 사용"
-        })
-
-# 최종적으로 화면에 보여주기
-if all_logs:
-    # 데이터프레임으로 변환
-    df = pd.DataFrame(all_logs)
-    
-    # 날짜 순으로 다시 한번 정렬
-    df['날짜'] = pd.to_datetime(df['날짜'])
-    df = df.sort_values(by="날짜", ascending=False)
-    
-    # 날짜 형식 변경 (보기 좋게)
-    df['날짜'] = df['날짜'].dt.strftime('%Y년 %m월 %d일 %H:%M')
-
-    # 화면에 표 그리기
-    st.dataframe(df, use_container_width=True, hide_index=True)
+# 최종적으로 화면에 보여주기 (이미 최신순으로 정렬되어 있습니다)
+if not logs.empty:
+    activity.show(logs)
+
+    if has_more and st.button("더 보기"):
+        st.session_state.log_pages += 1
+        st.rerun()
 else:
     st.info("아직 포인트 기록이 없습니다.")
+
+# --- 잔액 감사 (포인트 원장) ---
+st.write("---")
+with st.expander("🔎 잔액 감사"):
+    st.caption("포인트 원장에 쌓인 기록으로 특정 시점의 잔액을 확인하고, 현재 잔액과 원장이 일치하는지 검사합니다.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        as_of_date = st.date_input("조회할 날짜", value=datetime.now(ZoneInfo(activity.LOCAL_TIMEZONE)).date())
+    with col2:
+        if st.button("해당 날짜 기준 잔액 보기"):
+            try:
+                as_of = datetime.combine(as_of_date, time.max, tzinfo=ZoneInfo(activity.LOCAL_TIMEZONE)).isoformat()
+                profiles = snapshot.current().profiles
+                # 사람마다 인덱스를 한 번씩만 찾는 조회이므로 동시에 실행합니다.
+                results, errors = db.fetch_parallel({
+                    p['id']: (lambda user_id=p['id']: db.get_balance_as_of(user_id, as_of)) for p in profiles
+                })
+                for e in errors.values():
+                    st.error(f"잔액을 불러오는 중 오류가 발생했습니다: {e}")
+                balances = [{"이름": p['full_name'], "잔액": results.get(p['id'])} for p in profiles]
+                st.dataframe(pd.DataFrame(balances), use_container_width=True, hide_index=True)
+            except Exception as e:
+                st.error(f"잔액을 불러오는 중 오류가 발생했습니다: {e}")
+
+    if st.button("현재 잔액과 원장 비교하기"):
+        try:
+            drift = pd.DataFrame(db.get_ledger_drift())
+            if drift.empty:
+                st.info("등록된 프로필이 없습니다.")
+            else:
+                drift = drift.rename(columns={'full_name': '이름', 'current_points': '현재 잔액', 'ledger_balance': '원장 잔액', 'drift': '차이'})
+                st.dataframe(drift[['이름', '현재 잔액', '원장 잔액', '차이']], use_container_width=True, hide_index=True)
+                mismatched = drift[drift['차이'].fillna(0) != 0]
+                if mismatched.empty:
+                    st.success("모든 구성원의 현재 잔액이 원장과 일치합니다.")
+                else:
+                    st.warning(f"{len(mismatched)}명의 잔액이 원장과 다릅니다. 포인트가 직접 수정되었는지 확인해주세요.")
+        except Exception as e:
+            st.error(f"원장을 불러오는 중 오류가 발생했습니다: {e}")
+
+tracing.show_panel()
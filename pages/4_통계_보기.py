@@ -0,0 +1,109 @@
+import streamlit as st
+import pandas as pd
+from datetime import date, timedelta
+
+import db
+import snapshot
+import tenancy
+import tracing
+import warmup
+
+# 페이지 기본 설정
+st.set_page_config(layout="wide", page_title="통계", page_icon="📊")
+
+# 성능 보기 (사이드바)
+tracing.start_rerun("pages/4_통계_보기.py")
+
+# 서버 시작 준비 (프로세스당 한 번)
+warmup.start()
+
+# 데이터베이스 연결 확인
+if db.get_client() is None:
+    st.error("데이터베이스에 연결할 수 없습니다.")
+    st.stop()
+
+# 가구 확인
+tenancy.start_rerun()
+
+st.title("📊 아이별 통계")
+st.write("---")
+
+# 보기 단위별 (pandas 묶음 기준, 불러올 기간(일))
+PERIODS = {
+    "주간": ("W-MON", 7 * 12),
+    "월간": ("MS", 366),
+}
+TOP_VIOLATIONS = 5
+
+col1, col2 = st.columns(2)
+with col1:
+    period = st.radio("보기 단위", list(PERIODS), horizontal=True)
+freq, days = PERIODS[period]
+
+# 데이터 불러오기
+# 원본 기록 대신 일별 집계(daily_stats)만 읽으므로 기간 x 인원 수 만큼의 행만 가져옵니다.
+try:
+    profiles = snapshot.current().profiles
+    stats = db.list_daily_stats(str(date.today() - timedelta(days=days - 1)))
+except Exception as e:
+    st.error("통계를 불러오는 중 오류가 발생했습니다. 잠시 후 다시 시도해주세요.")
+    st.exception(e)
+    st.stop()
+
+names = {p['id']: p['full_name'] for p in profiles}
+with col2:
+    selected = st.multiselect("아이 선택", list(names.values()), default=list(names.values()))
+
+stats = pd.DataFrame(stats, columns=['user_id', 'day', 'earned', 'spent', 'deducted', 'checklist_score', 'violated_items'])
+stats['이름'] = stats['user_id'].map(names)
+stats = stats[stats['이름'].isin(selected)]
+
+if stats.empty:
+    st.info("선택한 기간에 기록이 없습니다.")
+    st.stop()
+
+stats['day'] = pd.to_datetime(stats['day'])
+
+# --- 기간별 포인트와 체크리스트 평균 ---
+summary = (
+    stats.groupby(['이름', pd.Grouper(key='day', freq=freq, label='left', closed='left')])
+    .agg(earned=('earned', 'sum'), spent=('spent', 'sum'), deducted=('deducted', 'sum'),
+         checklist_score=('checklist_score', 'mean'))
+    .reset_index()
+)
+summary['순증감'] = summary['earned'] - summary['spent'] - summary['deducted']
+summary['checklist_score'] = summary['checklist_score'].round(1)
+summary['기간'] = summary['day'].dt.strftime('%Y-%m-%d 주' if period == "주간" else '%Y년 %m월')
+summary = summary.rename(columns={
+    'earned': '적립', 'spent': '보상 사용', 'deducted': '차감', 'checklist_score': '체크리스트 평균',
+})
+
+st.subheader(f"💰 {period} 포인트")
+st.bar_chart(summary, x='기간', y='적립', color='이름')
+st.dataframe(
+    summary.sort_values(['day', '이름'], ascending=[False, True])[['기간', '이름', '적립', '보상 사용', '차감', '순증감', '체크리스트 평균']],
+    use_container_width=True, hide_index=True,
+)
+
+st.subheader(f"✅ {period} 체크리스트 평균 점수")
+scores = summary.dropna(subset=['체크리스트 평균'])
+if scores.empty:
+    st.info("선택한 기간에 체크리스트 기록이 없습니다.")
+else:
+    st.line_chart(scores, x='day', y='체크리스트 평균', color='이름')
+
+# --- 가장 많이 어긴 항목 ---
+st.subheader("⚠️ 가장 많이 어긴 항목")
+violations = stats[['이름', 'violated_items']].explode('violated_items').dropna(subset=['violated_items'])
+if violations.empty:
+    st.success("선택한 기간에 어긴 항목이 없습니다. 👍")
+else:
+    counts = violations.value_counts(['이름', 'violated_items']).rename('횟수').reset_index()
+    counts = counts.groupby('이름', sort=False).head(TOP_VIOLATIONS).rename(columns={'violated_items': '항목'})
+    cols = st.columns(len(counts['이름'].unique()))
+    for col, (name, group) in zip(cols, counts.groupby('이름')):
+        with col:
+            st.markdown(f"**{name}**")
+            st.dataframe(group[['항목', '횟수']], use_container_width=True, hide_index=True)
+
+tracing.show_panel()
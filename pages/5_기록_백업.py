@@ -0,0 +1,104 @@
+import os
+import tempfile
+
+import streamlit as st
+
+import backup
+import db
+import tenancy
+import tracing
+import warmup
+
+# 페이지 기본 설정
+st.set_page_config(layout="wide", page_title="기록 백업", page_icon="💾")
+
+# 성능 보기 (사이드바)
+tracing.start_rerun("pages/5_기록_백업.py")
+
+# 서버 시작 준비 (프로세스당 한 번)
+warmup.start()
+
+# 데이터베이스 연결 확인
+if db.get_client() is None:
+    st.error("데이터베이스에 연결할 수 없습니다.")
+    st.stop()
+
+# 가구 확인
+tenancy.start_rerun()
+
+st.title("💾 기록 내보내기 / 가져오기")
+st.write("---")
+
+TABLE_LABELS = {
+    'mission_log': "포인트 변경 기록 (mission_log)",
+    'redemption_log': "보상 사용 기록 (redemption_log)",
+    'daily_checks': "체크리스트 기록 (daily_checks)",
+}
+formats = ['csv', 'parquet'] if backup.parquet_available() else ['csv']
+if len(formats) == 1:
+    st.caption("Parquet 형식을 쓰려면 서버에 pyarrow 를 설치해주세요.")
+
+# --- 내보내기 ---
+st.subheader("📤 내보내기")
+st.caption("기록을 여러 번에 나눠 불러오면서 바로 파일에 씁니다. 기록이 많아도 서버 메모리를 많이 쓰지 않습니다.")
+
+col1, col2 = st.columns(2)
+with col1:
+    export_table = st.selectbox("내보낼 기록", list(TABLE_LABELS), format_func=TABLE_LABELS.get, key='export_table')
+with col2:
+    export_format = st.radio("파일 형식", formats, horizontal=True, key='export_format')
+
+if st.button("내보내기 파일 만들기"):
+    # 이전에 만든 파일은 지우고 새로 만듭니다.
+    previous = st.session_state.pop('export_file', None)
+    if previous and os.path.exists(previous['path']):
+        os.remove(previous['path'])
+    try:
+        with st.spinner("기록을 내보내는 중입니다..."):
+            with tempfile.NamedTemporaryFile(suffix=f'.{export_format}', delete=False) as out:
+                count = backup.export_table(export_table, out, export_format)
+        st.session_state.export_file = {
+            'path': out.name,
+            'name': f'{export_table}.{export_format}',
+            'count': count,
+        }
+    except Exception as e:
+        st.error(f"기록을 내보내는 중 오류가 발생했습니다: {e}")
+
+export_file = st.session_state.get('export_file')
+if export_file and os.path.exists(export_file['path']):
+    st.success(f"{export_file['count']}개의 기록을 담은 파일을 만들었습니다.")
+    with open(export_file['path'], 'rb') as f:
+        st.download_button(
+            f"⬇️ {export_file['name']} 받기", f, file_name=export_file['name'],
+            mime='text/csv' if export_file['name'].endswith('.csv') else 'application/octet-stream',
+        )
+
+# --- 가져오기 ---
+st.write("---")
+st.subheader("📥 가져오기")
+st.caption(
+    f"내보내기로 만든 파일을 {backup.IMPORT_CHUNK_SIZE}개씩 묶어서 넣습니다. "
+    "이미 있는 기록은 건너뛰므로 같은 파일을 여러 번 가져와도 중복되지 않습니다."
+)
+st.warning("기록만 옮겨지고 현재 포인트 잔액은 바뀌지 않습니다.")
+
+col1, col2 = st.columns(2)
+with col1:
+    import_table = st.selectbox("가져올 기록", list(TABLE_LABELS), format_func=TABLE_LABELS.get, key='import_table')
+with col2:
+    uploaded = st.file_uploader("백업 파일", type=formats)
+
+if uploaded is not None and st.button("가져오기"):
+    import_format = 'parquet' if uploaded.name.endswith('.parquet') else 'csv'
+    try:
+        with st.spinner("기록을 가져오는 중입니다..."):
+            result = backup.import_table(import_table, uploaded, import_format)
+        st.success(f"{result.read}개의 기록 중 {result.inserted}개를 새로 넣었습니다.")
+        if result.skipped:
+            st.warning(f"같은 기록이 이미 있어서 {result.skipped}개는 건너뛰었습니다. "
+                       "이 가구에 예전에 가져온 기록이 아니라면, 다른 가구의 기록과 번호가 겹친 것일 수 있습니다.")
+    except Exception as e:
+        st.error(f"기록을 가져오는 중 오류가 발생했습니다: {e}")
+
+tracing.show_panel()
@@ -0,0 +1,132 @@
+import streamlit as st
+
+import db
+import scheduler
+import snapshot
+import tenancy
+import tracing
+import warmup
+
+# 페이지 기본 설정
+st.set_page_config(layout="wide", page_title="정기 지급", page_icon="⏰")
+
+# 성능 보기 (사이드바)
+tracing.start_rerun("pages/6_정기_지급.py")
+
+# 서버 시작 준비 (프로세스당 한 번)
+warmup.start()
+
+# 데이터베이스 연결 확인
+if db.get_client() is None:
+    st.error("데이터베이스에 연결할 수 없습니다.")
+    st.stop()
+
+# 가구 확인
+tenancy.start_rerun()
+
+st.title("⏰ 정기 지급 / 자동 차감")
+st.caption(
+    "하루가 끝나면 정해진 요일의 미션 포인트를 지급하고, 저장된 체크리스트 점수만큼 포인트를 차감합니다. "
+    "서버에서 매일 `python scheduler.py` 를 실행하거나, 아래의 버튼으로 바로 반영할 수 있습니다."
+)
+st.write("---")
+
+try:
+    snap = snapshot.current()
+    profiles, missions = snap.profiles, snap.missions
+except Exception as e:
+    st.error(f"데이터 로딩 오류: {e}")
+    profiles, missions = [], []
+try:
+    schedules = db.list_recurring_missions()
+except Exception as e:
+    st.error(f"데이터 로딩 오류: {e}")
+    schedules = []
+
+names = {p['id']: p['full_name'] for p in profiles}
+mission_labels = {m['id']: f"{m['title']} (+{m['points_reward']} BP)" for m in missions}
+
+# --- 정기 지급 목록 ---
+st.subheader("📅 정기 지급 목록")
+if schedules:
+    st.dataframe(
+        [
+            {
+                'mission': mission_labels.get(s['mission_id'], "알 수 없는 미션"),
+                'target': names.get(s['user_id'], "알 수 없음") if s.get('user_id') else "모든 아이",
+                'weekdays': ', '.join(scheduler.WEEKDAY_LABELS[d] for d in s['weekdays']),
+                'starts_on': s['starts_on'],
+            }
+            for s in schedules
+        ],
+        column_config={'mission': "미션", 'target': "대상", 'weekdays': "요일", 'starts_on': "시작일"},
+        use_container_width=True, hide_index=True,
+    )
+    with st.form("stop_schedule_form"):
+        stop_id = st.selectbox(
+            "그만할 정기 지급", [s['id'] for s in schedules],
+            format_func=lambda i: next(
+                f"{mission_labels.get(s['mission_id'], '알 수 없는 미션')} - {names.get(s['user_id'], '모든 아이')}"
+                for s in schedules if s['id'] == i
+            ),
+        )
+        if st.form_submit_button("그만하기"):
+            try:
+                db.set_recurring_mission_active(stop_id, False)
+            except Exception as e:
+                st.error(f"정기 지급을 그만하는 중 오류가 발생했습니다: {e}")
+            else:
+                st.rerun()
+else:
+    st.info("등록된 정기 지급이 없습니다.")
+
+with st.expander("➕ 정기 지급 추가"):
+    if not mission_labels:
+        st.warning("등록된 미션이 없습니다.")
+    else:
+        with st.form("add_schedule_form"):
+            mission_id = st.selectbox("미션", list(mission_labels), format_func=mission_labels.get)
+            user_id = st.selectbox("대상", [None, *names], format_func=lambda i: "모든 아이" if i is None else names[i])
+            weekdays = st.multiselect("요일", list(scheduler.WEEKDAY_LABELS), default=list(scheduler.WEEKDAY_LABELS),
+                                      format_func=scheduler.WEEKDAY_LABELS.get)
+            starts_on = st.date_input("시작일", value=scheduler.today())
+            if st.form_submit_button("추가하기"):
+                if not weekdays:
+                    st.error("요일을 하나 이상 골라주세요.")
+                else:
+                    try:
+                        db.add_recurring_mission(mission_id, user_id, weekdays, str(starts_on))
+                    except Exception as e:
+                        st.error(f"정기 지급을 추가하는 중 오류가 발생했습니다: {e}")
+                    else:
+                        st.rerun()
+
+# --- 지금 반영하기 ---
+st.write("---")
+st.subheader("▶️ 지금 반영하기")
+try:
+    todo = scheduler.cached_plan(scheduler.yesterday())
+except Exception as e:
+    st.error(f"처리할 내용을 계산하는 중 오류가 발생했습니다: {e}")
+    st.stop()
+
+if not todo.entries:
+    st.success(f"어제({scheduler.yesterday()})까지 모두 반영되었습니다.")
+else:
+    st.write(f"**{todo.check_days[0]} ~ {todo.check_days[-1]}**: 지급 {len(todo.grants)}건, 차감 {len(todo.deductions)}건")
+    st.caption(f"이미 반영된 {todo.applied}건(화면에서 차감한 체크리스트 등)은 빼고 보여줍니다. "
+               f"최근 {scheduler.RESCAN_DAYS}일은 늦게 저장한 체크리스트가 있는지 매번 다시 확인합니다.")
+    st.dataframe(
+        [{'name': names.get(e['user_id'], "알 수 없음"), 'delta': e['delta'], 'notes': e['notes']} for e in todo.entries],
+        column_config={'name': "이름", 'delta': "포인트", 'notes': "내용"},
+        use_container_width=True, hide_index=True,
+    )
+    if st.button("반영하기", type="primary"):
+        with st.spinner("반영 중입니다..."):
+            try:
+                result = scheduler.run()
+                st.success(f"지급 {result.granted}건, 차감 {result.deducted}건을 반영했습니다. (이미 반영됨 {result.skipped}건)")
+            except Exception as e:
+                st.error(f"반영 중 오류가 발생했습니다: {e}")
+
+tracing.show_panel()
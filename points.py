@@ -0,0 +1,48 @@
+from typing import Optional
+
+from db import Profile, Reward
+
+# --- 여러 명 / 여러 개를 한 번에 처리하는 포인트 변경 ---
+# 포인트 지급 화면(여러 아이에게 같은 미션)과 포인트 샵(보상 여러 개를 한 번에)이 함께 씁니다.
+# 묶음 전체를 화면의 잔액(아직 반영되지 않은 변경 포함)으로 한 번에 확인한 뒤,
+# 쓰기 대기열(outbox.submit_points)에 한 번의 로컬 트랜잭션으로 넣습니다.
+# 대기열은 이어진 포인트 작업을 한 번의 apply_point_deltas 요청으로 서버에 보냅니다.
+# 항목마다 중복 방지 키는 '{묶음 키}:{순번}' 이므로 같은 제출이 다시 실행되어도 한 번만 반영됩니다.
+
+
+# 묶음을 반영하면 잔액이 모자라게 되는 사람들 -> {user_id: 모자라는 포인트}
+def shortfalls(profiles: list[Profile], entries: list[dict]) -> dict[str, int]:
+    balances = {profile['id']: profile['current_points'] for profile in profiles}
+    for entry in entries:
+        balances[entry['user_id']] = balances.get(entry['user_id'], 0) + entry['delta']
+    touched = {entry['user_id'] for entry in entries}
+    return {user_id: -balance for user_id, balance in balances.items() if user_id in touched and balance < 0}
+
+
+def grant_entries(user_ids: list[str], delta: int, notes: str, batch_key: str,
+                  mission_id: Optional[int] = None) -> list[dict]:
+    return [
+        {
+            'user_id': user_id,
+            'delta': delta,
+            'idempotency_key': f"{batch_key}:{i}",
+            'notes': notes,
+            'mission_id': mission_id,
+        }
+        for i, user_id in enumerate(user_ids)
+    ]
+
+
+# basket: {보상 id: 개수}. 보상 한 개마다 redemption_log 한 행이 됩니다.
+def basket_entries(user_id: str, basket: dict[int, int], rewards: list[Reward], batch_key: str) -> list[dict]:
+    costs = {reward['id']: reward['point_cost'] for reward in rewards}
+    entries = []
+    for reward_id, quantity in basket.items():
+        for _ in range(quantity):
+            entries.append({
+                'user_id': user_id,
+                'delta': -costs[reward_id],
+                'idempotency_key': f"{batch_key}:{len(entries)}",
+                'reward_id': reward_id,
+            })
+    return entries
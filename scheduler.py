@@ -0,0 +1,201 @@
+import argparse
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+import cache
+import checklist
+import db
+import tenancy
+from db import DailyCheck, Mission, Profile, RecurringMission
+
+# --- 정기 지급 / 자동 차감 스케줄러 ---
+# 하루가 끝난 뒤(한국 시간) 가구의 모든 구성원에 대해
+#   1. 정기 미션(recurring_missions): 정해진 요일이면 미션 포인트를 지급하고 (대상이 비어 있으면 가구의 모든 아이)
+#   2. 체크리스트(daily_checks): 저장된 점수만큼 포인트를 차감해서 (checklist.deduction_entry 와 같은 계산, 같은 키)
+# 가구마다 apply_point_deltas 요청 한 번, 한 번의 트랜잭션으로 반영합니다. (sql/011_scheduler.sql)
+#
+# 중복 방지 키가 (정기 미션, 사용자, 날짜) / (체크리스트, 사용자, 날짜) 로 정해져 있으므로
+# 같은 날짜를 다시 처리하거나, 화면에서 이미 차감한 날짜를 처리해도 한 번만 반영됩니다.
+# 마지막으로 처리한 날짜의 다음 날부터 어제까지를 처리하므로 며칠 실행을 놓쳐도 따라잡습니다. (최대 MAX_CATCHUP_DAYS 일)
+# 처음 실행할 때는 어제 하루만 처리합니다.
+# 체크리스트는 이미 처리한 날짜라도 최근 RESCAN_DAYS 일을 매번 다시 훑어서, 스케줄러가 지나간 뒤에 저장한 것도 차감합니다.
+# (스케줄러가 처음 처리한 날짜 이전은 훑지 않습니다) 이미 반영된 키는 계획에서 빠집니다.
+#
+#   python scheduler.py                        # 모든 가구, 어제까지 (cron 으로 매일 새벽에 실행)
+#   python scheduler.py --dry-run              # 반영하지 않고 계획만 출력
+#   python scheduler.py --household <가구 id> --until 2024-05-01
+
+LOCAL_TIMEZONE = ZoneInfo('Asia/Seoul')
+MAX_CATCHUP_DAYS = 14
+RESCAN_DAYS = 3
+MAX_HOUSEHOLDS = 1000
+
+WEEKDAY_LABELS = {1: '월', 2: '화', 3: '수', 4: '목', 5: '금', 6: '토', 7: '일'}
+
+
+@dataclass
+class Plan:
+    days: list[date]  # 새로 처리하는 날짜 (정기 지급)
+    check_days: list[date] = field(default_factory=list)  # 체크리스트를 훑는 날짜 (days 포함)
+    grants: list[dict] = field(default_factory=list)
+    deductions: list[dict] = field(default_factory=list)
+    applied: int = 0  # 이미 반영되어 있어 계획에서 뺀 항목
+
+    @property
+    def entries(self) -> list[dict]:
+        return self.grants + self.deductions
+
+
+@dataclass
+class RunResult:
+    household_id: str
+    days: list[date]
+    granted: int = 0
+    deducted: int = 0
+    skipped: int = 0  # 이미 반영되어 있던 항목
+
+
+def today() -> date:
+    return datetime.now(LOCAL_TIMEZONE).date()
+
+
+def yesterday() -> date:
+    return today() - timedelta(days=1)
+
+
+def _days_between(start: date, until: date) -> list[date]:
+    return [start + timedelta(days=n) for n in range((until - start).days + 1)]
+
+
+# 처리할 날짜들: 마지막으로 처리한 날짜의 다음 날 ~ until
+def pending_days(last_day: Optional[str], until: date) -> list[date]:
+    start = until if last_day is None else date.fromisoformat(last_day) + timedelta(days=1)
+    start = max(start, until - timedelta(days=MAX_CATCHUP_DAYS - 1))
+    return _days_between(start, until)
+
+
+# 체크리스트를 훑을 날짜들: 처리할 날짜들과 최근 RESCAN_DAYS 일 (first_day 이전은 빼고)
+def check_days(first_day: Optional[str], days: list[date], until: date) -> list[date]:
+    if first_day is None:
+        return days
+    start = max(until - timedelta(days=RESCAN_DAYS - 1), date.fromisoformat(first_day))
+    return _days_between(min([start, *days[:1]]), until)
+
+
+def grant_entry(schedule: RecurringMission, mission: Mission, user_id: str, day: date) -> dict:
+    return {
+        'user_id': user_id,
+        'delta': mission['points_reward'],
+        'kind': 'mission',
+        'mission_id': mission['id'],
+        'idempotency_key': f"recurring:{schedule['id']}:{user_id}:{day}",
+        'notes': f"[정기 지급] {mission['title']} - {day} (+{mission['points_reward']} BP)",
+    }
+
+
+def recurring_grants(schedules: list[RecurringMission], missions: list[Mission], profiles: list[Profile],
+                     days: list[date]) -> list[dict]:
+    missions_by_id = {mission['id']: mission for mission in missions if mission.get('is_active', True)}
+    children = [profile['id'] for profile in profiles if profile.get('is_child', True)]
+    entries = []
+    for schedule in schedules:
+        mission = missions_by_id.get(schedule['mission_id'])
+        if mission is None:
+            continue
+        user_ids = children if schedule.get('user_id') is None else [schedule['user_id']]
+        weekdays = set(schedule['weekdays'])
+        starts_on = date.fromisoformat(schedule['starts_on'])
+        for day in days:
+            if day >= starts_on and day.isoweekday() in weekdays:
+                entries += [grant_entry(schedule, mission, user_id, day) for user_id in user_ids]
+    return entries
+
+
+def checklist_deductions(rows: list[DailyCheck]) -> list[dict]:
+    return [entry for entry in map(checklist.deduction_entry, rows) if entry is not None]
+
+
+# 지금 가구(tenancy)의 처리 계획. 서버에는 아무것도 쓰지 않습니다.
+def plan(until: Optional[date] = None) -> Plan:
+    until = until or yesterday()
+    state = db.scheduler_state() or {}
+    days = pending_days(state.get('last_day'), until)
+    scan = check_days(state.get('first_day'), days, until)
+    if not scan:
+        return Plan(days)
+    results, errors = db.fetch_parallel({
+        'schedules': db.list_recurring_missions,
+        'missions': lambda: db.list_missions(columns='id, title, points_reward, is_active'),
+        'profiles': db.list_profiles,
+        'checks': lambda: db.list_daily_checks(str(scan[0]), str(scan[-1])),
+    })
+    if errors:
+        raise next(iter(errors.values()))
+    grants = recurring_grants(results['schedules'], results['missions'], results['profiles'], days)
+    deductions = checklist_deductions(results['checks'])
+    applied = db.applied_mission_keys([entry['idempotency_key'] for entry in grants + deductions])
+    return Plan(
+        days,
+        check_days=scan,
+        grants=[entry for entry in grants if entry['idempotency_key'] not in applied],
+        deductions=[entry for entry in deductions if entry['idempotency_key'] not in applied],
+        applied=len(applied),
+    )
+
+
+# 화면용: 지금 가구의 until 까지의 계획을 LOG_TTL 동안 캐시합니다.
+# 포인트 변경, 체크리스트 저장, 정기 지급 추가/중지, 실행 기록 때 지워집니다. (db.py)
+@cache.cached('scheduler_plan', ttl=db.LOG_TTL)
+def cached_plan(until: date) -> Plan:
+    return plan(until)
+
+
+# 지금 가구의 계획을 한 번의 요청으로 반영하고, 처리한 마지막 날짜를 기록합니다.
+# 반영 뒤 기록 전에 멈춰도, 다음 실행이 같은 날짜를 다시 처리하면서 중복 방지 키로 걸러집니다.
+def run(until: Optional[date] = None) -> RunResult:
+    household_id = tenancy.require()
+    todo = plan(until)
+    result = RunResult(household_id, todo.days, skipped=todo.applied)
+    if not todo.days and not todo.entries:
+        return result
+    grant_keys = {entry['idempotency_key'] for entry in todo.grants}
+    for applied in db.apply_point_deltas(todo.entries):
+        if not applied['applied']:
+            result.skipped += 1
+        elif applied['idempotency_key'] in grant_keys:
+            result.granted += 1
+        else:
+            result.deducted += 1
+    if todo.days:
+        db.record_scheduler_run(str(todo.days[0]), str(todo.days[-1]), result.granted, result.deducted)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="정기 미션 지급과 체크리스트 자동 차감")
+    parser.add_argument('--household', help="이 가구만 처리합니다 (생략하면 모든 가구)")
+    parser.add_argument('--until', type=date.fromisoformat, help="이 날짜까지 처리합니다 (생략하면 어제, YYYY-MM-DD)")
+    parser.add_argument('--dry-run', action='store_true', help="반영하지 않고 처리할 내용만 출력합니다")
+    args = parser.parse_args()
+
+    for household_id in [args.household] if args.household else db.list_household_ids(MAX_HOUSEHOLDS):
+        with tenancy.use(household_id):
+            if args.dry_run:
+                todo = plan(args.until)
+                names = {profile['id']: profile['full_name'] for profile in db.list_profiles()}
+                print(f"{household_id}: " + (f"{todo.check_days[0]} ~ {todo.check_days[-1]}" if todo.entries else "처리할 내용이 없습니다."))
+                for entry in todo.entries:
+                    print(f"    {names.get(entry['user_id'], entry['user_id'])}  {entry['delta']:+5d}  {entry['notes']}")
+                continue
+            result = run(args.until)
+        if not result.days and not result.deducted:
+            print(f"{household_id}: 처리할 내용이 없습니다.")
+        else:
+            print(f"{household_id}: " + (f"{result.days[0]} ~ {result.days[-1]} " if result.days else "늦게 저장한 체크리스트 ") +
+                  f"지급 {result.granted}건, 차감 {result.deducted}건, 이미 반영됨 {result.skipped}건")
+
+
+if __name__ == '__main__':
+    main()
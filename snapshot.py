@@ -0,0 +1,216 @@
+import concurrent.futures
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Optional
+
+import db
+import tenancy
+import tracing
+from db import ChecklistItem, Mission, Profile, Reward
+
+# --- 공유 스냅샷 ---
+# 프로필(잔액 포함)과 미션/보상/체크리스트 항목 목록을 가구마다 하나의 읽기 전용 스냅샷으로 묶어 두고,
+# 모든 페이지와 세션이 같은 스냅샷 객체를 읽습니다. 그래서 어느 화면에서 보든 같은 잔액과 같은 목록이 보이고,
+# 보상 구매도 화면에 보이는 그 잔액으로 확인합니다.
+#
+# 스냅샷은 고쳐 쓰지 않고, 바뀔 때마다 version 이 1 큰 새 객체로 통째로 바꿉니다.
+#   - 포인트 변경(db.apply_point_deltas)과 실시간 변경(change_feed)은 돌려받은 행으로 바로 새 버전을 만듭니다. (조회 없음)
+#   - 구성원이 추가/삭제되는 등 다시 읽어야 할 때는 표시만 해 두고, 백그라운드 로더 하나가 다시 읽습니다.
+#   - 로더는 CATALOG_CHECK_INTERVAL 마다 catalog_versions 로 미션/보상이 바뀌었는지 확인하고,
+#     실시간 구독이 끊겨 있으면 db.profile_ttl() 마다 프로필도 다시 읽습니다.
+# 페이지는 스냅샷이 아직 없는 가구를 처음 읽을 때만 그 자리에서 불러옵니다. (여러 세션이 동시에 처음 읽어도 한 번만 조회)
+# 불러올 때는 db 의 작업 스레드가 아닌 스냅샷 전용 스레드를 씁니다. current() 를 db.fetch_parallel 안에서 불러도
+# 같은 작업 스레드들을 서로 기다리다 막히지 않습니다. (그래도 페이지에서는 fetch_parallel 전에 부르는 편이 낫습니다)
+# IDLE_SECONDS 동안 아무도 읽지 않은 가구의 스냅샷은 로더가 버립니다.
+
+LOADER_INTERVAL = 1
+CATALOG_CHECK_INTERVAL = db.CATALOG_CHECK_TTL
+IDLE_SECONDS = 600
+
+# 스냅샷에 담는 열 (화면마다 필요한 열이 모두 들어 있어야 합니다)
+MISSION_COLUMNS = 'id, title, description, points_reward, is_active'
+REWARD_COLUMNS = 'id, name, description, category, point_cost, is_active'
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    household_id: str
+    version: int
+    profiles: list[Profile]  # 이름순
+    missions: list[Mission]  # 제목순, 비활성 포함
+    rewards: list[Reward]  # 필요 포인트순, 비활성 포함
+    checklist_items: list[ChecklistItem]
+    loaded_at: float  # 마지막으로 다시 읽은 시각 (바뀐 것이 없었어도)
+    checked_at: float  # 로더가 마지막으로 바뀐 것이 있는지 확인한 시각
+
+    def profile(self, user_id: str) -> Optional[Profile]:
+        return next((profile for profile in self.profiles if profile['id'] == user_id), None)
+
+    def active_missions(self) -> list[Mission]:
+        return [mission for mission in self.missions if mission['is_active']]
+
+    def active_rewards(self) -> list[Reward]:
+        return [reward for reward in self.rewards if reward['is_active']]
+
+
+_lock = threading.Lock()
+_snapshots: dict[str, Snapshot] = {}
+_last_read: dict[str, float] = {}
+_stale: set[str] = set()
+_load_locks: dict[str, threading.Lock] = {}
+_wake = threading.Event()
+_loader: Optional[threading.Thread] = None
+_executor = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix='snapshot')
+
+
+# 지금 가구의 최신 스냅샷. 한 번 실행하는 동안에는 처음 받은 스냅샷을 계속 쓰면 됩니다.
+def current() -> Snapshot:
+    household_id = tenancy.require()
+    with _lock:
+        snap = _snapshots.get(household_id)
+        _last_read[household_id] = time.monotonic()
+    tracing.record_cache('snapshot', hit=snap is not None)
+    if snap is None:
+        snap = _load(household_id)
+    _start_loader()
+    return snap
+
+
+def _fetch(household_id: str) -> dict:
+    with tenancy.use(household_id):
+        results, errors = db.fetch_parallel({
+            'profiles': db.list_profiles,
+            'missions': lambda: db.list_missions(columns=MISSION_COLUMNS),
+            'rewards': lambda: db.list_rewards(columns=REWARD_COLUMNS, active_only=False),
+            'checklist_items': db.list_checklist_items,
+        }, executor=_executor)
+    if errors:
+        raise next(iter(errors.values()))
+    return results
+
+
+# 같은 가구를 동시에 다시 읽지 않도록 가구마다 하나씩 둡니다.
+def _load_lock(household_id: str) -> threading.Lock:
+    with _lock:
+        return _load_locks.setdefault(household_id, threading.Lock())
+
+
+# 처음 읽는 가구: 같은 가구를 동시에 부르면 먼저 온 쪽만 조회하고 나머지는 그 결과를 씁니다.
+def _load(household_id: str) -> Snapshot:
+    with _load_lock(household_id):
+        with _lock:
+            snap = _snapshots.get(household_id)
+        if snap is None:
+            snap = _refresh(household_id)
+        return snap
+
+
+# 새로고침 버튼용: 지금 가구의 스냅샷을 로더를 기다리지 않고 바로 다시 읽습니다.
+def refresh() -> Snapshot:
+    household_id = tenancy.require()
+    with _load_lock(household_id):
+        _refresh(household_id)
+    return current()
+
+
+# 다시 읽어서, 내용이 바뀌었으면 새 버전으로 바꿉니다.
+# 읽는 동안 포인트 변경 등으로 새 버전이 생겼으면 읽은 결과를 버리고 다음 차례에 다시 읽습니다.
+def _refresh(household_id: str) -> Snapshot:
+    with _lock:
+        before = _snapshots.get(household_id)
+        _stale.discard(household_id)
+    results = _fetch(household_id)
+    now = time.monotonic()
+    with _lock:
+        snap = _snapshots.get(household_id)
+        if snap is not before:
+            _stale.add(household_id)
+            return snap
+        if snap is not None and all(getattr(snap, name) == value for name, value in results.items()):
+            snap = replace(snap, loaded_at=now, checked_at=now)
+        else:
+            snap = Snapshot(household_id, (snap.version if snap else 0) + 1, loaded_at=now, checked_at=now, **results)
+        _snapshots[household_id] = snap
+        return snap
+
+
+def _publish(household_id: Optional[str], change) -> None:
+    with _lock:
+        snap = _snapshots.get(household_id)
+        if snap is not None:
+            _snapshots[household_id] = replace(snap, version=snap.version + 1, **change(snap))
+
+
+# 바뀐 프로필 행들(id 와 바뀐 열)을 지금 가구의 스냅샷에 반영합니다. 스냅샷에 없는 사람이면 다시 읽습니다.
+def update_profiles(rows: list[dict]) -> None:
+    household_id = tenancy.current()
+    changes = {row['id']: row for row in rows}
+    with _lock:
+        snap = _snapshots.get(household_id)
+    if snap is None:
+        return
+    if not changes.keys() <= {profile['id'] for profile in snap.profiles}:
+        invalidate()
+        return
+    _publish(household_id, lambda snap: {'profiles': sorted(
+        ({**profile, **changes[profile['id']]} if profile['id'] in changes else profile for profile in snap.profiles),
+        key=lambda profile: profile['full_name'],
+    )})
+
+
+# 포인트 변경 결과의 잔액 {user_id: current_points} 를 반영합니다.
+def update_balances(balances: dict[str, int]) -> None:
+    update_profiles([{'id': user_id, 'current_points': points} for user_id, points in balances.items()])
+
+
+# 지금 가구(all_households 면 모든 가구)의 스냅샷을 로더가 다시 읽도록 표시합니다.
+# 다시 읽기 전까지는 지금 스냅샷을 그대로 씁니다.
+def invalidate(all_households: bool = False) -> None:
+    with _lock:
+        if all_households or tenancy.current() is None:
+            _stale.update(_snapshots)
+        elif tenancy.current() in _snapshots:
+            _stale.add(tenancy.current())
+    _wake.set()
+
+
+def clear() -> None:
+    with _lock:
+        _snapshots.clear()
+        _stale.clear()
+
+
+def _due(snap: Snapshot, now: float) -> bool:
+    if now - snap.checked_at >= CATALOG_CHECK_INTERVAL:
+        return True
+    return not db.is_realtime_live() and now - snap.loaded_at >= db.profile_ttl()
+
+
+def _run_loader() -> None:
+    while True:
+        _wake.wait(LOADER_INTERVAL)
+        _wake.clear()
+        now = time.monotonic()
+        with _lock:
+            for household_id in [h for h in _snapshots if now - _last_read.get(h, 0) > IDLE_SECONDS]:
+                del _snapshots[household_id]
+                _stale.discard(household_id)
+            todo = [h for h, snap in _snapshots.items() if h in _stale or _due(snap, now)]
+        for household_id in todo:
+            try:
+                with _load_lock(household_id):
+                    _refresh(household_id)
+            except Exception:
+                # 다음 차례에 다시 시도합니다. 그동안은 지금 스냅샷을 그대로 씁니다.
+                with _lock:
+                    _stale.add(household_id)
+
+
+# 프로세스마다 로더 스레드 하나만 띄웁니다.
+def _start_loader() -> None:
+    global _loader
+    with _lock:
+        if _loader is None:
+            _loader = threading.Thread(target=_run_loader, name='snapshot-loader', daemon=True)
+            _loader.start()
@@ -0,0 +1,53 @@
+-- 포인트 변경을 한 번의 트랜잭션으로 처리하는 함수
+-- 잔액 확인, profiles.current_points 갱신, 로그 기록을 서버에서 원자적으로 수행합니다.
+-- 같은 idempotency_key 로 다시 호출하면 아무것도 바꾸지 않고 현재 잔액만 돌려줍니다. (중복 클릭 방지)
+
+alter table mission_log add column if not exists idempotency_key text;
+create unique index if not exists mission_log_idempotency_key_idx on mission_log (idempotency_key);
+
+alter table redemption_log add column if not exists idempotency_key text;
+create unique index if not exists redemption_log_idempotency_key_idx on redemption_log (idempotency_key);
+
+create or replace function apply_point_delta(
+    p_user_id profiles.id%type,
+    p_delta integer,
+    p_idempotency_key text,
+    p_notes text default null,
+    p_mission_id mission_log.mission_id%type default null,
+    p_reward_id redemption_log.reward_id%type default null
+) returns jsonb
+language plpgsql
+as $$
+declare
+    v_points integer;
+begin
+    -- 같은 키의 동시 요청은 여기서 줄을 세웁니다.
+    perform pg_advisory_xact_lock(hashtext(p_idempotency_key));
+
+    select current_points into v_points from profiles where id = p_user_id for update;
+    if not found then
+        raise exception using errcode = 'P0002', message = 'profile_not_found';
+    end if;
+
+    if exists (select 1 from mission_log where idempotency_key = p_idempotency_key)
+       or exists (select 1 from redemption_log where idempotency_key = p_idempotency_key) then
+        return jsonb_build_object('applied', false, 'current_points', v_points);
+    end if;
+
+    if v_points + p_delta < 0 then
+        raise exception using errcode = 'P0001', message = 'insufficient_points', detail = v_points::text;
+    end if;
+
+    update profiles set current_points = v_points + p_delta where id = p_user_id;
+
+    if p_reward_id is not null then
+        insert into redemption_log (user_id, reward_id, points_spent, idempotency_key)
+        values (p_user_id, p_reward_id, -p_delta, p_idempotency_key);
+    else
+        insert into mission_log (user_id, mission_id, notes, idempotency_key)
+        values (p_user_id, p_mission_id, p_notes, p_idempotency_key);
+    end if;
+
+    return jsonb_build_object('applied', true, 'current_points', v_points + p_delta);
+end;
+$$;
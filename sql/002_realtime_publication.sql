@@ -0,0 +1,4 @@
+-- 실시간 변경 구독(change_feed.py)에 필요한 설정
+-- 아래 테이블의 변경 사항이 Supabase Realtime 으로 전달되도록 publication 에 추가합니다.
+
+alter publication supabase_realtime add table profiles, mission_log, redemption_log;
@@ -0,0 +1,57 @@
+-- 미션 로그와 보상 사용 로그를 하나로 합친 활동 기록을 페이지 단위로 가져오는 함수
+-- (occurred_at, entry_id) 기준 keyset 페이지네이션을 사용하므로
+-- 기록이 아무리 많아도 한 번에 한 페이지만큼만 읽고 전송합니다.
+--   첫 페이지: activity_feed_page(p_user_id => ...)
+--   다음 페이지: 이전 페이지 마지막 행의 occurred_at, entry_id 를 p_before_at, p_before_id 로 넘깁니다.
+
+create index if not exists mission_log_created_at_idx on mission_log (created_at desc);
+create index if not exists mission_log_user_created_at_idx on mission_log (user_id, created_at desc);
+create index if not exists redemption_log_redeemed_at_idx on redemption_log (redeemed_at desc);
+create index if not exists redemption_log_user_redeemed_at_idx on redemption_log (user_id, redeemed_at desc);
+
+create or replace function activity_feed_page(
+    p_user_id profiles.id%type default null,
+    p_before_at timestamptz default null,
+    p_before_id text default null,
+    p_limit integer default 50
+) returns table (
+    entry_id text,
+    kind text,
+    user_id profiles.id%type,
+    occurred_at timestamptz,
+    notes mission_log.notes%type,
+    points_spent redemption_log.points_spent%type,
+    reward_id redemption_log.reward_id%type
+)
+language sql
+stable
+as $$
+    select feed.*
+    from (
+        -- 각 테이블에서 인덱스를 따라 최대 p_limit 개씩만 읽은 뒤 합칩니다.
+        (
+            select 'mission:' || m.id, 'mission', m.user_id, m.created_at::timestamptz, m.notes, (null::redemption_log).points_spent, (null::redemption_log).reward_id
+            from mission_log m
+            where m.notes is not null
+              and (p_user_id is null or m.user_id = p_user_id)
+              and (p_before_at is null
+                   or m.created_at < p_before_at
+                   or (m.created_at = p_before_at and 'mission:' || m.id < p_before_id))
+            order by m.created_at desc, 'mission:' || m.id desc
+            limit p_limit
+        )
+        union all
+        (
+            select 'redemption:' || r.id, 'redemption', r.user_id, r.redeemed_at::timestamptz, (null::mission_log).notes, r.points_spent, r.reward_id
+            from redemption_log r
+            where (p_user_id is null or r.user_id = p_user_id)
+              and (p_before_at is null
+                   or r.redeemed_at < p_before_at
+                   or (r.redeemed_at = p_before_at and 'redemption:' || r.id < p_before_id))
+            order by r.redeemed_at desc, 'redemption:' || r.id desc
+            limit p_limit
+        )
+    ) as feed (entry_id, kind, user_id, occurred_at, notes, points_spent, reward_id)
+    order by feed.occurred_at desc, feed.entry_id desc
+    limit p_limit;
+$$;
@@ -0,0 +1,57 @@
+-- 활동 기록에 사용자 이름과 보상 이름을 함께 담아 돌려주도록 activity_feed_page 를 다시 정의합니다.
+-- 화면에서 이름을 찾기 위해 profiles, rewards 테이블 전체를 따로 내려받을 필요가 없어집니다.
+-- 반환 컬럼이 바뀌므로 기존 함수를 지우고 다시 만듭니다.
+
+drop function if exists activity_feed_page(uuid, timestamptz, text, integer);
+
+create or replace function activity_feed_page(
+    p_user_id profiles.id%type default null,
+    p_before_at timestamptz default null,
+    p_before_id text default null,
+    p_limit integer default 50
+) returns table (
+    entry_id text,
+    kind text,
+    user_id profiles.id%type,
+    occurred_at timestamptz,
+    notes mission_log.notes%type,
+    points_spent redemption_log.points_spent%type,
+    reward_id redemption_log.reward_id%type,
+    full_name profiles.full_name%type,
+    reward_name rewards.name%type
+)
+language sql
+stable
+as $$
+    select feed.*, p.full_name, rw.name
+    from (
+        -- 각 테이블에서 인덱스를 따라 최대 p_limit 개씩만 읽은 뒤 합칩니다.
+        (
+            select 'mission:' || m.id, 'mission', m.user_id, m.created_at::timestamptz, m.notes, (null::redemption_log).points_spent, (null::redemption_log).reward_id
+            from mission_log m
+            where m.notes is not null
+              and (p_user_id is null or m.user_id = p_user_id)
+              and (p_before_at is null
+                   or m.created_at < p_before_at
+                   or (m.created_at = p_before_at and 'mission:' || m.id < p_before_id))
+            order by m.created_at desc, 'mission:' || m.id desc
+            limit p_limit
+        )
+        union all
+        (
+            select 'redemption:' || r.id, 'redemption', r.user_id, r.redeemed_at::timestamptz, (null::mission_log).notes, r.points_spent, r.reward_id
+            from redemption_log r
+            where (p_user_id is null or r.user_id = p_user_id)
+              and (p_before_at is null
+                   or r.redeemed_at < p_before_at
+                   or (r.redeemed_at = p_before_at and 'redemption:' || r.id < p_before_id))
+            order by r.redeemed_at desc, 'redemption:' || r.id desc
+            limit p_limit
+        )
+    ) as feed (entry_id, kind, user_id, occurred_at, notes, points_spent, reward_id)
+    -- 이름은 잘라낸 한 페이지 분량의 행에 대해서만 붙입니다.
+    left join profiles p on p.id = feed.user_id
+    left join rewards rw on rw.id = feed.reward_id
+    order by feed.occurred_at desc, feed.entry_id desc
+    limit p_limit;
+$$;
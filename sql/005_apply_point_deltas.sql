@@ -0,0 +1,53 @@
+-- 여러 건의 포인트 변경을 한 번의 요청, 한 번의 트랜잭션으로 처리하는 함수
+-- p_entries 는 아래 형태의 JSON 배열입니다.
+--   [{"user_id": ..., "delta": -15, "idempotency_key": "checklist:<user_id>:2024-05-01",
+--     "notes": "...", "mission_id": null, "reward_id": null, "floor_at_zero": true}, ...]
+-- 각 항목은 apply_point_delta 와 같은 규칙으로 처리되며, 하나라도 실패하면 전체가 취소됩니다.
+-- floor_at_zero 가 true 인 차감은 잔액보다 많이 빼지 않고 0 에서 멈춥니다. (체크리스트 자동 차감용)
+
+create or replace function apply_point_deltas(p_entries jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_entry jsonb;
+    v_user_id profiles.id%type;
+    v_mission_id mission_log.mission_id%type;
+    v_reward_id redemption_log.reward_id%type;
+    v_delta integer;
+    v_notes text;
+    v_points integer;
+    v_results jsonb := '[]'::jsonb;
+begin
+    for v_entry in select * from jsonb_array_elements(p_entries)
+    loop
+        v_user_id := v_entry->>'user_id';
+        v_mission_id := v_entry->>'mission_id';
+        v_reward_id := v_entry->>'reward_id';
+        v_delta := (v_entry->>'delta')::integer;
+        v_notes := v_entry->>'notes';
+
+        if coalesce((v_entry->>'floor_at_zero')::boolean, false) and v_delta < 0 then
+            select current_points into v_points from profiles
+            where id = v_user_id for update;
+            if v_points + v_delta < 0 then
+                v_delta := -greatest(v_points, 0);
+                v_notes := v_notes || format(' (잔액 부족으로 %s BP만 차감)', -v_delta);
+            end if;
+        end if;
+
+        v_results := v_results || jsonb_build_array(
+            apply_point_delta(
+                v_user_id,
+                v_delta,
+                v_entry->>'idempotency_key',
+                v_notes,
+                v_mission_id,
+                v_reward_id
+            ) || jsonb_build_object('user_id', v_entry->>'user_id', 'idempotency_key', v_entry->>'idempotency_key')
+        );
+    end loop;
+
+    return v_results;
+end;
+$$;
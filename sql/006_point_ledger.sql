@@ -0,0 +1,206 @@
+-- 포인트 원장(point_ledger)과 잔액 스냅샷
+-- 로그의 notes 문자열("[지급] ... (+5 BP)")을 해석하지 않아도 잔액을 다시 계산하고 검증할 수 있도록
+-- 모든 포인트 변경을 숫자 변화량, 종류, 미션/보상 FK, 시각과 함께 추가 전용 원장에 남깁니다.
+-- 각 행에는 변경 직후 잔액(balance_after)이 함께 저장되므로
+-- "X 시점의 잔액"은 (user_id, occurred_at) 인덱스를 한 번 찾는 것으로(O(log n)) 구할 수 있습니다.
+
+create table if not exists point_ledger (
+    id bigserial primary key,
+    user_id uuid not null references profiles (id),
+    delta integer not null,
+    kind text not null check (kind in ('opening', 'mission', 'manual', 'redemption', 'checklist', 'adjustment')),
+    mission_id bigint references missions (id),
+    reward_id bigint references rewards (id),
+    balance_after integer not null,
+    notes text,
+    idempotency_key text unique,
+    occurred_at timestamptz not null default now()
+);
+
+create index if not exists point_ledger_user_occurred_at_idx on point_ledger (user_id, occurred_at desc, id desc);
+
+-- 정기 스냅샷: 원장 잔액과 profiles.current_points 를 함께 기록해 둡니다. (차이 이력 확인용)
+create table if not exists point_balance_snapshots (
+    user_id uuid not null references profiles (id),
+    as_of timestamptz not null,
+    ledger_balance integer not null,
+    current_points integer not null,
+    last_ledger_id bigint references point_ledger (id),
+    primary key (user_id, as_of)
+);
+
+-- 원장이 생기기 전의 기록은 notes 문자열만 있어 정확히 되살릴 수 없으므로,
+-- 지금 잔액을 'opening' 행으로 남기고 그 뒤부터 모든 변경을 원장에 쌓습니다.
+insert into point_ledger (user_id, delta, kind, balance_after, notes)
+select p.id, p.current_points, 'opening', p.current_points, '원장 시작 잔액'
+from profiles p
+where not exists (select 1 from point_ledger l where l.user_id = p.id);
+
+-- apply_point_delta / apply_point_deltas 가 원장에도 기록하도록 다시 정의합니다.
+-- p_kind 를 주지 않으면 보상이면 'redemption', 미션이면 'mission', 그 외에는 'manual' 로 기록합니다.
+drop function if exists apply_point_delta(uuid, integer, text, text, bigint, bigint);
+
+create or replace function apply_point_delta(
+    p_user_id profiles.id%type,
+    p_delta integer,
+    p_idempotency_key text,
+    p_notes text default null,
+    p_mission_id mission_log.mission_id%type default null,
+    p_reward_id redemption_log.reward_id%type default null,
+    p_kind text default null
+) returns jsonb
+language plpgsql
+as $$
+declare
+    v_points integer;
+begin
+    -- 같은 키의 동시 요청은 여기서 줄을 세웁니다.
+    perform pg_advisory_xact_lock(hashtext(p_idempotency_key));
+
+    select current_points into v_points from profiles where id = p_user_id for update;
+    if not found then
+        raise exception using errcode = 'P0002', message = 'profile_not_found';
+    end if;
+
+    if exists (select 1 from point_ledger where idempotency_key = p_idempotency_key)
+       or exists (select 1 from mission_log where idempotency_key = p_idempotency_key)
+       or exists (select 1 from redemption_log where idempotency_key = p_idempotency_key) then
+        return jsonb_build_object('applied', false, 'current_points', v_points);
+    end if;
+
+    if v_points + p_delta < 0 then
+        raise exception using errcode = 'P0001', message = 'insufficient_points', detail = v_points::text;
+    end if;
+
+    update profiles set current_points = v_points + p_delta where id = p_user_id;
+
+    if p_reward_id is not null then
+        insert into redemption_log (user_id, reward_id, points_spent, idempotency_key)
+        values (p_user_id, p_reward_id, -p_delta, p_idempotency_key);
+    else
+        insert into mission_log (user_id, mission_id, notes, idempotency_key)
+        values (p_user_id, p_mission_id, p_notes, p_idempotency_key);
+    end if;
+
+    insert into point_ledger (user_id, delta, kind, mission_id, reward_id, balance_after, notes, idempotency_key)
+    values (
+        p_user_id, p_delta,
+        coalesce(p_kind, case when p_reward_id is not null then 'redemption'
+                              when p_mission_id is not null then 'mission'
+                              else 'manual' end),
+        p_mission_id, p_reward_id, v_points + p_delta, p_notes, p_idempotency_key
+    );
+
+    return jsonb_build_object('applied', true, 'current_points', v_points + p_delta);
+end;
+$$;
+
+create or replace function apply_point_deltas(p_entries jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_entry jsonb;
+    v_user_id profiles.id%type;
+    v_mission_id mission_log.mission_id%type;
+    v_reward_id redemption_log.reward_id%type;
+    v_delta integer;
+    v_notes text;
+    v_points integer;
+    v_results jsonb := '[]'::jsonb;
+begin
+    for v_entry in select * from jsonb_array_elements(p_entries)
+    loop
+        v_user_id := v_entry->>'user_id';
+        v_mission_id := v_entry->>'mission_id';
+        v_reward_id := v_entry->>'reward_id';
+        v_delta := (v_entry->>'delta')::integer;
+        v_notes := v_entry->>'notes';
+
+        if coalesce((v_entry->>'floor_at_zero')::boolean, false) and v_delta < 0 then
+            select current_points into v_points from profiles
+            where id = v_user_id for update;
+            if v_points + v_delta < 0 then
+                v_delta := -greatest(v_points, 0);
+                v_notes := v_notes || format(' (잔액 부족으로 %s BP만 차감)', -v_delta);
+            end if;
+        end if;
+
+        v_results := v_results || jsonb_build_array(
+            apply_point_delta(
+                v_user_id,
+                v_delta,
+                v_entry->>'idempotency_key',
+                v_notes,
+                v_mission_id,
+                v_reward_id,
+                v_entry->>'kind'
+            ) || jsonb_build_object('user_id', v_entry->>'user_id', 'idempotency_key', v_entry->>'idempotency_key')
+        );
+    end loop;
+
+    return v_results;
+end;
+$$;
+
+-- X 시점의 잔액: 그 시점 이전의 마지막 원장 행의 balance_after (원장 시작 전이면 null)
+create or replace function point_balance_as_of(p_user_id profiles.id%type, p_as_of timestamptz)
+returns integer
+language sql
+stable
+as $$
+    select balance_after
+    from point_ledger
+    where user_id = p_user_id and occurred_at <= p_as_of
+    order by occurred_at desc, id desc
+    limit 1;
+$$;
+
+-- 원장의 최신 잔액과 profiles.current_points 비교 (사람마다 인덱스 한 번씩만 찾습니다)
+create or replace function point_ledger_drift()
+returns table (
+    user_id profiles.id%type,
+    full_name profiles.full_name%type,
+    current_points integer,
+    ledger_balance integer,
+    drift integer
+)
+language sql
+stable
+as $$
+    select p.id, p.full_name, p.current_points, l.balance_after, p.current_points - l.balance_after
+    from profiles p
+    left join lateral (
+        select balance_after
+        from point_ledger
+        where point_ledger.user_id = p.id
+        order by occurred_at desc, id desc
+        limit 1
+    ) l on true
+    order by p.full_name;
+$$;
+
+-- 정기 스냅샷 기록. pg_cron 을 쓰는 경우 예:
+--   select cron.schedule('point-balance-snapshots', '5 0 * * *', 'select snapshot_point_balances()');
+create or replace function snapshot_point_balances()
+returns integer
+language sql
+as $$
+    with latest as (
+        select p.id as user_id, p.current_points, l.id as ledger_id, l.balance_after
+        from profiles p
+        join lateral (
+            select id, balance_after
+            from point_ledger
+            where point_ledger.user_id = p.id
+            order by occurred_at desc, id desc
+            limit 1
+        ) l on true
+    ), inserted as (
+        insert into point_balance_snapshots (user_id, as_of, ledger_balance, current_points, last_ledger_id)
+        select user_id, now(), balance_after, current_points, ledger_id from latest
+        on conflict do nothing
+        returning 1
+    )
+    select count(*)::integer from inserted;
+$$;
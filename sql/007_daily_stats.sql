@@ -0,0 +1,118 @@
+-- 통계 화면용 일별 집계 테이블
+-- 원장(point_ledger)과 daily_checks 에 행이 들어올 때마다 트리거로 그날의 합계를 갱신합니다.
+-- 통계 화면은 원본 기록 대신 이 테이블에서 기간만큼의 행(사람 수 x 일수)만 읽으므로
+-- 기록이 몇 년치 쌓여도 읽는 양이 늘어나지 않습니다.
+-- 날짜는 한국 시간(Asia/Seoul) 기준입니다.
+
+create table if not exists daily_stats (
+    user_id uuid not null references profiles (id),
+    day date not null,
+    earned integer not null default 0,      -- 지급된 포인트 합계
+    spent integer not null default 0,       -- 보상 구매에 쓴 포인트 합계
+    deducted integer not null default 0,    -- 차감된 포인트 합계 (수동 차감, 체크리스트)
+    checklist_score integer,                -- 그날의 체크리스트 점수
+    violated_items text[] not null default '{}',
+    primary key (user_id, day)
+);
+
+create or replace function rollup_point_ledger()
+returns trigger
+language plpgsql
+as $$
+begin
+    if new.kind <> 'opening' then
+        insert into daily_stats (user_id, day, earned, spent, deducted)
+        values (
+            new.user_id,
+            (new.occurred_at at time zone 'Asia/Seoul')::date,
+            greatest(new.delta, 0),
+            case when new.kind = 'redemption' then greatest(-new.delta, 0) else 0 end,
+            case when new.kind <> 'redemption' then greatest(-new.delta, 0) else 0 end
+        )
+        on conflict (user_id, day) do update set
+            earned = daily_stats.earned + excluded.earned,
+            spent = daily_stats.spent + excluded.spent,
+            deducted = daily_stats.deducted + excluded.deducted;
+    end if;
+    return new;
+end;
+$$;
+
+drop trigger if exists point_ledger_rollup on point_ledger;
+create trigger point_ledger_rollup
+    after insert on point_ledger
+    for each row execute function rollup_point_ledger();
+
+create or replace function rollup_daily_checks()
+returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op = 'DELETE' then
+        update daily_stats set checklist_score = null, violated_items = '{}'
+        where user_id = old.user_id and day = old.check_date;
+        return old;
+    end if;
+
+    insert into daily_stats (user_id, day, checklist_score, violated_items)
+    values (new.user_id, new.check_date, new.daily_score, coalesce(new.violated_items, '{}'))
+    on conflict (user_id, day) do update set
+        checklist_score = excluded.checklist_score,
+        violated_items = excluded.violated_items;
+    return new;
+end;
+$$;
+
+drop trigger if exists daily_checks_rollup on daily_checks;
+create trigger daily_checks_rollup
+    after insert or update or delete on daily_checks
+    for each row execute function rollup_daily_checks();
+
+-- --- 기존 기록 채우기 ---
+-- 원장 이후의 포인트 변경
+insert into daily_stats (user_id, day, earned, spent, deducted)
+select user_id,
+       (occurred_at at time zone 'Asia/Seoul')::date,
+       sum(greatest(delta, 0)),
+       sum(case when kind = 'redemption' then greatest(-delta, 0) else 0 end),
+       sum(case when kind <> 'redemption' then greatest(-delta, 0) else 0 end)
+from point_ledger
+where kind <> 'opening'
+group by 1, 2
+on conflict (user_id, day) do update set
+    earned = excluded.earned, spent = excluded.spent, deducted = excluded.deducted;
+
+-- 원장 이전의 기록: 보상 사용은 points_spent 로, 지급/차감은 notes 끝의 "(+5 BP)" / "(-3 BP)" 로 계산합니다.
+with opening as (
+    select user_id, min(occurred_at) as started_at from point_ledger where kind = 'opening' group by user_id
+), old_changes as (
+    select m.user_id, m.created_at as occurred_at,
+           substring(m.notes from '\(([+-]\d+) BP\)\s*$')::integer as delta, false as is_redemption
+    from mission_log m join opening o on o.user_id = m.user_id
+    where m.created_at < o.started_at
+    union all
+    select r.user_id, r.redeemed_at, -r.points_spent, true
+    from redemption_log r join opening o on o.user_id = r.user_id
+    where r.redeemed_at < o.started_at
+)
+insert into daily_stats (user_id, day, earned, spent, deducted)
+select user_id,
+       (occurred_at at time zone 'Asia/Seoul')::date,
+       sum(greatest(delta, 0)),
+       sum(case when is_redemption then -delta else 0 end),
+       sum(case when not is_redemption then greatest(-delta, 0) else 0 end)
+from old_changes
+where delta is not null
+group by 1, 2
+on conflict (user_id, day) do update set
+    earned = daily_stats.earned + excluded.earned,
+    spent = daily_stats.spent + excluded.spent,
+    deducted = daily_stats.deducted + excluded.deducted;
+
+-- 체크리스트 점수
+insert into daily_stats (user_id, day, checklist_score, violated_items)
+select user_id, check_date, daily_score, coalesce(violated_items, '{}')
+from daily_checks
+on conflict (user_id, day) do update set
+    checklist_score = excluded.checklist_score,
+    violated_items = excluded.violated_items;
@@ -0,0 +1,23 @@
+-- 백업 파일 가져오기 (backup.py)
+-- 기록을 원래 id 그대로 넣으면 id 를 만드는 시퀀스가 따라 올라가지 않아
+-- 다음에 새로 쓰는 기록과 id 가 겹칩니다. 가져오기가 끝나면 이 함수로 시퀀스를 최대 id 에 맞춥니다.
+
+create or replace function sync_log_id_sequences()
+returns void
+language plpgsql
+as $$
+declare
+    v_table text;
+    v_sequence text;
+begin
+    foreach v_table in array array['mission_log', 'redemption_log', 'daily_checks'] loop
+        v_sequence := pg_get_serial_sequence(v_table, 'id');
+        if v_sequence is not null then
+            execute format(
+                'select setval(%L, coalesce((select max(id) from %I), 0) + 1, false)',
+                v_sequence, v_table
+            );
+        end if;
+    end loop;
+end;
+$$;
@@ -0,0 +1,36 @@
+-- 미션/보상 목록 재검증 (db.catalog_versions)
+-- 앱은 미션과 보상 목록을 오래 캐시해 두고, 짧은 주기로 이 함수만 불러서 바뀐 것이 있는지 확인합니다.
+-- version 은 (가장 최근 수정 시각 / 행 수) 이므로 추가, 수정, 삭제 중 어느 것이 있어도 달라집니다.
+
+alter table missions add column if not exists updated_at timestamptz not null default now();
+alter table rewards add column if not exists updated_at timestamptz not null default now();
+
+create or replace function touch_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.updated_at := now();
+    return new;
+end;
+$$;
+
+drop trigger if exists missions_touch_updated_at on missions;
+create trigger missions_touch_updated_at
+    before update on missions
+    for each row execute function touch_updated_at();
+
+drop trigger if exists rewards_touch_updated_at on rewards;
+create trigger rewards_touch_updated_at
+    before update on rewards
+    for each row execute function touch_updated_at();
+
+create or replace function catalog_versions()
+returns table (table_name text, version text)
+language sql
+stable
+as $$
+    select 'missions', coalesce(max(updated_at)::text, '') || '/' || count(*) from missions
+    union all
+    select 'rewards', coalesce(max(updated_at)::text, '') || '/' || count(*) from rewards;
+$$;
@@ -0,0 +1,168 @@
+-- 여러 가구(household)를 한 배포에서 함께 운영하기 위한 설정
+-- 모든 테이블에 household_id 를 두고, 앱의 모든 조회는 가구 단위로 걸러서 읽습니다.
+-- 인덱스가 모두 household_id 로 시작하므로 한 가구를 읽을 때 다른 가구의 행은 건드리지 않습니다.
+--
+-- 기록 테이블(mission_log, redemption_log, point_ledger, daily_checks, daily_stats)은 household_id 를 넘기지 않으면
+-- 그 사람의 프로필에서 채워 넣으므로, 기존 RPC 와 트리거는 그대로 동작합니다.
+-- 기존 데이터는 모두 '우리 가족' 가구 하나로 옮깁니다.
+
+create table if not exists households (
+    id uuid primary key default gen_random_uuid(),
+    name text not null,
+    created_at timestamptz not null default now()
+);
+
+insert into households (name)
+select '우리 가족'
+where not exists (select 1 from households);
+
+do $$
+declare
+    v_table text;
+    v_default households.id%type;
+begin
+    select id into v_default from households order by created_at limit 1;
+    foreach v_table in array array[
+        'profiles', 'missions', 'rewards', 'checklist_items',
+        'mission_log', 'redemption_log', 'daily_checks',
+        'point_ledger', 'point_balance_snapshots', 'daily_stats'
+    ] loop
+        execute format('alter table %I add column if not exists household_id uuid references households (id)', v_table);
+        execute format('update %I set household_id = %L where household_id is null', v_table, v_default);
+        execute format('alter table %I alter column household_id set not null', v_table);
+    end loop;
+end;
+$$;
+
+create index if not exists profiles_household_name_idx on profiles (household_id, full_name);
+create index if not exists missions_household_title_idx on missions (household_id, title);
+create index if not exists rewards_household_cost_idx on rewards (household_id, point_cost);
+create index if not exists checklist_items_household_idx on checklist_items (household_id) where is_active;
+create index if not exists mission_log_household_created_at_idx on mission_log (household_id, created_at desc);
+create index if not exists redemption_log_household_redeemed_at_idx on redemption_log (household_id, redeemed_at desc);
+create index if not exists daily_checks_household_date_idx on daily_checks (household_id, check_date);
+create index if not exists daily_stats_household_day_idx on daily_stats (household_id, day);
+
+-- household_id 가 비어 있으면 user_id 의 프로필에서 채웁니다.
+create or replace function set_household_from_profile()
+returns trigger
+language plpgsql
+as $$
+begin
+    if new.household_id is null then
+        select household_id into new.household_id from profiles where id = new.user_id;
+    end if;
+    return new;
+end;
+$$;
+
+do $$
+declare
+    v_table text;
+begin
+    foreach v_table in array array[
+        'mission_log', 'redemption_log', 'daily_checks', 'point_ledger', 'point_balance_snapshots', 'daily_stats'
+    ] loop
+        execute format('drop trigger if exists %I on %I', v_table || '_set_household', v_table);
+        execute format(
+            'create trigger %I before insert on %I for each row execute function set_household_from_profile()',
+            v_table || '_set_household', v_table
+        );
+    end loop;
+end;
+$$;
+
+-- --- 가구 단위로 바뀌는 함수들 ---
+
+drop function if exists activity_feed_page(uuid, timestamptz, text, integer);
+
+create or replace function activity_feed_page(
+    p_household_id households.id%type,
+    p_user_id profiles.id%type default null,
+    p_before_at timestamptz default null,
+    p_before_id text default null,
+    p_limit integer default 50
+) returns table (
+    entry_id text,
+    kind text,
+    user_id profiles.id%type,
+    occurred_at timestamptz,
+    notes mission_log.notes%type,
+    points_spent redemption_log.points_spent%type,
+    reward_id redemption_log.reward_id%type,
+    full_name profiles.full_name%type,
+    reward_name rewards.name%type
+)
+language sql
+stable
+as $$
+    select feed.*, p.full_name, rw.name
+    from (
+        (
+            select 'mission:' || m.id, 'mission', m.user_id, m.created_at::timestamptz, m.notes, (null::redemption_log).points_spent, (null::redemption_log).reward_id
+            from mission_log m
+            where m.household_id = p_household_id
+              and m.notes is not null
+              and (p_user_id is null or m.user_id = p_user_id)
+              and (p_before_at is null
+                   or m.created_at < p_before_at
+                   or (m.created_at = p_before_at and 'mission:' || m.id < p_before_id))
+            order by m.created_at desc, 'mission:' || m.id desc
+            limit p_limit
+        )
+        union all
+        (
+            select 'redemption:' || r.id, 'redemption', r.user_id, r.redeemed_at::timestamptz, (null::mission_log).notes, r.points_spent, r.reward_id
+            from redemption_log r
+            where r.household_id = p_household_id
+              and (p_user_id is null or r.user_id = p_user_id)
+              and (p_before_at is null
+                   or r.redeemed_at < p_before_at
+                   or (r.redeemed_at = p_before_at and 'redemption:' || r.id < p_before_id))
+            order by r.redeemed_at desc, 'redemption:' || r.id desc
+            limit p_limit
+        )
+    ) as feed (entry_id, kind, user_id, occurred_at, notes, points_spent, reward_id)
+    left join profiles p on p.id = feed.user_id
+    left join rewards rw on rw.id = feed.reward_id
+    order by feed.occurred_at desc, feed.entry_id desc
+    limit p_limit;
+$$;
+
+drop function if exists point_ledger_drift();
+
+create or replace function point_ledger_drift(p_household_id households.id%type)
+returns table (
+    user_id profiles.id%type,
+    full_name profiles.full_name%type,
+    current_points integer,
+    ledger_balance integer,
+    drift integer
+)
+language sql
+stable
+as $$
+    select p.id, p.full_name, p.current_points, l.balance_after, p.current_points - l.balance_after
+    from profiles p
+    left join lateral (
+        select balance_after
+        from point_ledger
+        where point_ledger.user_id = p.id
+        order by occurred_at desc, id desc
+        limit 1
+    ) l on true
+    where p.household_id = p_household_id
+    order by p.full_name;
+$$;
+
+drop function if exists catalog_versions();
+
+create or replace function catalog_versions(p_household_id households.id%type)
+returns table (table_name text, version text)
+language sql
+stable
+as $$
+    select 'missions', coalesce(max(updated_at)::text, '') || '/' || count(*) from missions where household_id = p_household_id
+    union all
+    select 'rewards', coalesce(max(updated_at)::text, '') || '/' || count(*) from rewards where household_id = p_household_id;
+$$;
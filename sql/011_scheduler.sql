@@ -0,0 +1,27 @@
+-- 정기 지급 / 자동 차감 스케줄러 (scheduler.py)
+-- recurring_missions : 정해진 요일마다 미션 포인트를 지급할 아이와 미션 (user_id 가 비어 있으면 가구의 모든 구성원)
+-- scheduler_runs     : 가구마다 마지막으로 처리한 날짜. 다음 실행은 그다음 날부터 처리합니다.
+-- 포인트 변경 자체는 apply_point_deltas 로 반영하고, 중복 방지 키가 (종류, 사용자, 날짜) 로 정해져 있어
+-- 같은 날짜를 여러 번 처리해도 한 번만 반영됩니다.
+
+create table if not exists recurring_missions (
+    id bigint generated by default as identity primary key,
+    household_id uuid not null references households (id),
+    mission_id bigint not null references missions (id) on delete cascade,
+    user_id uuid references profiles (id) on delete cascade,
+    weekdays smallint[] not null default '{1,2,3,4,5,6,7}',  -- ISO 요일 (1 = 월요일, 7 = 일요일)
+    starts_on date not null default (now() at time zone 'Asia/Seoul')::date,
+    is_active boolean not null default true,
+    created_at timestamptz not null default now(),
+    check (weekdays <@ '{1,2,3,4,5,6,7}' and cardinality(weekdays) > 0)
+);
+
+create index if not exists recurring_missions_household_idx on recurring_missions (household_id) where is_active;
+
+create table if not exists scheduler_runs (
+    household_id uuid primary key references households (id),
+    last_day date not null,
+    granted integer not null default 0,
+    deducted integer not null default 0,
+    ran_at timestamptz not null default now()
+);
@@ -0,0 +1,130 @@
+-- 포인트 변경과 잔액 조회도 가구 단위로 확인합니다. (sql/010_households.sql 보완)
+-- 지금까지는 user_id 만 받아서, 다른 가구 사람의 id 를 넘겨도 그대로 반영되거나 조회되었습니다.
+-- 이제 p_household_id 를 함께 받고, 그 가구의 프로필이 아니면 profile_not_found 로 거절합니다.
+-- (errcode P0001: 다시 보내도 소용이 없는 오류로 보고 쓰기 대기열이 재시도하지 않습니다)
+
+drop function if exists apply_point_deltas(jsonb);
+drop function if exists apply_point_delta(uuid, integer, text, text, bigint, bigint, text);
+drop function if exists point_balance_as_of(uuid, timestamptz);
+
+create or replace function apply_point_delta(
+    p_household_id households.id%type,
+    p_user_id profiles.id%type,
+    p_delta integer,
+    p_idempotency_key text,
+    p_notes text default null,
+    p_mission_id mission_log.mission_id%type default null,
+    p_reward_id redemption_log.reward_id%type default null,
+    p_kind text default null
+) returns jsonb
+language plpgsql
+as $$
+declare
+    v_points integer;
+begin
+    -- 같은 키의 동시 요청은 여기서 줄을 세웁니다.
+    perform pg_advisory_xact_lock(hashtext(p_idempotency_key));
+
+    select current_points into v_points from profiles
+    where id = p_user_id and household_id = p_household_id for update;
+    if not found then
+        raise exception using errcode = 'P0001', message = 'profile_not_found', detail = p_user_id::text;
+    end if;
+
+    if exists (select 1 from point_ledger where idempotency_key = p_idempotency_key)
+       or exists (select 1 from mission_log where idempotency_key = p_idempotency_key)
+       or exists (select 1 from redemption_log where idempotency_key = p_idempotency_key) then
+        return jsonb_build_object('applied', false, 'current_points', v_points);
+    end if;
+
+    if v_points + p_delta < 0 then
+        raise exception using errcode = 'P0001', message = 'insufficient_points', detail = v_points::text;
+    end if;
+
+    update profiles set current_points = v_points + p_delta where id = p_user_id;
+
+    if p_reward_id is not null then
+        insert into redemption_log (household_id, user_id, reward_id, points_spent, idempotency_key)
+        values (p_household_id, p_user_id, p_reward_id, -p_delta, p_idempotency_key);
+    else
+        insert into mission_log (household_id, user_id, mission_id, notes, idempotency_key)
+        values (p_household_id, p_user_id, p_mission_id, p_notes, p_idempotency_key);
+    end if;
+
+    insert into point_ledger (household_id, user_id, delta, kind, mission_id, reward_id, balance_after, notes, idempotency_key)
+    values (
+        p_household_id, p_user_id, p_delta,
+        coalesce(p_kind, case when p_reward_id is not null then 'redemption'
+                              when p_mission_id is not null then 'mission'
+                              else 'manual' end),
+        p_mission_id, p_reward_id, v_points + p_delta, p_notes, p_idempotency_key
+    );
+
+    return jsonb_build_object('applied', true, 'current_points', v_points + p_delta);
+end;
+$$;
+
+create or replace function apply_point_deltas(p_entries jsonb, p_household_id households.id%type)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_entry jsonb;
+    v_user_id profiles.id%type;
+    v_mission_id mission_log.mission_id%type;
+    v_reward_id redemption_log.reward_id%type;
+    v_delta integer;
+    v_notes text;
+    v_points integer;
+    v_results jsonb := '[]'::jsonb;
+begin
+    for v_entry in select * from jsonb_array_elements(p_entries)
+    loop
+        v_user_id := v_entry->>'user_id';
+        v_mission_id := v_entry->>'mission_id';
+        v_reward_id := v_entry->>'reward_id';
+        v_delta := (v_entry->>'delta')::integer;
+        v_notes := v_entry->>'notes';
+
+        if coalesce((v_entry->>'floor_at_zero')::boolean, false) and v_delta < 0 then
+            select current_points into v_points from profiles
+            where id = v_user_id and household_id = p_household_id for update;
+            if v_points + v_delta < 0 then
+                v_delta := -greatest(v_points, 0);
+                v_notes := v_notes || format(' (잔액 부족으로 %s BP만 차감)', -v_delta);
+            end if;
+        end if;
+
+        v_results := v_results || jsonb_build_array(
+            apply_point_delta(
+                p_household_id,
+                v_user_id,
+                v_delta,
+                v_entry->>'idempotency_key',
+                v_notes,
+                v_mission_id,
+                v_reward_id,
+                v_entry->>'kind'
+            ) || jsonb_build_object('user_id', v_entry->>'user_id', 'idempotency_key', v_entry->>'idempotency_key')
+        );
+    end loop;
+
+    return v_results;
+end;
+$$;
+
+-- X 시점의 잔액: 그 가구, 그 사람의 그 시점 이전 마지막 원장 행의 balance_after (원장 시작 전이거나 다른 가구 사람이면 null)
+create or replace function point_balance_as_of(
+    p_household_id households.id%type,
+    p_user_id profiles.id%type,
+    p_as_of timestamptz
+) returns integer
+language sql
+stable
+as $$
+    select balance_after
+    from point_ledger
+    where household_id = p_household_id and user_id = p_user_id and occurred_at <= p_as_of
+    order by occurred_at desc, id desc
+    limit 1;
+$$;
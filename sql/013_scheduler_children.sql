@@ -0,0 +1,9 @@
+-- 정기 지급 / 자동 차감 보완 (scheduler.py)
+-- profiles.is_child        : 대상이 비어 있는 정기 지급(recurring_missions.user_id is null)은 가구의 아이들에게만 지급합니다.
+--                            기존 프로필은 모두 아이로 두므로, 부모 프로필은 is_child 를 false 로 바꿔주세요.
+-- scheduler_runs.first_day : 스케줄러가 처음 처리한 날짜. 체크리스트를 최근 며칠 다시 훑을 때 이 날짜 이전은 보지 않습니다.
+
+alter table profiles add column if not exists is_child boolean not null default true;
+
+alter table scheduler_runs add column if not exists first_day date;
+update scheduler_runs set first_day = last_day where first_day is null;
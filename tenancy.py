@@ -0,0 +1,75 @@
+import contextvars
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# --- 가구(household) ---
+# 한 배포에서 여러 가구를 함께 운영합니다. (sql/010_households.sql)
+# 모든 조회는 지금 가구의 행만 읽고, 캐시(cache.py)도 가구마다 따로 둡니다.
+#
+# 지금 가구를 정하는 순서
+#   1. 세션에 이미 정해진 가구 (아이 앱은 로그인할 때 프로필의 가구로 정합니다)
+#   2. 주소의 ?household=<가구 id>
+#   3. HOUSEHOLD_ID 설정
+#   4. 가구가 하나뿐이면 그 가구
+#
+# 화면 스크립트 밖의 스레드(outbox 의 Flusher, 실시간 변경 구독)는 use() 로 가구를 정한 뒤 db 함수를 부릅니다.
+
+SESSION_KEY = 'household_id'
+
+_current: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('household_id', default=None)
+
+
+def current() -> Optional[str]:
+    household_id = _current.get()
+    if household_id is None and get_script_run_ctx() is not None:
+        household_id = st.session_state.get(SESSION_KEY)
+    return household_id
+
+
+def require() -> str:
+    household_id = current()
+    if household_id is None:
+        raise LookupError("가구가 정해지지 않았습니다.")
+    return household_id
+
+
+@contextmanager
+def use(household_id: Optional[str]) -> Iterator[None]:
+    token = _current.set(household_id)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+# 이번 세션의 가구를 정합니다. (아이 앱 로그인 / 로그아웃)
+def set_session(household_id: Optional[str]) -> None:
+    if household_id is None:
+        st.session_state.pop(SESSION_KEY, None)
+    else:
+        st.session_state[SESSION_KEY] = household_id
+
+
+# 화면 밖(명령줄 도구 등)에서도 쓰는 기본 가구: HOUSEHOLD_ID 설정, 없으면 가구가 하나뿐일 때 그 가구
+def default() -> Optional[str]:
+    import db
+
+    return db.get_setting('HOUSEHOLD_ID', '') or db.only_household_id()
+
+
+# 스크립트 맨 위에서 부릅니다. 가구를 정하지 못하면 required 일 때 안내를 보여주고 멈춥니다.
+def start_rerun(required: bool = True) -> Optional[str]:
+    household_id = (
+        st.session_state.get(SESSION_KEY)
+        or st.query_params.get('household')
+        or default()
+    )
+    if household_id:
+        set_session(household_id)
+    elif required:
+        st.error("가구 정보가 없습니다. 가구마다 받은 주소(?household=...)로 접속해주세요.")
+        st.stop()
+    return household_id or None
@@ -0,0 +1,58 @@
+import pytest
+
+import cache
+import change_feed
+import db
+import snapshot
+import tenancy
+from bench import data
+from bench.fake_supabase import FakeSupabase
+
+
+@pytest.fixture
+def feed():
+    fake = FakeSupabase(data.generate(profiles=3, logs=50, days=30))
+    db.use_client(fake)
+    feed = change_feed.start(change_feed.FakeChangeFeed())
+    yield fake, feed
+    change_feed.stop()
+    snapshot.clear()
+    cache.store.clear()
+    db.use_client(None)
+
+
+def test_start_marks_realtime_live(feed):
+    assert db.is_realtime_live()
+    change_feed.stop()
+    assert not db.is_realtime_live()
+
+
+def test_profile_update_is_published_to_the_snapshot(feed):
+    fake, feed = feed
+    household_id = fake.tables['households'][0]['id']
+    with tenancy.use(household_id):
+        before = snapshot.current()
+        profile = before.profiles[0]
+        feed.publish('profiles', 'UPDATE', {**profile, 'household_id': household_id, 'current_points': 12345})
+        after = snapshot.current()
+    assert after.version == before.version + 1
+    assert after.profile(profile['id'])['current_points'] == 12345
+
+
+def test_profile_delete_invalidates_the_snapshot(feed):
+    fake, feed = feed
+    household_id = fake.tables['households'][0]['id']
+    with tenancy.use(household_id):
+        snapshot.current()
+        feed.publish('profiles', 'DELETE', old_record={'id': 'gone', 'household_id': household_id})
+    assert household_id in snapshot._stale
+
+
+def test_log_insert_invalidates_that_households_activity(feed):
+    fake, feed = feed
+    household_id = fake.tables['households'][0]['id']
+    with tenancy.use(household_id):
+        cache.store.set(('activity', None, 0), ['cached'], 60)
+        feed.publish('mission_log', 'INSERT', {'user_id': 'u1', 'household_id': household_id})
+        assert cache.store.get(('activity', None, 0)) == (False, None)
+
@@ -0,0 +1,100 @@
+import pytest
+from postgrest.exceptions import APIError
+
+import db
+import outbox
+
+
+class RecordingSink:
+    def __init__(self, fail=None):
+        self.calls = []
+        self.fail = fail  # fail(kind, payloads) -> 올릴 예외 또는 None
+
+    def __call__(self, kind, payloads):
+        self.calls.append((kind, [payload.get('idempotency_key') or payload.get('check_date') for payload in payloads]))
+        error = self.fail and self.fail(kind, payloads)
+        if error:
+            raise error
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return outbox.Outbox(str(tmp_path / 'outbox.sqlite3'))
+
+
+def points(key, batch=None, **extra):
+    return ('points', {'user_id': 'u1', 'delta': 10, 'idempotency_key': key, 'household_id': 'h1',
+                       **({'batch': batch} if batch else {}), **extra})
+
+
+def daily_check(check_date, score=-1):
+    return ('daily_check', {'user_id': 'u1', 'check_date': check_date, 'daily_score': score,
+                            'violated_items': [], 'household_id': 'h1'})
+
+
+def flush_all(flusher):
+    while flusher.flush_once():
+        pass
+
+
+def test_same_kind_ops_go_in_one_call_in_order(queue):
+    queue.enqueue([points('a'), points('b'), daily_check('2024-05-01'), points('c')])
+    sink = RecordingSink()
+    flush_all(outbox.Flusher(queue, sink))
+    assert sink.calls == [('points', ['a', 'b']), ('daily_check', ['2024-05-01']), ('points', ['c'])]
+    assert queue.counts() == {'pending': 0, 'failed': 0}
+
+
+def test_batch_is_not_split_across_pages(queue):
+    queue.enqueue([points('a'), points('b0', batch='b'), points('b1', batch='b'), points('b2', batch='b')])
+    sink = RecordingSink()
+    flush_all(outbox.Flusher(queue, sink, batch_size=2))
+    assert sink.calls == [('points', ['a']), ('points', ['b0', 'b1', 'b2'])]
+
+
+def test_duplicate_points_key_is_queued_once(queue):
+    assert queue.enqueue([points('a'), points('a')]) == 1
+
+
+def test_sink_keeps_last_daily_check_per_user_and_day(monkeypatch):
+    sent = []
+    monkeypatch.setattr(db, 'upsert_daily_checks', lambda rows: sent.append(rows))
+    outbox.supabase_sink('daily_check', [daily_check('2024-05-01', -1)[1], daily_check('2024-05-02')[1],
+                                         daily_check('2024-05-01', -3)[1]])
+    assert [(row['check_date'], row['daily_score']) for row in sent[0]] == [('2024-05-01', -3), ('2024-05-02', -1)]
+
+
+def test_transient_error_keeps_ops_pending(queue):
+    queue.enqueue([points('a'), points('b')])
+    flusher = outbox.Flusher(queue, RecordingSink(fail=lambda kind, payloads: ConnectionError('offline')))
+    with pytest.raises(ConnectionError):
+        flusher.flush_once()
+    assert queue.counts() == {'pending': 2, 'failed': 0}
+
+
+def test_permanent_error_fails_only_the_rejected_batch(queue):
+    queue.enqueue([points('a0', batch='a'), points('a1', batch='a'), points('b0', batch='b', bad=True),
+                   points('b1', batch='b'), points('c')])
+    rejected = APIError({'code': 'P0001', 'message': 'insufficient_points', 'details': '0'})
+    sink = RecordingSink(fail=lambda kind, payloads: rejected if any(p.get('bad') for p in payloads) else None)
+    flush_all(outbox.Flusher(queue, sink))
+    assert sorted(op['payload']['idempotency_key'] for op in queue.failed()) == ['b0', 'b1']
+    assert queue.counts() == {'pending': 0, 'failed': 2}
+
+
+def test_cardinality_violation_does_not_block_later_writes(queue):
+    queue.enqueue([daily_check('2024-05-01')])
+    queue.enqueue([points('a')])
+    error = APIError({'code': '21000', 'message': 'ON CONFLICT DO UPDATE command cannot affect row a second time'})
+    sink = RecordingSink(fail=lambda kind, payloads: error if kind == 'daily_check' else None)
+    flush_all(outbox.Flusher(queue, sink))
+    assert queue.counts() == {'pending': 0, 'failed': 1}
+    assert sink.calls[-1] == ('points', ['a'])
+
+
+@pytest.mark.parametrize('code, permanent', [
+    ('P0001', True), ('21000', True), ('22P02', True), ('23505', True),
+    ('40001', False), ('57014', False), (400, True), (404, True), (408, False), (429, False), (503, False),
+])
+def test_is_permanent(code, permanent):
+    assert outbox.is_permanent(APIError({'code': code, 'message': 'error'})) is permanent
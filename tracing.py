@@ -0,0 +1,217 @@
+import contextvars
+import json
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Optional
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# --- 조회 추적 ---
+# 화면을 한 번 그리는 동안(rerun) 일어난 DB 요청과 캐시 조회를 기록해서 사이드바에 보여줍니다.
+# 사이드바의 "🔧 성능 보기" 를 켠 세션에서만 기록하고, 꺼져 있으면 db.py 는 원래 클라이언트를 그대로 씁니다.
+#
+# 기록 하나에 남는 것
+#   kind    : 'table' / 'rpc' / 'cache'
+#   name    : 테이블 이름, RPC 이름, 캐시 namespace
+#   shape   : 값은 빼고 어떤 조건으로 조회했는지 ("select(id, full_name) eq(id) single()")
+#   ms      : 걸린 시간 (캐시 적중이면 0 에 가깝습니다)
+#   rows    : 돌려받은 행 수
+#   bytes   : 응답을 JSON 으로 바꾼 크기 (실제 전송량의 근사치)
+#   cache   : 'hit' / 'miss' (캐시 기록만)
+#
+# 기록은 contextvar 에 담기므로 db.fetch_parallel 의 작업 스레드에서 일어난 요청도 같은 rerun 에 모입니다.
+# st.fragment 만 다시 그려질 때는 start_fragment 가 새 기록을 시작하므로 앞선 rerun 의 기록에 섞이지 않습니다.
+# TRACE_LOG_PATH 설정이 있으면 모든 기록을 그 파일에 JSON lines 로 이어 씁니다.
+
+MAX_RECORDS = 500
+
+
+@dataclass
+class TraceRecord:
+    kind: str
+    name: str
+    shape: str = ''
+    ms: float = 0.0
+    rows: Optional[int] = None
+    bytes: Optional[int] = None
+    cache: Optional[str] = None
+    error: Optional[str] = None
+    thread: str = ''
+    at: float = 0.0
+
+
+@dataclass
+class Trace:
+    script: str
+    fragment: str = ''  # 조각만 다시 그린 기록이면 그 조각의 이름
+    started: float = field(default_factory=time.time)
+    records: list[TraceRecord] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, record: TraceRecord) -> None:
+        with self.lock:
+            if len(self.records) < MAX_RECORDS:
+                self.records.append(record)
+
+
+_current: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar('trace', default=None)
+_log_lock = threading.Lock()
+_log_path: Optional[str] = None
+
+
+def active() -> bool:
+    return _current.get() is not None
+
+
+def _record(record: TraceRecord) -> None:
+    trace = _current.get()
+    if trace is None:
+        return
+    record.thread = threading.current_thread().name
+    record.at = time.time()
+    trace.add(record)
+    if _log_path:
+        with _log_lock, open(_log_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'script': trace.script, 'fragment': trace.fragment, 'rerun_started': trace.started, **asdict(record)}, ensure_ascii=False) + '\n')
+
+
+def record_cache(namespace: str, hit: bool, ms: float = 0.0, shape: str = '') -> None:
+    if active():
+        _record(TraceRecord('cache', namespace, shape=shape, ms=round(ms, 2), cache='hit' if hit else 'miss'))
+
+
+# --- 클라이언트 감싸기 ---
+
+def _payload_size(data: Any) -> int:
+    return len(json.dumps(data, ensure_ascii=False, default=str).encode('utf-8'))
+
+
+# 조회 조건을 값 없이 요약합니다. 예) eq('id', '...') -> "eq(id)", in_('id', [...3개]) -> "in_(id[3])"
+def _describe(method: str, args: tuple, kwargs: dict) -> str:
+    if method == 'select':
+        return f"select({args[0] if args else '*'})"
+    if method in ('upsert', 'insert') and args:
+        return f"{method}({len(args[0]) if isinstance(args[0], list) else 1} rows)"
+    if method in ('limit',) and args:
+        return f'{method}({args[0]})'
+    if method in ('in_',) and len(args) > 1:
+        return f'{method}({args[0]}[{len(args[1])}])'
+    if method in ('or_', 'range', 'single', 'maybe_single'):
+        return f'{method}()'
+    if args and isinstance(args[0], str):
+        return f'{method}({args[0]})'
+    return f'{method}()'
+
+
+class _TracedRequest:
+    def __init__(self, target: Any, kind: str, name: str, shape: list[str]):
+        self._target = target
+        self._kind = kind
+        self._name = name
+        self._shape = shape
+
+    def __getattr__(self, attr: str) -> Any:
+        value = getattr(self._target, attr)
+        if not callable(value):
+            return value
+
+        def call(*args, **kwargs):
+            result = value(*args, **kwargs)
+            if hasattr(result, 'execute'):
+                return _TracedRequest(result, self._kind, self._name, self._shape + [_describe(attr, args, kwargs)])
+            return result
+        return call
+
+    def execute(self) -> Any:
+        record = TraceRecord(self._kind, self._name, shape=' '.join(self._shape))
+        started = time.perf_counter()
+        try:
+            response = self._target.execute()
+        except Exception as e:
+            record.error = f'{type(e).__name__}: {e}'
+            raise
+        else:
+            data = response.data
+            record.rows = len(data) if isinstance(data, list) else int(data is not None)
+            record.bytes = _payload_size(data)
+            return response
+        finally:
+            record.ms = round((time.perf_counter() - started) * 1000, 2)
+            _record(record)
+
+
+class _TracedClient:
+    def __init__(self, client: Any):
+        self._client = client
+
+    def table(self, name: str) -> _TracedRequest:
+        return _TracedRequest(self._client.table(name), 'table', name, [])
+
+    def rpc(self, name: str, params: dict) -> _TracedRequest:
+        return _TracedRequest(self._client.rpc(name, params), 'rpc', name, [f"({', '.join(params)})"])
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._client, attr)
+
+
+# 추적 중이면 요청마다 기록을 남기는 클라이언트로 감싸서 돌려줍니다.
+def wrap(client: Any) -> Any:
+    return _TracedClient(client) if active() else client
+
+
+# --- 화면 ---
+
+# 스크립트 맨 위(st.set_page_config 다음)에서 부릅니다.
+# 사이드바에 켜고 끄는 스위치를 그리고, 켜져 있으면 이번 rerun 의 기록을 시작합니다.
+def start_rerun(script: str) -> None:
+    global _log_path
+    from db import get_setting
+
+    _log_path = get_setting('TRACE_LOG_PATH', '') or None
+    enabled = st.sidebar.toggle("🔧 성능 보기", key='trace_enabled',
+                                help="이번 화면을 그리는 동안의 DB 요청 수, 시간, 캐시 적중 여부를 보여줍니다.")
+    _current.set(Trace(script) if enabled else None)
+
+
+# st.fragment 함수 맨 위에서 부릅니다. 조각만 다시 그려질 때(run_every 등)는 start_rerun 이 불리지 않으므로
+# 여기서 새 기록을 시작합니다. 화면 전체를 그리는 중이면 그 rerun 의 기록에 그대로 모읍니다.
+def start_fragment(name: str) -> None:
+    trace = _current.get()
+    ctx = get_script_run_ctx()
+    if trace is not None and ctx is not None and ctx.fragment_ids_this_run:
+        _current.set(Trace(trace.script, fragment=name))
+
+
+# 스크립트 맨 끝에서 부릅니다. 이번 rerun 에 모인 기록을 사이드바에 보여줍니다.
+def show_panel() -> None:
+    trace = _current.get()
+    if trace is None:
+        return
+    with trace.lock:
+        records = list(trace.records)
+    queries = [r for r in records if r.kind != 'cache']
+    cache_records = [r for r in records if r.kind == 'cache']
+    hits = sum(1 for r in cache_records if r.cache == 'hit')
+
+    with st.sidebar.expander("🔧 이번 화면의 조회 기록", expanded=True):
+        st.metric("화면 그리기", f"{(time.time() - trace.started) * 1000:.0f} ms")
+        col1, col2 = st.columns(2)
+        col1.metric("DB 요청", len(queries))
+        col2.metric("DB 시간 합계", f"{sum(r.ms for r in queries):.0f} ms")
+        col1.metric("캐시 적중", f"{hits}/{len(cache_records)}")
+        col2.metric("응답 크기", f"{sum(r.bytes or 0 for r in queries) / 1024:.1f} KB")
+        if records:
+            st.dataframe(
+                [{'종류': r.kind, '이름': r.name, '조건': r.shape, 'ms': r.ms, '행': r.rows,
+                  'bytes': r.bytes, '캐시': r.cache, '오류': r.error} for r in records],
+                hide_index=True,
+            )
+        if len(records) >= MAX_RECORDS:
+            st.caption(f"기록이 많아 처음 {MAX_RECORDS}개만 보여줍니다.")
+        st.download_button(
+            "JSON lines 로 받기",
+            '\n'.join(json.dumps({'script': trace.script, **asdict(r)}, ensure_ascii=False) for r in records),
+            file_name='trace.jsonl', mime='application/jsonl',
+        )
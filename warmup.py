@@ -0,0 +1,73 @@
+import threading
+import time
+from typing import Optional
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+import db
+import snapshot
+import tenancy
+
+# --- 서버 시작 준비 (warm-up) ---
+# 서버가 새로 뜬 뒤 처음 들어온 화면이 부르면, 백그라운드 스레드가 프로세스당 한 번
+#   1. Supabase 클라이언트를 만들고 (supabase, postgrest, httpx import 포함)
+#   2. 가구마다 공유 스냅샷(프로필, 미션/보상, 체크리스트 항목)을 만들어 두고
+#   3. 표와 통계 화면이 쓰는 pandas 를 미리 가져옵니다.
+# 첫 화면은 기다리지 않고 그려지고, 이어서 여는 화면들은 이미 준비된 클라이언트와 캐시를 씁니다.
+# WARMUP_ENABLED 설정을 false 로 두면 끕니다.
+
+MAX_HOUSEHOLDS = 50
+
+_lock = threading.Lock()
+_started = False
+# 단계별 걸린 시간(ms). 벤치마크(bench/startup.py)에서 확인합니다.
+timings: dict[str, float] = {}
+
+
+def enabled() -> bool:
+    return str(db.get_setting("WARMUP_ENABLED", "true")).lower() in ('1', 'true', 'yes')
+
+
+def _step(name: str, fn) -> None:
+    started = time.perf_counter()
+    try:
+        fn()
+    except Exception:
+        # 준비에 실패해도 화면에서 필요할 때 다시 불러오므로 그냥 넘어갑니다.
+        pass
+    timings[name] = round((time.perf_counter() - started) * 1000, 1)
+
+
+def _warm_catalogs() -> None:
+    for household_id in db.list_household_ids(MAX_HOUSEHOLDS):
+        with tenancy.use(household_id):
+            snapshot.current()
+
+
+def _import_pandas() -> None:
+    import pandas  # noqa: F401
+
+
+def run() -> None:
+    _step('client', db.get_client)
+    if db.get_client() is not None:
+        _step('catalogs', _warm_catalogs)
+    _step('pandas', _import_pandas)
+
+
+# 프로세스마다 한 번만 실행합니다. background=False 면 끝날 때까지 기다립니다. (벤치마크용)
+def start(background: bool = True) -> Optional[threading.Thread]:
+    global _started
+    with _lock:
+        if _started or not enabled():
+            return None
+        _started = True
+    if not background:
+        run()
+        return None
+    thread = threading.Thread(target=run, name='warmup', daemon=True)
+    # st.cache_resource(공용 클라이언트)를 쓰므로 화면 스크립트의 실행 정보를 넘겨줍니다.
+    if get_script_run_ctx() is not None:
+        add_script_run_ctx(thread, get_script_run_ctx())
+    thread.start()
+    return thread